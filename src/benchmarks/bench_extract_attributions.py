@@ -0,0 +1,68 @@
+"""1文ずつの属性抽出とまとめた属性抽出の処理時間を比較する
+
+AttributionExtractor.extract_attribution_with_options を1文ずつ呼び出す方法と、
+extract_attributions_with_options でまとめて処理する方法(同じ文は1回だけ解析する)で
+同じ文の一覧を処理し、結果が一致することを確かめた上でそれぞれの処理時間を表示する
+--input を省略した場合は、定型的な短文が繰り返し現れる人工的な文の一覧を使う
+
+Usage:
+  python benchmarks/bench_extract_attributions.py ../dictionary
+  python benchmarks/bench_extract_attributions.py ../dictionary --input sentences.txt
+"""
+import argparse
+import random
+import time
+
+from review_research.nlp import AttributionExtractor
+
+FORMULAIC_SENTENCES = ('良いです。', '満足です。', '画面がきれいです。', '電池の持ちが良い。')
+VARIED_SENTENCE = '{}番目の商品は画面の大きさと電池の持ちが気に入りました。'
+
+def make_sentences(num_sentences: int, formulaic_rate: float,
+                   seed: int = 0):
+  """formulaic_rate の割合で定型的な短文を含む文の一覧を作る"""
+  rng = random.Random(seed)
+  return [rng.choice(FORMULAIC_SENTENCES) if rng.random() < formulaic_rate
+          else VARIED_SENTENCE.format(i)
+          for i in range(num_sentences)]
+
+
+def main(args):
+  if args.input:
+    with open(args.input, encoding='utf-8') as f:
+      sentences = [line.strip() for line in f if line.strip()]
+
+  else:
+    sentences = make_sentences(args.sentences, args.formulaic_rate)
+
+  extractor = AttributionExtractor(args.dic_dir)
+  extractor.category = args.category
+  print('sentences: {}, unique: {}'.format(len(sentences), len(set(sentences))))
+
+  start = time.perf_counter()
+  one_by_one = [extractor.extract_attribution_with_options(sentence)
+                for sentence in sentences]
+  print('{:<12} {:>10.3f} s'.format('one-by-one', time.perf_counter() - start))
+
+  start = time.perf_counter()
+  batched = extractor.extract_attributions_with_options(sentences)
+  print('{:<12} {:>10.3f} s'.format('batched', time.perf_counter() - start))
+
+  if batched != one_by_one:
+    raise AssertionError('results differ')
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument('dic_dir',
+                      help='属性辞書を格納しているフォルダパス')
+  parser.add_argument('--category', default='smartphone',
+                      help='属性抽出に使う商品カテゴリ')
+  parser.add_argument('--input', default=None,
+                      help='1行1文のテキストファイル(省略時は人工的な文の一覧)')
+  parser.add_argument('--sentences', type=int, default=5000,
+                      help='人工的な文の数')
+  parser.add_argument('--formulaic-rate', type=float, default=0.3,
+                      help='人工的な文のうち定型的な短文の割合')
+
+  main(parser.parse_args())
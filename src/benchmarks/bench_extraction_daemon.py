@@ -0,0 +1,93 @@
+"""属性抽出デーモンのレイテンシとスループットを計測する
+
+起動済みのデーモン(review_research/serve_extraction.py)へ複数のスレッドから
+同時にリクエストを送り、クライアントから見たリクエストごとのレイテンシの
+p50/p99 と、1秒あたりに処理できた文の数を表示する
+デーモン側で集計したレイテンシと、1回の属性抽出でまとめて処理した文の数の平均も表示する
+
+Usage:
+  python review_research/serve_extraction.py ../dictionary &
+  python benchmarks/bench_extraction_daemon.py --clients 1 4 16
+  python benchmarks/bench_extraction_daemon.py --address 127.0.0.1:8765 --request-size 1
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from review_research.nlp import ExtractionClient
+from review_research.nlp.extraction_daemon import DEFAULT_DAEMON_ADDRESS
+from review_research.nlp.extraction_daemon import _percentile
+
+SAMPLE_SENTENCES = ('画面がとてもきれいで、文字も読みやすいです。',
+                    '電池の持ちが悪く、1日に2回は充電が必要になります。',
+                    '値段の割にカメラの性能が良く、夜景もきれいに撮れました。',
+                    '指紋認証の反応が遅いのが少し気になります。')
+
+def run_client(args, client_id: int) -> List[float]:
+  """1つのクライアントからリクエストを送り、リクエストごとのレイテンシ(秒)を返す"""
+  latencies = []
+  with ExtractionClient(args.address, request_size=args.request_size) as client:
+    for request_id in range(args.requests):
+      items = [(request_id, i, SAMPLE_SENTENCES[(client_id + i) % len(SAMPLE_SENTENCES)])
+               for i in range(args.request_size)]
+      start = time.perf_counter()
+      for _ in client.extract(items, args.category):
+        pass
+
+      latencies.append(time.perf_counter() - start)
+
+  return latencies
+
+
+def main(args):
+  client = ExtractionClient.connect_if_running(args.address)
+  if client is None:
+    print('The extraction daemon is not running on {}.'.format(args.address),
+          file=sys.stderr)
+    sys.exit(1)
+
+  client.close()
+
+  fmt = '{:>8} {:>10} {:>10} {:>16} {:>12} {:>12}'
+  print(fmt.format('clients', 'p50[ms]', 'p99[ms]', 'throughput[s/s]',
+                   'daemon p99', 'batch size'))
+  for num_clients in args.clients:
+    with ExtractionClient(args.address) as client:
+      before = client.stats()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(num_clients) as executor:
+      results = executor.map(lambda i: run_client(args, i), range(num_clients))
+      latencies = sorted(latency for result in results for latency in result)
+
+    elapsed = time.perf_counter() - start
+    with ExtractionClient(args.address) as client:
+      after = client.stats()
+
+    num_sentences = num_clients * args.requests * args.request_size
+    num_batches = after.batches - before.batches
+    batch_size = (after.sentences - before.sentences) / num_batches if num_batches else 0.0
+    print(fmt.format(num_clients,
+                     '{:.1f}'.format(_percentile(latencies, 0.50) * 1000),
+                     '{:.1f}'.format(_percentile(latencies, 0.99) * 1000),
+                     '{:.1f}'.format(num_sentences / elapsed),
+                     '{:.1f}'.format(after.p99_ms),
+                     '{:.1f}'.format(batch_size)))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--address', default=DEFAULT_DAEMON_ADDRESS,
+                      help='デーモンのアドレス(「ホスト:ポート」または Unix ソケットのパス)')
+  parser.add_argument('--category', default='smartphone',
+                      help='属性抽出に使う商品カテゴリ')
+  parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16],
+                      help='同時にリクエストを送るクライアント数')
+  parser.add_argument('--requests', type=int, default=100,
+                      help='クライアントごとのリクエスト数')
+  parser.add_argument('--request-size', type=int, default=4,
+                      help='1回のリクエストで送る文の数')
+
+  main(parser.parse_args())
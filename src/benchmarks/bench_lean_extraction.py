@@ -0,0 +1,78 @@
+"""属性の情報をまとめる抽出と、属性の番号だけを返す抽出の処理時間を比較する
+
+各文を1度だけ係り受け解析して結果を保持しておき、その結果に対して
+extract_attribution(属性ごとの情報をまとめた辞書を返す)と
+extract_attribute_ids(属性の番号だけを返す)を実行して、
+係り受け解析を除いた1文あたりの時間を表示する
+参考として、係り受け解析にかかった1文あたりの時間も表示する
+
+Usage:
+  python benchmarks/bench_lean_extraction.py ../dictionary
+  python benchmarks/bench_lean_extraction.py ../dictionary --input sentences.txt --category smartphone
+"""
+import argparse
+import time
+import timeit
+
+from review_research.nlp import AttributionExtractor
+
+SAMPLE_SENTENCES = ('画面がとてもきれいで、文字も読みやすいです。',
+                    '電池の持ちが悪く、1日に2回は充電が必要になります。',
+                    '値段の割にカメラの性能が良く、夜景もきれいに撮れました。',
+                    '指紋認証の反応が遅いのが少し気になります。',
+                    '画面の大きさと電池の持ちと本体の軽さが気に入りました。')
+
+def main(args):
+  if args.input:
+    with open(args.input, encoding='utf-8') as f:
+      sentences = [line.strip() for line in f if line.strip()]
+
+  else:
+    sentences = list(SAMPLE_SENTENCES)
+
+  extractor = AttributionExtractor(args.dic_dir)
+  extractor.category = args.category
+
+  start = time.perf_counter()
+  analysis_results = {sentence: extractor._analyze(sentence)
+                      for sentence in sentences}
+  analysis_seconds = time.perf_counter() - start
+  # 以降は保持しておいた解析結果を使い、係り受け解析の時間を含めずに計測する
+  extractor._analyze = analysis_results.__getitem__
+
+  for sentence in sentences:
+    attr_ids = extractor.extract_attribute_ids(sentence)
+    names = [extractor.attr_names[attr_id] for attr_id in attr_ids]
+    if names != list(extractor.extract_attribution(sentence)):
+      raise AssertionError('results differ: {}'.format(sentence))
+
+  per_sentence = lambda seconds: seconds / len(sentences) * 1e6
+  times = dict()
+  for name, extract in (('full', extractor.extract_attribution),
+                        ('lean', extractor.extract_attribute_ids)):
+    run = lambda: [extract(sentence) for sentence in sentences]
+    seconds = min(timeit.repeat(run, number=args.number, repeat=args.repeat))
+    times[name] = per_sentence(seconds / args.number)
+
+  print('sentences: {}'.format(len(sentences)))
+  print('{:<10} {:>12.1f} us/sentence'.format('analysis', per_sentence(analysis_seconds)))
+  print('{:<10} {:>12.1f} us/sentence'.format('full', times['full']))
+  print('{:<10} {:>12.1f} us/sentence'.format('lean', times['lean']))
+  print('saving: {:.1f} us/sentence ({:.0%})'.format(
+      times['full'] - times['lean'], 1 - times['lean'] / times['full']))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument('dic_dir',
+                      help='属性辞書を格納しているフォルダパス')
+  parser.add_argument('--category', default='smartphone',
+                      help='属性抽出に使う商品カテゴリ')
+  parser.add_argument('--input', default=None,
+                      help='1行1文のテキストファイル(省略時は組み込みの例文)')
+  parser.add_argument('--number', type=int, default=100,
+                      help='1回の計測で全ての文を処理する回数')
+  parser.add_argument('--repeat', type=int, default=5,
+                      help='計測回数(最小値を表示する)')
+
+  main(parser.parse_args())
@@ -0,0 +1,105 @@
+"""文節の主辞・機能語の抽出方法ごとの処理時間を比較する
+
+表層の照合による抽出(PhraseDetail.from_analysis_result)と、
+CaboCha の主辞・機能語の位置による抽出(PhraseDetail.from_token_positions)を
+人工的に作った長い文の解析結果に対して実行し、1文あたりの時間と
+2つの方法で結果が異なった文節の数を表示する
+--text を指定した場合は、その文を CaboCha で解析した結果を使う
+
+Usage:
+  python benchmarks/bench_phrase_detail.py --chunks 200 --tokens 6
+  python benchmarks/bench_phrase_detail.py --repeated-surfaces
+  python benchmarks/bench_phrase_detail.py --text "長い文..."
+"""
+import argparse
+import timeit
+from collections import OrderedDict
+
+from review_research.nlp import ChunkDetail
+from review_research.nlp import TokenDetail
+from review_research.nlp import TokenFeature
+from review_research.nlp import DependencyAnalyzer
+
+NOUN_FEATURE = '名詞,一般,*,*,*,*,{0},*,*'
+PARTICLE_FEATURE = '助詞,格助詞,一般,*,*,*,{0},*,*'
+
+def make_synthetic_analysis(num_chunks: int, num_tokens: int,
+                            repeated_surfaces: bool = False):
+  """名詞の連続と格助詞からなる文節を num_chunks 個並べた解析結果を作る
+
+  repeated_surfaces が True の場合は、文節内に同じ表層の名詞を繰り返し含める
+
+  Returns:
+    (ChunkDict, AllocationDict) の組
+  """
+  chunk_dict = OrderedDict()
+  alloc_dict = OrderedDict()
+  token_id = 0
+  for chunk_id in range(num_chunks):
+    num_kinds = 2 if repeated_surfaces else num_tokens
+    surfaces = ['語{}'.format(i % num_kinds)
+                for i in range(num_tokens - 1)] + ['が']
+    tokens = OrderedDict()
+    for i, surface in enumerate(surfaces):
+      fmt = PARTICLE_FEATURE if i == num_tokens - 1 else NOUN_FEATURE
+      feature = TokenFeature.from_feature_string(fmt.format(surface))
+      tokens[token_id] = TokenDetail(surface, surface, feature, 'O', None)
+      token_id += 1
+
+    features = {'RL': surfaces[0], 'RH': surfaces[-2],
+                'LF': surfaces[-1], 'RF': surfaces[-1], 'SHP0': '名詞'}
+    next_link = chunk_id + 1 if chunk_id < num_chunks - 1 else -1
+    chunk_dict[chunk_id] = ChunkDetail(
+        ''.join(surfaces), 0.0, next_link, num_tokens, token_id - num_tokens,
+        num_tokens - 2, num_tokens - 1, features)
+    alloc_dict[chunk_id] = tokens
+
+  return chunk_dict, alloc_dict
+
+
+def main(args):
+  analyzer = DependencyAnalyzer()
+  if args.text:
+    result = analyzer.analyze(args.text)
+    chunk_dict = result.chunk_dict
+    alloc_dict = analyzer.allocate_token_for_chunk(chunk_dict, result.token_dict)
+
+  else:
+    chunk_dict, alloc_dict = make_synthetic_analysis(args.chunks, args.tokens,
+                                                     args.repeated_surfaces)
+
+  print('chunks: {}, tokens: {}'.format(
+      len(chunk_dict), sum(len(tokens) for tokens in alloc_dict.values())))
+  for by_position in (False, True):
+    name = 'position' if by_position else 'surface'
+    run = lambda: analyzer.extract_representation(chunk_dict, alloc_dict,
+                                                  by_position=by_position)
+    seconds = min(timeit.repeat(run, number=args.number, repeat=args.repeat))
+    print('{:<10} {:>10.3f} ms/sentence'.format(
+        name, seconds / args.number * 1000))
+
+  by_surface = analyzer.extract_representation(chunk_dict, alloc_dict,
+                                               by_position=False)
+  by_position = analyzer.extract_representation(chunk_dict, alloc_dict,
+                                                by_position=True)
+  num_diffs = sum(by_surface[chunk_id] != by_position[chunk_id]
+                  for chunk_id in chunk_dict)
+  print('different phrases: {}'.format(num_diffs))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--chunks', type=int, default=200,
+                      help='人工的な文の文節数')
+  parser.add_argument('--tokens', type=int, default=6,
+                      help='人工的な文の1文節あたりの形態素数')
+  parser.add_argument('--repeated-surfaces', action='store_true',
+                      help='人工的な文の文節内に同じ表層の形態素を繰り返し含める')
+  parser.add_argument('--text', default=None,
+                      help='CaboCha で解析して計測に使う文')
+  parser.add_argument('--number', type=int, default=20,
+                      help='1回の計測で処理する回数')
+  parser.add_argument('--repeat', type=int, default=5,
+                      help='計測回数(最小値を表示する)')
+
+  main(parser.parse_args())
@@ -0,0 +1,123 @@
+"""エントリポイントごとの読み込み時間とメモリ使用量を計測する
+
+各モジュールを新しい Python プロセスで import し、import にかかった時間と
+プロセスの最大 RSS を表示する
+
+Usage:
+  python benchmarks/bench_startup.py
+  python benchmarks/bench_startup.py review_research.review --repeat 10
+"""
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+from typing import NamedTuple, List, Optional
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = ('review_research',
+                'review_research.review',
+                'review_research.review.review_data',
+                'review_research.review.collect_review_page',
+                'review_research.nlp',
+                'review_research.nlp.normalize',
+                'review_research.nlp.tokenizer',
+                'review_research.nlp.extract_attribution',
+                'review_research.predict_allocating_attributes',
+                'review_research.mapping_sentences',
+                'review_research.evaluate_attr_extraction')
+
+# 子プロセスで実行するコード(import 前後の時間と最大 RSS を JSON で出力する)
+_MEASURE_CODE = '''
+import json, sys, time
+try:
+  import resource
+except ImportError:
+  resource = None
+
+def max_rss_kb():
+  if resource is None:
+    return None
+  rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # macOS はバイト単位、Linux は KB 単位
+  return rss // 1024 if sys.platform == 'darwin' else rss
+
+before = max_rss_kb()
+start = time.perf_counter()
+error = None
+try:
+  __import__({module!r})
+except Exception as e:
+  error = '{{}}: {{}}'.format(type(e).__name__, e)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'rss_before_kb': before,
+                  'rss_after_kb': max_rss_kb(), 'error': error}}))
+'''
+
+class StartupResult(NamedTuple):
+  """1つのエントリポイントの計測結果
+
+  Attributes:
+    module (str): import したモジュール名
+    seconds (float): import にかかった時間の中央値(秒)
+    rss_kb (Optional[int]): import 後のプロセスの最大 RSS (KB)
+    rss_delta_kb (Optional[int]): import によって増えた最大 RSS (KB)
+    error (Optional[str]): import に失敗した場合のエラー
+  """
+  module: str
+  seconds: float
+  rss_kb: Optional[int]
+  rss_delta_kb: Optional[int]
+  error: Optional[str]
+
+
+def measure(module: str, repeat: int = 5) -> StartupResult:
+  """新しいプロセスで module を import したときの時間と RSS を計測する
+
+  Args:
+    module (str): モジュール名
+    repeat (int): 計測回数
+
+  Returns:
+    StartupResultインスタンス
+  """
+  records = []
+  for _ in range(repeat):
+    completed = subprocess.run(
+        [sys.executable, '-X', 'utf8', '-c', _MEASURE_CODE.format(module=module)],
+        cwd=str(SRC_DIR), stdout=subprocess.PIPE, check=True)
+    records.append(json.loads(completed.stdout.decode('utf-8')))
+
+  seconds = statistics.median(r['seconds'] for r in records)
+  last = records[-1]
+  rss_kb = last['rss_after_kb']
+  rss_delta_kb = None
+  if rss_kb is not None and last['rss_before_kb'] is not None:
+    rss_delta_kb = rss_kb - last['rss_before_kb']
+
+  return StartupResult(module, seconds, rss_kb, rss_delta_kb, last['error'])
+
+
+def main(args):
+  modules = args.modules or ENTRY_POINTS
+  results = [measure(module, args.repeat) for module in modules]  # type: List[StartupResult]
+
+  fmt = '{:<50} {:>10} {:>12} {:>12}  {}'
+  print(fmt.format('module', 'import[ms]', 'maxrss[MB]', 'delta[MB]', 'error'))
+  for result in results:
+    to_mb = lambda kb: '-' if kb is None else '{:.1f}'.format(kb / 1024)
+    print(fmt.format(result.module, '{:.1f}'.format(result.seconds * 1000),
+                     to_mb(result.rss_kb), to_mb(result.rss_delta_kb),
+                     result.error or ''))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument('modules', nargs='*',
+                      help='計測するモジュール名(省略時は主要なエントリポイント全て)')
+  parser.add_argument('--repeat', type=int, default=5,
+                      help='モジュールごとの計測回数')
+
+  main(parser.parse_args())
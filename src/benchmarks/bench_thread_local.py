@@ -0,0 +1,92 @@
+"""スレッド数ごとの形態素解析・係り受け解析のスループットを計測する
+
+スレッドごとに別の解析器を使う場合(ThreadLocalProvider)と、
+1つの解析器をロックで排他して全スレッドで共有する場合とで、
+1秒あたりに処理できた文の数を表示する
+解析器の生成時間を除くため、スレッド数ごとに1回処理してから計測する
+
+Usage:
+  python benchmarks/bench_thread_local.py
+  python benchmarks/bench_thread_local.py --target parser --threads 1 2 4 8
+  python benchmarks/bench_thread_local.py --input sentences.txt
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, List
+
+from review_research.nlp import ThreadLocalProvider
+
+SAMPLE_SENTENCES = ('画面がとてもきれいで、文字も読みやすいです。',
+                    '電池の持ちが悪く、1日に2回は充電が必要になります。',
+                    '値段の割にカメラの性能が良く、夜景もきれいに撮れました。',
+                    '指紋認証の反応が遅いのが少し気になります。')
+
+def _get_target(name: str):
+  """解析器の生成関数と、解析器で1文を処理する関数の組を返す"""
+  if name == 'tagger':
+    from review_research.nlp.singleton.mecab_tagger_singleton import _create_tagger
+    return _create_tagger, lambda tagger, text: tagger.parse(text)
+
+  from review_research.nlp.singleton.cabocha_parser_singleton import _create_parser
+  return _create_parser, lambda parser, text: parser.parseToString(text)
+
+
+def measure(run: Callable[[str], object], texts: List[str],
+            num_threads: int, repeat: int) -> float:
+  """num_threads 個のスレッドで texts を処理したときの文/秒を返す(最良値)"""
+  best = 0.0
+  with ThreadPoolExecutor(num_threads) as executor:
+    list(executor.map(run, texts))
+    for _ in range(repeat):
+      start = time.perf_counter()
+      list(executor.map(run, texts, chunksize=16))
+      best = max(best, len(texts) / (time.perf_counter() - start))
+
+  return best
+
+
+def main(args):
+  if args.input:
+    with open(args.input, encoding='utf-8') as f:
+      texts = [line.strip() for line in f if line.strip()]
+
+  else:
+    texts = list(SAMPLE_SENTENCES)
+
+  texts = (texts * (args.sentences // len(texts) + 1))[:args.sentences]
+  factory, parse = _get_target(args.target)
+
+  shared = factory()
+  lock = Lock()
+  def run_shared(text):
+    with lock:
+      return parse(shared, text)
+
+  fmt = '{:>8} {:>18} {:>18} {:>10}'
+  print('target: {}, sentences: {}'.format(args.target, len(texts)))
+  print(fmt.format('threads', 'shared[sent/s]', 'local[sent/s]', 'instances'))
+  for num_threads in args.threads:
+    provider = ThreadLocalProvider(factory, max_instances=num_threads)
+    run_local = lambda text: parse(provider.get_instance(), text)
+    shared_rate = measure(run_shared, texts, num_threads, args.repeat)
+    local_rate = measure(run_local, texts, num_threads, args.repeat)
+    print(fmt.format(num_threads, '{:.1f}'.format(shared_rate),
+                     '{:.1f}'.format(local_rate), provider.num_instances))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--target', choices=['tagger', 'parser'], default='tagger',
+                      help='計測する解析器(MeCab.Tagger または CaboCha.Parser)')
+  parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8],
+                      help='スレッド数')
+  parser.add_argument('--input', default=None,
+                      help='1行1文のテキストファイル(省略時は組み込みの例文)')
+  parser.add_argument('--sentences', type=int, default=2000,
+                      help='1回の計測で処理する文の数')
+  parser.add_argument('--repeat', type=int, default=3,
+                      help='計測回数(最大値を表示する)')
+
+  main(parser.parse_args())
@@ -0,0 +1,110 @@
+"""係り受け関係の更新(ristrict モード)の処理時間を計測する
+
+「の」「と」「や」の機能語とストップワードの主辞を含む人工的な係り受け関係を作り、
+終端からの1回の走査による更新と、変化がなくなるまで全体を更新し直す方法とで
+結果が一致することを確かめた上で、それぞれの処理時間を表示する
+
+Usage:
+  python benchmarks/bench_update_linkdetails.py
+  python benchmarks/bench_update_linkdetails.py --lengths 100 500 1000
+  python benchmarks/bench_update_linkdetails.py --parallel
+"""
+import argparse
+import random
+import timeit
+from typing import FrozenSet, Tuple
+
+from review_research.nlp import LinkDetail
+from review_research.nlp import PhraseDetail
+from review_research.nlp.extract_attribution import PAEALLEL_PRESENTATION_WORDS
+from review_research.nlp.extract_attribution import _update_linkdetails
+
+STOPWORDS = frozenset(['こと', 'もの', 'ところ'])
+HEADS = ('画面', '電池', '値段', 'こと', 'もの', 'ところ')
+FUNCTIONAL_WORDS = ('の', 'の', 'と', 'や', 'が', 'は', '')
+PARTS_OF_SPEECH = ('名詞', '名詞', '名詞', '動詞', '形容詞')
+
+def make_synthetic_chain(length: int, seed: int = 0,
+                         parallel: bool = False) -> Tuple[LinkDetail, ...]:
+  """length 個の文節が係り受けでつながった人工的な係り受け関係を作る
+
+  parallel が True の場合は、全ての文節を「と」でつないだ名詞の並列とする
+  (末尾の機能語が先頭まで1文節ずつ伝わるため、全体を更新し直す方法では最も遅くなる)
+  """
+  if parallel:
+    phrase_detail = PhraseDetail('画面', tuple(), '名詞', 'と')
+    chain = [LinkDetail(phrase_id, phrase_detail)
+             for phrase_id in range(length - 1)]
+    last_phrase_detail = phrase_detail._replace(functional_word='が')
+    chain.append(LinkDetail(length - 1, last_phrase_detail))
+    return tuple(chain)
+
+  rng = random.Random(seed)
+  return tuple(
+      LinkDetail(phrase_id, PhraseDetail(rng.choice(HEADS), tuple(),
+                                         rng.choice(PARTS_OF_SPEECH),
+                                         rng.choice(FUNCTIONAL_WORDS)))
+      for phrase_id in range(length))
+
+
+def update_until_fixed(linkdetails: Tuple[LinkDetail, ...],
+                       stopwords: FrozenSet[str]) -> Tuple[LinkDetail, ...]:
+  """変化がなくなるまで全体に規則を適用し直す比較用の実装"""
+  original_funcs = [ld.phrase_detail.functional_word for ld in linkdetails]
+  updated_linkdetails = linkdetails
+  while True:
+    new_linkdetails = []
+    for curr_idx, curr_linkdetail in enumerate(updated_linkdetails[:-1]):
+      c_func = original_funcs[curr_idx]
+      n_head, _, n_pos, n_func = updated_linkdetails[curr_idx+1].phrase_detail
+      should_update = n_pos == '名詞' and (
+          (c_func == 'の' and n_head in stopwords)
+          or c_func in PAEALLEL_PRESENTATION_WORDS)
+      if should_update:
+        curr_linkdetail = LinkDetail(
+            curr_linkdetail.phrase_id,
+            curr_linkdetail.phrase_detail._replace(functional_word=n_func))
+
+      new_linkdetails.append(curr_linkdetail)
+
+    new_linkdetails.append(updated_linkdetails[-1])
+    new_linkdetails = tuple(new_linkdetails)
+    if new_linkdetails == updated_linkdetails:
+      return new_linkdetails
+
+    updated_linkdetails = new_linkdetails
+
+
+def main(args):
+  fmt = '{:>8} {:>16} {:>16}'
+  print(fmt.format('length', 'single[ms]', 'fixpoint[ms]'))
+  for length in args.lengths:
+    chains = [make_synthetic_chain(length, seed, args.parallel)
+              for seed in range(args.chains)]
+    for chain in chains:
+      expected = update_until_fixed(chain, STOPWORDS)
+      if _update_linkdetails(chain, STOPWORDS) != expected:
+        raise AssertionError('results differ for length {}'.format(length))
+
+    times = []
+    for update in (_update_linkdetails, update_until_fixed):
+      run = lambda: [update(chain, STOPWORDS) for chain in chains]
+      seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+      times.append('{:.3f}'.format(seconds / len(chains) * 1000))
+
+    print(fmt.format(length, *times))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--lengths', type=int, nargs='+',
+                      default=[10, 100, 300, 1000],
+                      help='係り受け関係の文節数')
+  parser.add_argument('--chains', type=int, default=20,
+                      help='文節数ごとに作る係り受け関係の数')
+  parser.add_argument('--parallel', action='store_true',
+                      help='全ての文節を「と」でつないだ係り受け関係を使う')
+  parser.add_argument('--repeat', type=int, default=3,
+                      help='計測回数(最小値を表示する)')
+
+  main(parser.parse_args())
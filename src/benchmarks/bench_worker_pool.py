@@ -0,0 +1,61 @@
+"""ワーカプロセスの起動時間とメモリ使用量を計測する
+
+ExtractionEngine のワーカプロセスをそれぞれ辞書を読み込む通常の方法と、
+親プロセスで辞書を読み込んでから fork する方法(preload)で起動し、
+ワーカごとの起動時間、RSS、他のプロセスと共有していないメモリ量と、
+全ワーカの起動にかかった時間、例文の処理にかかった時間を表示する
+
+Usage:
+  python benchmarks/bench_worker_pool.py ../dictionary
+  python benchmarks/bench_worker_pool.py ../dictionary --processes 8 --category smartphone
+"""
+import argparse
+import time
+
+from review_research.nlp import ExtractionEngine
+
+SAMPLE_SENTENCES = ('画面がとてもきれいで、文字も読みやすいです。',
+                    '電池の持ちが悪く、1日に2回は充電が必要になります。',
+                    '値段の割にカメラの性能が良く、夜景もきれいに撮れました。',
+                    '指紋認証の反応が遅いのが少し気になります。')
+
+def main(args):
+  to_mb = lambda kb: '-' if kb is None else '{:.1f}'.format(kb / 1024)
+  items = [(i, 1, SAMPLE_SENTENCES[i % len(SAMPLE_SENTENCES)])
+           for i in range(args.sentences)]
+  for preload in (False, True):
+    start = time.perf_counter()
+    with ExtractionEngine(args.dic_dir, processes=args.processes,
+                          preload=preload) as engine:
+      worker_stats = engine.worker_stats()
+      startup = time.perf_counter() - start
+
+      start = time.perf_counter()
+      for _ in engine.extract(items, args.category):
+        pass
+
+      elapsed = time.perf_counter() - start
+
+    print('preload: {}, startup: {:.2f} s, extraction: {:.2f} s'.format(
+        preload, startup, elapsed))
+    fmt = '{:>8} {:>12} {:>10} {:>12}'
+    print(fmt.format('pid', 'startup[s]', 'rss[MB]', 'private[MB]'))
+    for stats in worker_stats:
+      print(fmt.format(stats.pid, '{:.2f}'.format(stats.startup_seconds),
+                       to_mb(stats.rss_kb), to_mb(stats.private_kb)))
+
+    print()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument('dic_dir',
+                      help='属性辞書を格納しているフォルダパス')
+  parser.add_argument('--processes', type=int, default=4,
+                      help='ワーカプロセス数')
+  parser.add_argument('--category', default='smartphone',
+                      help='属性抽出に使う商品カテゴリ')
+  parser.add_argument('--sentences', type=int, default=2000,
+                      help='処理する例文の数')
+
+  main(parser.parse_args())
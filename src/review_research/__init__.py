@@ -1,8 +1,35 @@
-from . import nlp
-from . import analysis
-from . import review
-
-from .mapping_sentences import STAR_CORRESPONDENCE_DICT
-from .mapping_sentences import MappingResult
-from .mapping_sentences import ReviewTextInfoForMapping
-from .mapping_sentences import SentenceMapper
\ No newline at end of file
+"""レビュー研究用パッケージ
+
+nlp や analysis は MeCab、CaboCha、pandas などの読み込みに時間がかかるため、
+サブパッケージと各属性は初めて参照された時点で読み込む(PEP 562)
+"""
+import importlib
+
+# 遅延して読み込むサブパッケージ
+_LAZY_SUBMODULES = ('nlp', 'analysis', 'review')
+
+# 属性名と、その属性を定義しているモジュールの対応
+_LAZY_ATTRIBUTES = {
+    'STAR_CORRESPONDENCE_DICT': '.mapping_sentences',
+    'MappingResult': '.mapping_sentences',
+    'ReviewTextInfoForMapping': '.mapping_sentences',
+    'SentenceMapper': '.mapping_sentences',
+}
+
+def __getattr__(name: str):
+  if name in _LAZY_SUBMODULES:
+    return importlib.import_module('.' + name, __name__)
+
+  try:
+    module_name = _LAZY_ATTRIBUTES[name]
+
+  except KeyError:
+    msg = 'module {!r} has no attribute {!r}'
+    raise AttributeError(msg.format(__name__, name)) from None
+
+  value = getattr(importlib.import_module(module_name, __name__), name)
+  globals()[name] = value
+  return value
+
+def __dir__():
+  return sorted(set(globals()) | set(_LAZY_SUBMODULES) | set(_LAZY_ATTRIBUTES))
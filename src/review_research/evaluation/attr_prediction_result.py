@@ -1,7 +1,7 @@
 import pathlib
 import json
 from collections import OrderedDict
-from typing import Tuple, Dict, Any, Union, NamedTuple, NoReturn, Optional
+from typing import Tuple, Dict, Any, List, Union, NamedTuple, NoReturn, Optional
 
 from review_research.review import StarsDistribution
 from ..nlp import AttrExtractionResult
@@ -18,7 +18,7 @@ class ReviewTextInfo(NamedTuple):
     title (str): レビューのタイトル
     review (str): レビュー全文
     text (str): 対象としている文
-    result Optional(Dict[str, Tuple(AttrExtractionResult, ...)]): 抽出結果
+    result (Optional[Dict[str, Tuple[AttrExtractionResult, ...]]]): 抽出結果
   """
   review_id: int
   last_review_id: int
@@ -28,7 +28,7 @@ class ReviewTextInfo(NamedTuple):
   title: str
   review: str
   text: str
-  result: Optional(Dict[str, Tuple(AttrExtractionResult, ...)])
+  result: Optional[Dict[str, Tuple[AttrExtractionResult, ...]]]
 
   @classmethod
   def from_dictionary(cls, dictionary: Dict[str, Any]):
@@ -103,5 +103,19 @@ class AttrPredictionResult(NamedTuple):
     out_data['texts'] = [sentence._asdict() for sentence in self.texts]
 
     json_path = pathlib.Path(json_path)
-    json.dump(out_data, json_path.open('w', encoding='utf-8'),
-              ensure_ascii=False, indent=4)
+    with json_path.open('w', encoding='utf-8') as fp:
+      json.dump(out_data, fp, ensure_ascii=False, indent=4,
+                default=_encode_set)
+
+
+# ヘルパー関数群
+def _encode_set(value: Any) -> List[Any]:
+  """抽出結果の集合を JSON に変換できるように整列したリストにするヘルパー関数
+
+  集合には文字列と WordRepr (リストとして書き出す) が混在するため、文字列を先に並べる
+  """
+  if isinstance(value, (set, frozenset)):
+    return sorted(value, key=lambda term: (isinstance(term, tuple), term))
+
+  msg = 'Object of type {} is not JSON serializable'
+  raise TypeError(msg.format(type(value).__name__))
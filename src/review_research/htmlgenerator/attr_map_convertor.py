@@ -18,7 +18,7 @@ from review_research.htmlgenerator import organize_contents
 from review_research.htmlgenerator import read_script
 from review_research.htmlgenerator import JS_DIR
 from review_research.htmlgenerator import CSS_DIR
-from review_research.nlp import normalize
+from review_research.nlp import TextCleaner
 
 
 ANCHOR_PROP = ['link_id', 'review_text_info_list']
@@ -30,6 +30,9 @@ STAR_DISPLAY_DICT = {'star1': '★☆☆☆☆',
                      'star4': '★★★★☆',
                      'star5': '★★★★★'}
 
+# 同じレビューは属性と星評価ごとに何度も現れるため、正規化の結果を保持しておく件数
+NORMALIZE_CACHE_SIZE = 4096
+
 JQUERY_JS = 'http://ajax.googleapis.com/ajax/libs/jquery/1.4.2/jquery.min.js'
 DOC_TYPE = tag('!DOCTYPE html')
 
@@ -44,6 +47,8 @@ class AttrMapConvertor(object):
     self.dic_dir = dic_dir
     self.__category = ''
     self._mapper = None
+    self._normalizer = TextCleaner(fix_text=False,
+                                   cache_size=NORMALIZE_CACHE_SIZE)
 
     js_file = JS_DIR / 'heatmap.js'
     css_file = CSS_DIR / 'heatmap.css'
@@ -247,7 +252,7 @@ class AttrMapConvertor(object):
           for review_text_info in review_text_info_list:
             text = review_text_info.text
             summary = tag('summary', text)
-            review = normalize(review_text_info.review)
+            review = self._normalizer(review_text_info.review)
             marked_text = tag('span', text, class_='sentence-marker')
             marked_review = review.replace(text, marked_text)
             details_content_list = [
@@ -3,7 +3,7 @@ import json
 import pandas
 import re
 import pathlib
-from typing import Tuple, Any, Dict, Union
+from typing import Tuple, Any, Dict, Union, Optional
 
 from pprint import pprint
 from collections import OrderedDict
@@ -12,6 +12,9 @@ from bs4 import BeautifulSoup
 from review_research.review import ReviewPageJSON, ReviewInfo, StarsDistribution
 from review_research.nlp import normalize
 from review_research.nlp import TFIDF
+from review_research.nlp import TermScore
+from review_research.nlp import load_top_k_index
+from review_research.nlp import document_key
 from review_research.htmlgenerator import CSS_DIR
 from review_research.htmlgenerator import JS_DIR
 from review_research.htmlgenerator import tag
@@ -38,10 +41,17 @@ class ReviewDataConvertor(object):
   
   Attributes:
     normalize_mode (bool): レビュー文を正規化する場合は True, そうでない場合は False
+    keyword_index_name (Optional[str]):
+      review.json と同じフォルダにある TF-IDF 上位語のファイル名
+      (TFIDF.save_top_k_index で保存したもの)
+      ファイルがあればレビューごとのキーワードの列を表に加える
+      (ファイルは review.json のレビューの一覧から作られたものでなければならない)
   """
 
-  def __init__(self, normalize_mode: bool = False):
+  def __init__(self, normalize_mode: bool = False,
+               keyword_index_name: Optional[str] = None):
     self.normalize_mode = normalize_mode
+    self.keyword_index_name = keyword_index_name
 
     # スタイルシートを埋め込む
     css_file = CSS_DIR / 'review_info_style.css'
@@ -75,8 +85,9 @@ class ReviewDataConvertor(object):
       JSON ファイルの中身を html に変換したもの(BeautifulSoup による整形済み)
     """
     reviewdata = ReviewPageJSON.load(reviewjson)
+    keywords = self._load_keywords(reviewjson, reviewdata.reviews)
     head = self._make_head_content(reviewdata.product)
-    body = self._convert_review_data_to_body_content(reviewdata)
+    body = self._convert_review_data_to_body_content(reviewdata, keywords)
     html = organize_contents((head, body), 'html')
     html = DOC_TYPE + '\n' + html
 
@@ -84,6 +95,31 @@ class ReviewDataConvertor(object):
     bs = BeautifulSoup(html, 'lxml')
     return bs.prettify()
 
+  def _load_keywords(self, reviewjson: Union[str, pathlib.Path],
+                     reviews: Tuple[ReviewInfo, ...]
+                     ) -> Optional[Tuple[Tuple[TermScore, ...], ...]]:
+    """review.json と同じフォルダにある TF-IDF 上位語のファイルを読み込む
+
+    Args:
+      reviewjson (Union[str, pathlib.Path]): jsonファイルのパス
+      reviews (Tuple[ReviewInfo, ...]): jsonファイルのレビューの一覧
+
+    Returns:
+      レビューの出現順に TF-IDF 上位語を格納したタプル(ファイルがなければ None)
+
+    Raises:
+      ValueError: ファイルが reviews とは異なるレビューの一覧から作られていた場合に発生
+    """
+    if self.keyword_index_name is None:
+      return None
+
+    index_path = pathlib.Path(reviewjson).parent / self.keyword_index_name
+    if not index_path.exists():
+      return None
+
+    doc_keys = [document_key(review_info.review) for review_info in reviews]
+    return load_top_k_index(index_path, doc_keys=doc_keys)
+
   def _make_head_content(self, product_name: str) -> str:
     """head コンテンツの作成"""
     title = tag('title', product_name)
@@ -92,11 +128,14 @@ class ReviewDataConvertor(object):
     return head
 
   def _convert_review_data_to_body_content(
-      self, reviewdata: ReviewPageJSON) -> str:
+      self, reviewdata: ReviewPageJSON,
+      keywords: Optional[Tuple[Tuple[TermScore, ...], ...]] = None) -> str:
     """レビューデータを html の body 要素に変換する
 
     Args:
       reviewdata (ReviewPageJSON): Amazon レビューデータ
+      keywords (Optional[Tuple[Tuple[TermScore, ...], ...]]):
+        レビューの出現順に並べた TF-IDF 上位語
 
     Returns:
       body タグで囲まれたテキスト
@@ -120,7 +159,7 @@ class ReviewDataConvertor(object):
     ]
 
     # <table>コンテンツの用意
-    table = self._create_table(reviews)
+    table = self._create_table(reviews, keywords)
 
     # <body>コンテンツの再設定
     body_content_list.append(table)
@@ -128,18 +167,26 @@ class ReviewDataConvertor(object):
     return body
 
   
-  def _create_table(self, reviews: Tuple[ReviewInfo, ...]) -> str:
+  def _create_table(
+      self, reviews: Tuple[ReviewInfo, ...],
+      keywords: Optional[Tuple[Tuple[TermScore, ...], ...]] = None) -> str:
     """レビュー情報一覧から table 要素を作成する
 
     Args:
       reviews (Tuple[ReviewInfo, ...]): レビュー情報一覧
+      keywords (Optional[Tuple[Tuple[TermScore, ...], ...]]):
+        レビューの出現順に並べた TF-IDF 上位語(None ならキーワードの列は作らない)
 
     Returns:
       table タグで囲まれたテキスト
     """
-    thead = tag('thead', tag('tr', tag('th', *ReviewInfo._fields)))
+    header = list(ReviewInfo._fields)
+    if keywords is not None:
+      header.append('keywords')
+
+    thead = tag('thead', tag('tr', tag('th', *header)))
     tr_content_list = list()
-    for review_info in reviews:
+    for idx, review_info in enumerate(reviews):
       # レビュー文の処理
       review = review_info.review.replace('\n', '<br>')
       review_info = review_info._replace(review=review)
@@ -149,6 +196,9 @@ class ReviewDataConvertor(object):
 
       # 列要素を作成
       td_content_list = [tag('td', info) for info in review_info]
+      if keywords is not None:
+        td_content_list.append(
+            tag('td', '、'.join(term.word for term in keywords[idx])))
 
       # 行要素を作成
       tr = organize_contents(td_content_list, 'tr')
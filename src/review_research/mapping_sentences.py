@@ -4,7 +4,7 @@ import os
 import pathlib
 from collections import OrderedDict, namedtuple, defaultdict
 from pprint import pprint
-from typing import NamedTuple, Tuple, Dict, List, Set, Union, NoReturn
+from typing import Any, NamedTuple, Tuple, Dict, List, Set, Union, NoReturn
 
 import pandas
 import seaborn
@@ -240,7 +240,7 @@ class SentenceMapper:
 
     return attr_to_star_map
   
-def _initialize_star_map() -> Dict[str, List[()]]:
+def _initialize_star_map() -> Dict[str, List[Any]]:
   """星評価とレビュー文中の文を対応付けさせるための辞書を初期化して返す"""
   star_to_texts = OrderedDict()
   for star_str in STAR_CORRESPONDENCE_DICT.values():
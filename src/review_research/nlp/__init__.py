@@ -1,41 +1,79 @@
-from .regular_expressions import ONE_HIRAGANA_REGEX
-from .regular_expressions import MECAB_RESULT_SPLIT_REGEX
-from .regular_expressions import HIRAGANAS_REGEX
-from .regular_expressions import PERIOD_SEQ_REGEX
-from .singleton import StopwordDictionaryPathBuilder
-from .singleton import NeologdDirectoryPathBuilder
-from .singleton import MecabTaggerSingleton
-from .singleton import CabochaParserSingleton
-from .nlp_types import REQUIREMENT_POS_LIST
-from .nlp_types import Token
-from .nlp_types import TokenFeature
-from .nlp_types import WordRepr
-from .nlp_types import AttrName
-from .nlp_types import AttrDictInfo
-from .nlp_types import Alignment
-from .nlp_types import ChunkDetail
-from .nlp_types import TokenDetail
-from .nlp_types import PhraseDetail
-from .nlp_types import LinkDetail
-from .nlp_types import AttrExtractionResult
-from .nlp_types import AttrExtractionInfo
-from .normalize import normalize
-from .split_sentence import Splitter
-from .remove_stopwords import StopwordRemover
-from .attr_dictionary import COMMON_DICTIONARY_NAME
-from .attr_dictionary import AttrDictHandler
-from .tokenizer import Tokenizer
-from .tokenizer import ALL_POS
-from .align_text import TextAlignment
-from .tfidf import TFIDF
-from .analyze_dependency import ChunkDict
-from .analyze_dependency import TokenDict
-from .analyze_dependency import AllocationDict
-from .analyze_dependency import RepresentationDict
-from .analyze_dependency import LinkDict
-from .analyze_dependency import DependencyAnalyzer
-from .extract_attribution import WORD_SEPARATOR
-from .extract_attribution import AttributionExtractor
+"""自然言語処理に関するモジュール群
+
+MeCab や CaboCha などの読み込みに時間がかかるため、
+各属性は初めて参照された時点で対応するモジュールから読み込む(PEP 562)
+"""
+import importlib
+
+# 属性名と、その属性を定義しているモジュールの対応
+_LAZY_ATTRIBUTES = {
+    'ONE_HIRAGANA_REGEX': '.regular_expressions',
+    'MECAB_RESULT_SPLIT_REGEX': '.regular_expressions',
+    'HIRAGANAS_REGEX': '.regular_expressions',
+    'PERIOD_SEQ_REGEX': '.regular_expressions',
+    'StopwordDictionaryPathBuilder': '.singleton',
+    'NeologdDirectoryPathBuilder': '.singleton',
+    'MecabTaggerSingleton': '.singleton',
+    'CabochaParserSingleton': '.singleton',
+    'ThreadLocalProvider': '.singleton',
+    'REQUIREMENT_POS_LIST': '.nlp_types',
+    'Token': '.nlp_types',
+    'TokenFeature': '.nlp_types',
+    'WordRepr': '.nlp_types',
+    'WordSpan': '.nlp_types',
+    'SentenceSpan': '.nlp_types',
+    'AttrName': '.nlp_types',
+    'AttrDictInfo': '.nlp_types',
+    'Alignment': '.nlp_types',
+    'ChunkDetail': '.nlp_types',
+    'TokenDetail': '.nlp_types',
+    'PhraseDetail': '.nlp_types',
+    'LinkDetail': '.nlp_types',
+    'AttrExtractionResult': '.nlp_types',
+    'AttrExtractionInfo': '.nlp_types',
+    'FEATURE_VOCABULARY': '.token_table',
+    'FeatureVocabulary': '.token_table',
+    'TokenTable': '.token_table',
+    'TokenView': '.token_table',
+    'normalize': '.normalize',
+    'clean_text': '.normalize',
+    'TextCleaner': '.normalize',
+    'Splitter': '.split_sentence',
+    'StopwordRemover': '.remove_stopwords',
+    'COMMON_DICTIONARY_NAME': '.attr_dictionary',
+    'AttrDictHandler': '.attr_dictionary',
+    'Tokenizer': '.tokenizer',
+    'ALL_POS': '.tokenizer',
+    'TextAlignment': '.align_text',
+    'TFIDF': '.tfidf',
+    'TermScore': '.tfidf',
+    'TOP_K_INDEX_NAME': '.tfidf',
+    'load_top_k_index': '.tfidf',
+    'document_key': '.tfidf',
+    'ChunkDict': '.analyze_dependency',
+    'TokenDict': '.analyze_dependency',
+    'AllocationDict': '.analyze_dependency',
+    'RepresentationDict': '.analyze_dependency',
+    'LinkDict': '.analyze_dependency',
+    'DependencyAnalyzer': '.analyze_dependency',
+    'CacheStats': '.parse_cache',
+    'ParseCache': '.parse_cache',
+    'AhoCorasick': '.aho_corasick',
+    'WORD_SEPARATOR': '.extract_attribution',
+    'ALL_EXTRACTION_OPTIONS': '.extract_attribution',
+    'ExtractionOption': '.extract_attribution',
+    'DependencyAnalysisResult': '.extract_attribution',
+    'PrefilterStats': '.extract_attribution',
+    'AttributionExtractor': '.extract_attribution',
+    'WorkItem': '.extraction_engine',
+    'ExtractionOutput': '.extraction_engine',
+    'WorkerStats': '.extraction_engine',
+    'ExtractionEngine': '.extraction_engine',
+    'DEFAULT_DAEMON_ADDRESS': '.extraction_daemon',
+    'DaemonStats': '.extraction_daemon',
+    'ExtractionDaemon': '.extraction_daemon',
+    'ExtractionClient': '.extraction_daemon',
+}
 
 __all__ = ['normalize', 
            'Splitter',
@@ -44,4 +82,32 @@ __all__ = ['normalize',
            'Tokenizer',
            'TextAlignment',
            'DependencyAnalyzer',
-           'AttributionExtractor']
\ No newline at end of file
+           'ParseCache',
+           'AttributionExtractor',
+           'ExtractionEngine',
+           'ExtractionDaemon',
+           'ExtractionClient']
+
+def __getattr__(name: str):
+  try:
+    module_name = _LAZY_ATTRIBUTES[name]
+
+  except KeyError:
+    msg = 'module {!r} has no attribute {!r}'
+    raise AttributeError(msg.format(__name__, name)) from None
+
+  module = importlib.import_module(module_name, __name__)
+  value = getattr(module, name)
+  # 同じモジュールで定義済みの属性はまとめて登録する
+  # (サブモジュールと同名の normalize が、import 時にサブモジュールで上書きされるため)
+  # singleton のように属性を遅延読み込みするモジュールでは、未読み込みの属性は登録しない
+  module_attributes = vars(module)
+  for attr_name, attr_module_name in _LAZY_ATTRIBUTES.items():
+    if attr_module_name == module_name and attr_name in module_attributes:
+      globals()[attr_name] = module_attributes[attr_name]
+
+  globals()[name] = value
+  return value
+
+def __dir__():
+  return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
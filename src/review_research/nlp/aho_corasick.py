@@ -0,0 +1,104 @@
+from collections import deque
+from typing import Iterable, Iterator, List, Dict, Tuple
+
+class AhoCorasick:
+  """Aho-Corasick 法による複数語の文字列照合を行うクラス
+
+  文の長さに比例した時間で、登録した語のいずれかが文中に現れるかを調べられる
+
+  Usage:
+    >>> automaton = AhoCorasick(['画面', '電池', '電池の持ち'])
+    >>> automaton.search('電池の持ちが悪い')
+    True
+    >>> list(automaton.find_all('電池の持ちが悪い'))
+    [(0, '電池'), (0, '電池の持ち')]
+  """
+
+  def __init__(self, words: Iterable[str]):
+    """
+    Args:
+      words (Iterable[str]): 照合に使う語の一覧(空文字列は無視する)
+    """
+    self._goto = [dict()]     # type: List[Dict[str, int]]
+    self._fail = [0]          # type: List[int]
+    self._output = [tuple()]  # type: List[Tuple[str, ...]]
+    self._num_words = 0
+    for word in words:
+      if word:
+        self._add_word(word)
+
+    self._build_failure_links()
+
+  def __len__(self) -> int:
+    return self._num_words
+
+  def search(self, text: str) -> bool:
+    """登録した語のいずれかが text 中に現れるかを調べる
+
+    Args:
+      text (str): 対象の文字列
+
+    Returns:
+      いずれかの語が現れれば True、そうでなければ False
+    """
+    goto, fail, output = self._goto, self._fail, self._output
+    state = 0
+    for char in text:
+      while state and char not in goto[state]:
+        state = fail[state]
+
+      state = goto[state].get(char, 0)
+      if output[state]:
+        return True
+
+    return False
+
+  def find_all(self, text: str) -> Iterator[Tuple[int, str]]:
+    """text 中に現れる登録語をすべて返す
+
+    Args:
+      text (str): 対象の文字列
+
+    Yields:
+      (語の開始位置, 語) の組
+    """
+    goto, fail, output = self._goto, self._fail, self._output
+    state = 0
+    for end, char in enumerate(text, start=1):
+      while state and char not in goto[state]:
+        state = fail[state]
+
+      state = goto[state].get(char, 0)
+      for word in output[state]:
+        yield (end - len(word), word)
+
+  def _add_word(self, word: str):
+    state = 0
+    for char in word:
+      next_state = self._goto[state].get(char)
+      if next_state is None:
+        next_state = len(self._goto)
+        self._goto.append(dict())
+        self._fail.append(0)
+        self._output.append(tuple())
+        self._goto[state][char] = next_state
+
+      state = next_state
+
+    if word not in self._output[state]:
+      self._output[state] += (word,)
+      self._num_words += 1
+
+  def _build_failure_links(self):
+    # 幅優先で失敗遷移を設定し、失敗先の出力を自身の出力に統合する
+    queue = deque(self._goto[0].values())
+    while queue:
+      state = queue.popleft()
+      for char, next_state in self._goto[state].items():
+        queue.append(next_state)
+        fail_state = self._fail[state]
+        while fail_state and char not in self._goto[fail_state]:
+          fail_state = self._fail[fail_state]
+
+        self._fail[next_state] = self._goto[fail_state].get(char, 0)
+        self._output[next_state] += self._output[self._fail[next_state]]
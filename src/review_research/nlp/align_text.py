@@ -1,36 +1,41 @@
 import argparse
 import re
 from collections import namedtuple
-from typing import List, NoReturn
+from typing import List, NoReturn, Tuple
 
-import emoji
-
-from ..nlp import PERIOD_SEQ_REGEX
+from ..nlp import TextCleaner
 from ..nlp import Tokenizer
 from ..nlp import WordRepr
 from ..nlp import Alignment
 
-REPLACE_MARK = '<<REPL>>'
-
 class TextAlignment:
   """文と文中の単語を対応付けるためのクラス
 
   Attributes:
     text (str): 対応付けに使用した文
     alignment (List[Alignment]): 文(self.text)中の対応関係
+    spans (List[Tuple[int, int]]):
+      対応関係ごとの文(self.text)中の位置 (開始位置, 終了位置)
     words (List[WordRepr]): 文(self.text)中の単語
   """
 
   def __init__(self):
     self._alignment_list = None
+    self._span_list      = None
     self._words          = None
     self._text           = ''
     self._tokenizer      = Tokenizer()
+    # 絵文字の除去・「。」の連続の置換・改行の除去のみ行う
+    self._cleaner        = TextCleaner(normalize_text=False)
   
   @property
   def alignment(self) -> List[Alignment]:
     return self._alignment_list
 
+  @property
+  def spans(self) -> List[Tuple[int, int]]:
+    return self._span_list
+
   @property
   def words(self) -> List[WordRepr]:
     return self._words
@@ -51,55 +56,30 @@ class TextAlignment:
     """与えられた文における表層形と単語の原形を対応付ける
     表層と単語の原形が同じ場合はそのまま対応付ける
 
+    単語の位置は形態素解析器が返す位置を使うため、文の長さに比例した時間で対応付けられる
+
     Args:
       text (str): 文
     """
-    self._text = _fix_text(text)
-    self._words = self._tokenizer.get_baseforms(text)
+    self._text = self._cleaner(text)
+    word_spans = self._tokenizer.get_baseform_spans(self.text)
+    self._words = [word_span.word for word_span in word_spans]
     self._alignment_list = []
-    target = self.text[:]
-    for w in self.words:
-      start_idx = target.find(w.surface)
-      if start_idx == -1:
-          continue
-
-      target = target.replace(w.surface, REPLACE_MARK, 1)
-      if start_idx > 0:
-        # 文の先頭に単語の表層形がなければ、その単語までの部分を元の文と対応付ける
-        part = target.split(REPLACE_MARK)[0]
+    self._span_list = []
+    end_of_last_word = 0
+    for w, start, end in word_spans:
+      if start > end_of_last_word:
+        # 直前の単語との間の部分は元の文と対応付ける
+        part = self.text[end_of_last_word:start]
         self._alignment_list.append(Alignment(part, None, False))
-        target = target.replace(part, REPLACE_MARK, 1)
+        self._span_list.append((end_of_last_word, start))
 
       self._alignment_list.append(Alignment(w.surface, w.base_form, True))
-      target = target.replace(REPLACE_MARK, '')
+      self._span_list.append((start, end))
+      end_of_last_word = end
 
     # すべての単語を対応付けた後に文が残っていれば、その部分を元の文と対応付ける
-    if len(target) > 0:
-      self._alignment_list.append(Alignment(target, None, False))
-
-  
-def _fix_text(text: str) -> str:
-  """絵文字を消したり「。」が2つ以上続いている箇所を「。」1つに直す
-
-  Args:
-    text (str): レビュー文
-
-  Returns:
-    修正された文章
-  """
-  fixed_text = ''.join(c for c in text if c not in emoji.UNICODE_EMOJI)
-
-  match = PERIOD_SEQ_REGEX.search(fixed_text)
-  if match:
-    print(match)
-    fixed_text = PERIOD_SEQ_REGEX.sub('。', fixed_text)
-
-  if fixed_text.find('\n') == -1:
-    return fixed_text
-
-  else:
-    fixed_text = ''.join(sentence.strip() for sentence in text.split('\n'))
-    return fixed_text
-
-
-
+    if end_of_last_word < len(self.text):
+      part = self.text[end_of_last_word:]
+      self._alignment_list.append(Alignment(part, None, False))
+      self._span_list.append((end_of_last_word, len(self.text)))
@@ -1,7 +1,8 @@
 import argparse
 import re
+from array import array
 from collections import OrderedDict
-from typing import Tuple, List, Dict, NamedTuple
+from typing import Tuple, List, Dict, NamedTuple, Optional
 
 import CaboCha
 
@@ -11,6 +12,7 @@ from ..nlp import ChunkDetail
 from ..nlp import TokenDetail
 from ..nlp import PhraseDetail
 from ..nlp import LinkDetail
+from ..nlp import TokenTable
 from ..nlp import CabochaParserSingleton
 
 # 型の定義
@@ -38,6 +40,9 @@ class DependencyAnalyzer(object):
   
   Attributes:
     parser (CaboCha.Parser): 係り受け解析器
+    cache (Optional[ParseCache]): 解析結果のキャッシュ
+    compact_tokens (bool):
+      True の場合、形態素情報を TokenDetail の辞書ではなく TokenTable として返す
 
   Usage:
     初期設定
@@ -58,13 +63,20 @@ class DependencyAnalyzer(object):
 
     係り受けの結合
     >>> link_dict = da.make_link_dict(chunk_dict, repr_dict)
+
+    解析結果をキャッシュする場合
+    >>> da = DependencyAnalyzer(cache=ParseCache('parse_cache.sqlite3'))
   """
 
-  def __init__(self):
+  def __init__(self, cache: Optional['ParseCache'] = None,
+               compact_tokens: bool = False):
       self._result_tree = None
+      self.cache = cache
+      self.compact_tokens = compact_tokens
 
   @property
   def parser(self) -> CaboCha.Parser:
+      """呼び出したスレッド専用の係り受け解析器"""
       return CabochaParserSingleton.get_instance()
 
   def analyze(self, text: str) -> AnalysisResult:
@@ -77,6 +89,13 @@ class DependencyAnalyzer(object):
       AnalysisResultインスタンス
     """
     self._result_tree = None
+    if self.cache is not None:
+      # キャッシュにあれば CaboCha による解析を行わない
+      analysis_result = self.cache.get(text)
+      if analysis_result is not None:
+        self._result_tree = analysis_result.tree
+        return self._compact(analysis_result)
+
     tree = self.parser.parse(text)
     self._result_tree = tree.toString(CaboCha.FORMAT_TREE)
 
@@ -90,13 +109,33 @@ class DependencyAnalyzer(object):
     for idx, chunk_prop in enumerate(chunk_list):
       chunk_dict[idx] = chunk_prop
 
-    token_list = [TokenDetail.from_cabocha_token(tree.token(i)) 
-                  for i in range(tree.token_size())]
-    token_dict = OrderedDict()
-    for idx, token_detail in enumerate(token_list):
-      token_dict[idx] = token_detail
+    if self.compact_tokens:
+      # TokenDetail を経由せずに、CaboCha の形態素から直接 TokenTable を作る
+      token_dict = TokenTable.from_cabocha_tree(tree)
+
+    else:
+      token_list = [TokenDetail.from_cabocha_token(tree.token(i)) 
+                    for i in range(tree.token_size())]
+      token_dict = OrderedDict()
+      for idx, token_detail in enumerate(token_list):
+        token_dict[idx] = token_detail
+
+    analysis_result = AnalysisResult(chunk_dict, token_dict, self._result_tree)
+    if self.cache is not None:
+      self.cache.put(text, analysis_result)
+
+    return analysis_result
+
+  def _compact(self, analysis_result: AnalysisResult) -> AnalysisResult:
+    """compact_tokens が True なら、キャッシュから復元した形態素情報を
+    TokenTable に置き換えるヘルパーメソッド
+    """
+    if not self.compact_tokens:
+      return analysis_result
 
-    return AnalysisResult(chunk_dict, token_dict, self._result_tree)
+    token_table = TokenTable.from_token_details(
+        analysis_result.token_dict.values())
+    return analysis_result._replace(token_dict=token_table)
 
   def allocate_token_for_chunk(self, chunk_dict: ChunkDict, 
                                token_dict: TokenDict) -> AllocationDict:
@@ -124,20 +163,30 @@ class DependencyAnalyzer(object):
 
   def extract_representation(self, 
       chunk_dict: ChunkDict,
-      allocation_dict: AllocationDict) -> RepresentationDict:
+      allocation_dict: AllocationDict,
+      by_position: bool = True) -> RepresentationDict:
     """節内の主辞と機能語を取得
 
     Args:
       chunk_dict (ChunkDict): 出現順に文節情報を格納した辞書
       allocation_dict (AllocationDict):
         文節の出現順をキーとして、その文節内にある形態素情報を出現順に格納した辞書
+      by_position (bool):
+        True なら CaboCha の主辞と機能語の位置から、
+        False なら文節の素性に記録された表層の照合から主辞と機能語を決める
 
     Returns:
       文節の出現順に、文節の主辞情報を格納した辞書
     """
+    if by_position:
+      from_chunk = PhraseDetail.from_token_positions
+
+    else:
+      from_chunk = PhraseDetail.from_analysis_result
+
     representation_dict = OrderedDict()
     for chunk_id, chunk_detail in chunk_dict.items():
-      representation_dict[chunk_id] = PhraseDetail.from_analysis_result(
+      representation_dict[chunk_id] = from_chunk(
           chunk_detail, allocation_dict[chunk_id])
 
     return representation_dict
@@ -154,33 +203,40 @@ class DependencyAnalyzer(object):
     Returns:
       最初の係り受け元から順に終端までの係り受け関係を結合した情報を格納した辞書
     """
-    visited = list()
+    # 文節の番号は 0 から順に振られているため、係り先を配列で保持する
+    next_links = array('i', (chunk_detail.next_link
+                             for chunk_detail in chunk_dict.values()))
+    num_chunks = len(next_links)
+    link_details = [LinkDetail(chunk_id, representation_dict[chunk_id])
+                    for chunk_id in range(num_chunks)]
+    # 係り受け構造が決定された文節について、その文節を含む係り受け関係と位置を保持する
+    # 終端までの経路はその係り受け関係の一部分として再利用できる
+    chain_of = [None] * num_chunks  # type: List[Optional[Tuple[LinkDetail, ...]]]
+    position_of = array('i', bytes(4 * num_chunks))
+
     link_dict = OrderedDict()
-    for chunk_id in chunk_dict.keys():
+    for chunk_id in range(num_chunks):
       # 係り受け構造が決定された文節は無視する
-      if chunk_id in visited:
+      if chain_of[chunk_id] is not None:
         continue
-  
-      link = chunk_id
-      link_list = [link]  # 始点となる文節から最後の係り先文節までを格納するリスト
-      while True:
-        chunk_detail = chunk_dict[link]
-        next_link = chunk_detail.next_link
-        if next_link == -1:
-          break
 
-        link = next_link
-        link_list.append(link)
+      # 係り受け構造が未決定の文節だけをたどる
+      link = chunk_id
+      new_links = []
+      while link != -1 and chain_of[link] is None:
+        new_links.append(link)
+        link = next_links[link]
 
-      link_detail_list = list()
-      for link in link_list:
-        # 係り受け構造が決定されている文節を登録
-        if link not in visited:
-          visited.append(link)
+      chain = tuple(link_details[new_link] for new_link in new_links)
+      if link != -1:
+        # 以降は決定済みの係り受け関係と同じ経路をたどる
+        chain += chain_of[link][position_of[link]:]
 
-        link_detail_list.append(LinkDetail(link, representation_dict[link]))
+      for position, new_link in enumerate(new_links):
+        chain_of[new_link] = chain
+        position_of[new_link] = position
 
-      link_dict[chunk_id] = tuple(link_detail_list)
+      link_dict[chunk_id] = chain
 
     return link_dict
 
@@ -1,16 +1,41 @@
 import os
 import pathlib
+import pickle
 import glob
 from functools import partial
 from collections import namedtuple, OrderedDict
-from typing import List, Union, Dict, Tuple
+from typing import List, Union, Dict, Tuple, NamedTuple, Optional
 
 from ..nlp import AttrName
 from ..nlp import AttrDictInfo
 
 COMMON_DICTIONARY_NAME = 'common'
+# コンパイル済みの属性辞書のファイル名
+# ドットから始まるため search_attr_dict では辞書ファイルとして扱われない
+COMPILED_ATTR_DICT_NAME = '.attr_dict_cache.pickle'
 
 AttrDict = Dict[str, Tuple[str, ...]]
+TermIndex = Dict[str, Tuple[str, ...]]
+DictionarySignature = Tuple[Tuple[str, int, int], ...]
+
+class CompiledAttrDict(NamedTuple):
+  """全商品カテゴリの属性辞書をまとめたもの
+
+  Attributes:
+    signature (DictionarySignature): 辞書ファイルのパス、更新日時、サイズの一覧
+    attr_dicts (Dict[str, AttrDict]): 商品カテゴリごとの属性辞書
+    en2ja (Dict[str, Dict[str, str]]): 商品カテゴリごとの属性名の英日辞書
+    ja2en (Dict[str, Dict[str, str]]): 商品カテゴリごとの属性名の日英辞書
+    term_indices (Dict[str, TermIndex]): 商品カテゴリごとの属性語から属性への索引
+  """
+  signature: DictionarySignature
+  attr_dicts: Dict[str, AttrDict]
+  en2ja: Dict[str, Dict[str, str]]
+  ja2en: Dict[str, Dict[str, str]]
+  term_indices: Dict[str, TermIndex]
+
+# プロセス内で読み込み済みの属性辞書(読み取り専用として共有する)
+_compiled_attr_dicts = dict()  # type: Dict[str, CompiledAttrDict]
 
 class AttrDictHandler:
   """属性辞書を扱うためのクラス
@@ -21,33 +46,42 @@ class AttrDictHandler:
     common_attr_dict (AttrDict): 商品カテゴリによらない共通の属性辞書
     common_en2ja (Dict[str, str]): 共通属性名の英日辞書
     common_ja2en (Dict[str, str]): 共通属性名の日英辞書
+
+  use_cache が True の場合は、全商品カテゴリの属性辞書をコンパイルしたファイルを
+  dic_source_dir 直下に作成し、次回からはそのファイルを読み込む
+  辞書ファイルの更新日時かサイズが変わっていれば作り直す
+  読み込んだ属性辞書は同じプロセス内のインスタンス間で共有されるため、変更してはならない
   """
 
-  def __init__(self, dic_source_dir: Union[str, pathlib.Path]):
+  def __init__(self, dic_source_dir: Union[str, pathlib.Path],
+               use_cache: bool = True):
     """
     Args:
       dic_source_dir (Union[str, pathlib.Path]): 属性辞書の大本のディレクトリ
+      use_cache (bool): コンパイル済みの属性辞書を使うか
     """
     self.dic_source_dir = pathlib.Path(dic_source_dir)
     self.all_dictionaries = search_attr_dict(self.dic_source_dir)
-    
+
+    if use_cache:
+      compiled = load_compiled_attr_dict(self.dic_source_dir,
+                                         self.all_dictionaries)
+
+    else:
+      compiled = compile_attr_dict(self.all_dictionaries)
+
     # 商品カテゴリごとに整理
-    self._category_to_attrdicts = OrderedDict()
-    self._category_to_en2ja_translater = OrderedDict()
-    self._category_to_ja2en_translater = OrderedDict()
-    for dic_path in self.all_dictionaries:
-      attr_dict_info = read_attr_dict(dic_path)
-      category = attr_dict_info.category
-
-      attr_en_name, attr_ja_name = attr_dict_info.name
-      self._category_to_en2ja_translater.setdefault(
-          category, OrderedDict())[attr_en_name] = attr_ja_name
-      self._category_to_ja2en_translater.setdefault(
-          category, OrderedDict())[attr_ja_name] = attr_en_name
-
-      attr_words = attr_dict_info.words
-      self._category_to_attrdicts.setdefault(
-          category, OrderedDict())[attr_ja_name] = attr_words
+    self._category_to_attrdicts = compiled.attr_dicts
+    self._category_to_en2ja_translater = compiled.en2ja
+    self._category_to_ja2en_translater = compiled.ja2en
+    self._category_to_term_index = compiled.term_indices
+    self._category_to_ambiguous_terms = dict()
+
+  @property
+  def categories(self) -> Tuple[str, ...]:
+    """共通の属性辞書を除いた商品カテゴリの一覧"""
+    return tuple(category for category in self._category_to_attrdicts
+                 if category != COMMON_DICTIONARY_NAME)
 
   @property
   def common_attr_dict(self) -> AttrDict:
@@ -96,6 +130,38 @@ class AttrDictHandler:
     """
     return self._category_to_ja2en_translater[category]
 
+  def term_index(self, category: str) -> TermIndex:
+    """categoryで指定した属性辞書の、属性語から属性への索引を返す
+
+    Args:
+      category (str): 商品カテゴリ
+
+    Returns:
+      属性語をキーとして、その語を含む属性の和名を辞書の順に格納した辞書
+    """
+    return self._category_to_term_index[category]
+
+
+  def ambiguous_terms(self, category: str) -> TermIndex:
+    """categoryで指定した属性辞書において、複数属性にまたがる属性語とその属性を返す
+
+    結果は商品カテゴリごとに保持し、2回目以降は作り直さない
+
+    Args:
+      category (str): 商品カテゴリ
+
+    Returns:
+      複数属性にまたがる属性語をキーとして、その語を含む属性の和名を辞書の順に格納した辞書
+    """
+    ambiguous_terms = self._category_to_ambiguous_terms.get(category)
+    if ambiguous_terms is None:
+      ambiguous_terms = OrderedDict(
+          (term, attr_names)
+          for term, attr_names in self.term_index(category).items()
+          if len(attr_names) > 1)
+      self._category_to_ambiguous_terms[category] = ambiguous_terms
+
+    return ambiguous_terms
 
   def remove_intersection_word(self, category: str) -> AttrDict:
     """categoryで指定した属性辞書において、複数属性にまたがる単語を削除して更新した属性辞書を返す
@@ -107,34 +173,143 @@ class AttrDictHandler:
       更新した属性辞書
     """
     attr_dict = self.attr_dict(category)
-    attr_list = [*attr_dict]
-    attr_num  = len(attr_list)
-    intersection_word_dict = {}
-    for target_idx, target_attr in enumerate(attr_list[:-1]):
-      target_word_set = set(attr_dict[target_attr])
-      intersection_with_target = partial(set.intersection, target_word_set)
-      
-      for next_idx in range(target_idx+1, attr_num):
-        next_attr = attr_list[next_idx]
-        next_word_set = set(attr_dict[next_attr])
-        intersection_words = list(intersection_with_target(next_word_set))
-        for word in intersection_words:
-          intersection_word_dict.setdefault(word, []).append((target_attr, next_attr))
-
-    intersection_words = set(intersection_word_dict.keys())
+    intersection_words = self.ambiguous_terms(category)
     if len(intersection_words) == 0:
       return attr_dict
 
     else:
       new_attr_dict = {}
-      for attr_name, words in attr_dict.items():      
-        new_words = sorted(set.difference(set(words), intersection_words),
-                            key=words.index)
+      for attr_name, words in attr_dict.items():
+        # 重複を除いて出現順に並べる
+        new_words = [w for w in OrderedDict.fromkeys(words)
+                     if w not in intersection_words]
         new_attr_dict[attr_name] = new_words
 
       return new_attr_dict
 
 
+def dictionary_signature(
+    all_dictionaries: List[pathlib.Path]) -> DictionarySignature:
+  """辞書ファイルが更新されたかを判定するための情報を集める
+
+  Args:
+    all_dictionaries (List[pathlib.Path]): 辞書ファイルのパス一覧
+
+  Returns:
+    辞書ファイルごとのパス、更新日時、サイズの一覧
+  """
+  signature = []
+  for dic_path in all_dictionaries:
+    stat = dic_path.stat()
+    signature.append((str(dic_path.resolve()), stat.st_mtime_ns, stat.st_size))
+
+  return tuple(signature)
+
+
+def compile_attr_dict(all_dictionaries: List[pathlib.Path]) -> CompiledAttrDict:
+  """辞書ファイルを読み込み、全商品カテゴリの属性辞書をまとめる
+
+  Args:
+    all_dictionaries (List[pathlib.Path]): 辞書ファイルのパス一覧
+
+  Returns:
+    CompiledAttrDictインスタンス
+  """
+  attr_dicts = OrderedDict()
+  en2ja = OrderedDict()
+  ja2en = OrderedDict()
+  for dic_path in all_dictionaries:
+    attr_dict_info = read_attr_dict(dic_path)
+    category = attr_dict_info.category
+
+    attr_en_name, attr_ja_name = attr_dict_info.name
+    en2ja.setdefault(category, OrderedDict())[attr_en_name] = attr_ja_name
+    ja2en.setdefault(category, OrderedDict())[attr_ja_name] = attr_en_name
+
+    attr_words = attr_dict_info.words
+    attr_dicts.setdefault(category, OrderedDict())[attr_ja_name] = attr_words
+
+  term_indices = OrderedDict()
+  for category, attr_dict in attr_dicts.items():
+    term_index = OrderedDict()
+    for attr_name, words in attr_dict.items():
+      for word in words:
+        attr_names = term_index.setdefault(word, [])
+        if not attr_names or attr_names[-1] != attr_name:
+          attr_names.append(attr_name)
+
+    term_indices[category] = OrderedDict(
+        (word, tuple(attr_names)) for word, attr_names in term_index.items())
+
+  return CompiledAttrDict(dictionary_signature(all_dictionaries),
+                          attr_dicts, en2ja, ja2en, term_indices)
+
+
+def load_compiled_attr_dict(
+    dic_source_dir: Union[str, pathlib.Path],
+    all_dictionaries: Optional[List[pathlib.Path]] = None) -> CompiledAttrDict:
+  """コンパイル済みの属性辞書を読み込む
+
+  プロセス内で読み込み済みのもの、dic_source_dir 直下のファイルの順に探し、
+  どちらも辞書ファイルの状態と一致しない場合はコンパイルし直して保存する
+
+  Args:
+    dic_source_dir (Union[str, pathlib.Path]): 属性辞書の大本のディレクトリ
+    all_dictionaries (Optional[List[pathlib.Path]]):
+      辞書ファイルのパス一覧(None の場合は dic_source_dir から探す)
+
+  Returns:
+    CompiledAttrDictインスタンス
+  """
+  dic_source_dir = pathlib.Path(dic_source_dir)
+  if all_dictionaries is None:
+    all_dictionaries = search_attr_dict(dic_source_dir)
+
+  signature = dictionary_signature(all_dictionaries)
+  memo_key = str(dic_source_dir.resolve())
+  compiled = _compiled_attr_dicts.get(memo_key)
+  if compiled is not None and compiled.signature == signature:
+    return compiled
+
+  cache_path = dic_source_dir / COMPILED_ATTR_DICT_NAME
+  compiled = None
+  try:
+    with cache_path.open(mode='rb') as fp:
+      compiled = pickle.load(fp)
+
+  except Exception:
+    # 壊れたファイルや、モジュールやクラスの名前が変わる前に保存したファイルは作り直す
+    compiled = None
+
+  if not isinstance(compiled, CompiledAttrDict) \
+      or compiled.signature != signature:
+    compiled = compile_attr_dict(all_dictionaries)
+    _dump_compiled_attr_dict(compiled, cache_path)
+
+  _compiled_attr_dicts[memo_key] = compiled
+  return compiled
+
+
+def _dump_compiled_attr_dict(compiled: CompiledAttrDict,
+                             cache_path: pathlib.Path):
+  """コンパイル済みの属性辞書を保存するヘルパー関数
+
+  他のプロセスが読み込み途中のファイルを壊さないように、一時ファイルに書き出してから置き換える
+  """
+  temp_path = cache_path.with_name(
+      '{}.{}.tmp'.format(cache_path.name, os.getpid()))
+  try:
+    with temp_path.open(mode='wb') as fp:
+      pickle.dump(compiled, fp, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(str(temp_path), str(cache_path))
+
+  except OSError:
+    # 書き込めないディレクトリの場合は保存せずに使う
+    if temp_path.exists():
+      temp_path.unlink()
+
+
 def search_attr_dict(dic_source_dir: str) -> List[pathlib.Path]:
   """
   指定したディレクトリから属性辞書のファイルパスをすべて取り出す
@@ -1,12 +1,12 @@
 import os
-from collections import OrderedDict, namedtuple, defaultdict
+import random
+from collections import OrderedDict, namedtuple, defaultdict, deque
 from pprint import pprint
-from typing import NamedTuple, Iterable, List, Any, Tuple, NoReturn, Dict
-
-from tqdm import tqdm
+from typing import NamedTuple, Iterable, List, Any, Tuple, NoReturn, Dict, Optional, FrozenSet
 
 from ..nlp import REQUIREMENT_POS_LIST
 from ..nlp import DependencyAnalyzer
+from ..nlp import ParseCache
 from ..nlp import PhraseDetail
 from ..nlp import LinkDetail
 from ..nlp import ChunkDict
@@ -14,12 +14,11 @@ from ..nlp import TokenDict
 from ..nlp import AllocationDict
 from ..nlp import RepresentationDict
 from ..nlp import LinkDict
-from ..nlp import AttrExtractionResult
 from ..nlp import AttrExtractionInfo
 from ..nlp import COMMON_DICTIONARY_NAME
 from ..nlp import StopwordRemover
 from ..nlp import AttrDictHandler
-from ..misc import unique_sort_by_index
+from ..nlp import AhoCorasick
 
 class DependencyAnalysisResult(NamedTuple):
   """DependencyAnalyzerの解析結果を格納するクラス
@@ -37,6 +36,50 @@ class DependencyAnalysisResult(NamedTuple):
   repr_dict: RepresentationDict
   link_dict: LinkDict
 
+class ExtractionOption(NamedTuple):
+  """属性抽出のオプション
+
+  Attributes:
+    extend (bool): 複合語を構成する形態素も属性候補語とするか
+    ristrict (bool): 係り受け関係を更新してから属性候補語を抽出するか
+  """
+  extend: bool
+  ristrict: bool
+
+# extend と ristrict の全ての組み合わせ
+ALL_EXTRACTION_OPTIONS = (ExtractionOption(False, False),
+                          ExtractionOption(False, True),
+                          ExtractionOption(True, False),
+                          ExtractionOption(True, True))
+
+class PrefilterStats(NamedTuple):
+  """事前照合による絞り込みの状況
+
+  Attributes:
+    skipped (int): 属性語を含まないため係り受け解析を省略した文の数
+    passed (int): 属性語を含むため係り受け解析を行った文の数
+    verified (int): 省略した文のうち、検証のために係り受け解析を行った文の数
+    disagreements (int): 検証した文のうち、属性が抽出されてしまった文の数
+  """
+  skipped: int
+  passed: int
+  verified: int
+  disagreements: int
+
+class LinkMatch(NamedTuple):
+  """1つの係り受け関係を属性辞書と照合した結果
+
+  Attributes:
+    attributions (FrozenSet[str]): 抽出できた属性
+    candidate_terms (FrozenSet[str]): 属性候補語一覧
+    hit_terms (FrozenSet[str]): 属性語として抽出された語群
+    phrases (FrozenSet[str]): 文節一覧
+  """
+  attributions: FrozenSet[str]
+  candidate_terms: FrozenSet[str]
+  hit_terms: FrozenSet[str]
+  phrases: FrozenSet[str]
+
 # 並列表現を表す助詞
 PAEALLEL_PRESENTATION_WORDS = ('や', 'と')
 # 格助詞による抽出方法のための格助詞一覧
@@ -44,14 +87,33 @@ BASE_PATTERN_WORDS = ('が', 'は', 'も', 'に', 'を')
 
 WORD_SEPARATOR = '<WORDSEP>'
 
+# 絞り込みと結果が食い違った文を保持する最大数(古いものから捨てる)
+MAX_PREFILTER_DISAGREEMENTS = 100
+
 class AttributionExtractor:
-  """属性抽出器"""
+  """属性抽出器
+
+  prefilter を True にすると、係り受け解析の前に属性辞書中の全ての語で文を照合し、
+  どの語も現れない文は解析せずに空の結果を返す
+  (形態素解析は空白を読み飛ばすため、照合は文と語の両方から空白を除いて行う)
+  verify_rate を指定すると、解析を省略した文をその割合で抜き出して通常通り抽出し、
+  属性が抽出された(絞り込みと結果が食い違った)文の数を prefilter_stats に数え、
+  直近の MAX_PREFILTER_DISAGREEMENTS 文を prefilter_disagreements に保持する
+  compact_tokens を True にすると、係り受け解析の形態素情報を TokenTable として保持する
+  """
 
   def __init__(self, dic_dir: str, encoding: str = 'utf-8', 
-               extend: bool = True, ristrict: bool = True):
+               extend: bool = True, ristrict: bool = True,
+               parse_cache: Optional[ParseCache] = None,
+               prefilter: bool = False, verify_rate: float = 0.0,
+               compact_tokens: bool = False):
+    if not 0.0 <= verify_rate <= 1.0:
+      raise ValueError('verify_rate must be between 0.0 and 1.0.')
+
     self.remover = StopwordRemover()
+    self._stopword_set = frozenset(self.remover.stopwords)
 
-    self.category  = None
+    self.__category = None
     self._encoding = encoding
     self._extend   = extend
     self._ristrict = ristrict
@@ -59,11 +121,23 @@ class AttributionExtractor:
     self._category_to_attrdict = None
     self._ja2en = None
     self._en2ja = None
+    self._attr_dict = None
+    self._attr_names = None
+    self._attr_to_id = None
+    self._term_to_attr_ids = None
+
+    self._prefilter   = prefilter
+    self._verify_rate = verify_rate
+    self._automaton   = None
+    self._random      = random.Random(0)
+    self._prefilter_counts = [0, 0, 0, 0]
+    self.prefilter_disagreements = deque(maxlen=MAX_PREFILTER_DISAGREEMENTS)
 
     self._attrdict_handler = AttrDictHandler(dic_dir)
     self._common_attr_dict = self._attrdict_handler.common_attr_dict
 
-    self._analyzer = DependencyAnalyzer()
+    self._analyzer = DependencyAnalyzer(cache=parse_cache,
+                                        compact_tokens=compact_tokens)
 
   @property
   def extend(self) -> bool:
@@ -73,6 +147,24 @@ class AttributionExtractor:
   def ristrict(self) -> bool:
     return self._ristrict
 
+  @property
+  def prefilter(self) -> bool:
+    return self._prefilter
+
+  @property
+  def parse_cache(self) -> Optional[ParseCache]:
+    """係り受け解析結果のキャッシュ"""
+    return self._analyzer.cache
+
+  @parse_cache.setter
+  def parse_cache(self, parse_cache: Optional[ParseCache]):
+    self._analyzer.cache = parse_cache
+
+  @property
+  def prefilter_stats(self) -> PrefilterStats:
+    """事前照合による絞り込みの状況"""
+    return PrefilterStats(*self._prefilter_counts)
+
   @property
   def category(self) -> str:
     """現在扱っている商品カテゴリ"""
@@ -102,6 +194,11 @@ class AttributionExtractor:
   def attrdict(self):
     return self._attr_dict
 
+  @property
+  def attr_names(self) -> Tuple[str, ...]:
+    """属性名の一覧(extract_attribute_ids が返す属性の番号はこのタプルの添字)"""
+    return self._attr_names
+
   @property
   def stopwords(self) -> list:
     return self.remover.stopwords
@@ -115,74 +212,266 @@ class AttributionExtractor:
     Returns:
       抽出できた属性ごとに属性に関する情報をまとめた辞書
     """
+    options = (ExtractionOption(self.extend, self.ristrict),)
+    if not self._passes_prefilter(text, options):
+      return OrderedDict()
+
+    analysis_result = self._analyze(text)
+    return self._extract_from_analysis_result(analysis_result,
+                                              self.extend, self.ristrict)
+
+  def extract_attribution_with_options(
+      self, text: str, options: Iterable[ExtractionOption] = ALL_EXTRACTION_OPTIONS
+  ) -> Dict[ExtractionOption, Dict[str, Tuple[Dict[str, Any]]]]:
+    """1回の係り受け解析の結果から、複数のオプションでの属性の抽出を行う
+
+    Args:
+      text (str): 属性を抽出したい文
+      options (Iterable[ExtractionOption]): 抽出に使うオプションの一覧
+
+    Returns:
+      オプションごとに extract_attribution の戻り値と同じ形式の辞書を格納した辞書
+    """
+    options = tuple(ExtractionOption(*option) for option in options)
+    return self._extract_with_options(text, options)
+
+  def extract_attribute_ids(self, text: str) -> Tuple[int, ...]:
+    """抽出できた属性の番号だけを返す
+
+    extract_attribution と同じ属性を抽出するが、係り受け関係をつなげた文字列や
+    属性候補語などの情報は作らない
+    属性の番号は attr_names の添字であり、extract_attribution の戻り値の属性と同じ順に並ぶ
+
+    Args:
+      text (str): 属性を抽出したい文
+
+    Returns:
+      昇順に並んだ属性の番号のタプル
+    """
+    options = (ExtractionOption(self.extend, self.ristrict),)
+    if not self._passes_prefilter(text, options):
+      return tuple()
+
+    analysis_result = self._analyze(text)
+    return self._match_attr_ids(analysis_result, self.extend, self.ristrict)
+
+  def extract_attributions(
+      self, texts: Iterable[str]) -> List[Dict[str, Tuple[Dict[str, Any]]]]:
+    """複数の文から属性の抽出を行う
+
+    同じ文は1回だけ解析し、係り受け関係ごとの属性語の照合結果も文の間で使い回す
+    同じ文には同じ辞書オブジェクトを返すため、戻り値の辞書は変更してはならない
+
+    Args:
+      texts (Iterable[str]): 属性を抽出したい文の一覧
+
+    Returns:
+      texts と同じ順に並んだ extract_attribution の戻り値のリスト
+    """
+    option = ExtractionOption(self.extend, self.ristrict)
+    return [result_dict[option] for result_dict
+            in self.extract_attributions_with_options(texts, (option,))]
+
+  def extract_attributions_with_options(
+      self, texts: Iterable[str],
+      options: Iterable[ExtractionOption] = ALL_EXTRACTION_OPTIONS
+  ) -> List[Dict[ExtractionOption, Dict[str, Tuple[Dict[str, Any]]]]]:
+    """複数の文から、複数のオプションでの属性の抽出を行う
+
+    同じ文は1回だけ解析し、係り受け関係ごとの属性語の照合結果も文の間で使い回す
+    同じ文には同じ辞書オブジェクトを返すため、戻り値の辞書は変更してはならない
+
+    Args:
+      texts (Iterable[str]): 属性を抽出したい文の一覧
+      options (Iterable[ExtractionOption]): 抽出に使うオプションの一覧
+
+    Returns:
+      texts と同じ順に並んだ extract_attribution_with_options の戻り値のリスト
+    """
+    options = tuple(ExtractionOption(*option) for option in options)
+    link_cache = dict()
+    text_to_result = dict()
+    results = []
+    for text in texts:
+      result_dict = text_to_result.get(text)
+      if result_dict is None:
+        result_dict = self._extract_with_options(text, options, link_cache)
+        text_to_result[text] = result_dict
+
+      results.append(result_dict)
+
+    return results
+
+  def _extract_with_options(
+      self, text: str, options: Tuple[ExtractionOption, ...],
+      link_cache: Optional[Dict[Any, LinkMatch]] = None
+  ) -> Dict[ExtractionOption, Dict[str, Tuple[Dict[str, Any]]]]:
+    """1文から複数のオプションでの属性の抽出を行うヘルパーメソッド"""
+    if not self._passes_prefilter(text, options):
+      return OrderedDict((option, OrderedDict()) for option in options)
+
     analysis_result = self._analyze(text)
-    result_list = []
+    result_dict = OrderedDict()
+    for option in options:
+      result_dict[option] = self._extract_from_analysis_result(
+          analysis_result, option.extend, option.ristrict, link_cache)
+
+    return result_dict
+
+  def _passes_prefilter(self, text: str,
+                        options: Tuple[ExtractionOption, ...]) -> bool:
+    """係り受け解析を行うべき文かを事前照合で判定するヘルパーメソッド
+
+    属性候補語は文中の形態素の表層を連結したものであり、形態素の間の空白は含まない
+    そのため空白を除いた文に、空白を除いた属性辞書のどの語も現れなければ属性は抽出されない
+
+    Args:
+      text (str): 属性を抽出したい文
+      options (Tuple[ExtractionOption, ...]): 検証時に使うオプションの一覧
+
+    Returns:
+      係り受け解析を行うべきなら True、省略してよいなら False
+    """
+    if not self.prefilter or self._automaton.search(_remove_whitespace(text)):
+      if self.prefilter:
+        self._prefilter_counts[1] += 1
+
+      return True
+
+    self._prefilter_counts[0] += 1
+    if self._verify_rate > 0.0 and self._random.random() < self._verify_rate:
+      self._prefilter_counts[2] += 1
+      analysis_result = self._analyze(text)
+      if any(self._extract_from_analysis_result(analysis_result, *option)
+             for option in options):
+        self._prefilter_counts[3] += 1
+        self.prefilter_disagreements.append(text)
+
+    return False
+
+  def _extract_from_analysis_result(
+      self, analysis_result: DependencyAnalysisResult,
+      extend: bool, ristrict: bool,
+      link_cache: Optional[Dict[Any, LinkMatch]] = None
+  ) -> Dict[str, Tuple[Dict[str, Any]]]:
+    """係り受け解析の結果から属性の抽出を行うヘルパーメソッド
+
+    Args:
+      analysis_result (DependencyAnalysisResult): 係り受け解析の結果
+      extend (bool): 複合語を構成する形態素も属性候補語とするか
+      ristrict (bool): 係り受け関係を更新してから属性候補語を抽出するか
+      link_cache (Optional[Dict[Any, LinkMatch]]):
+        文節の主辞・機能語の並びごとの照合結果(複数の文で使い回す場合に指定する)
+
+    Returns:
+      抽出できた属性ごとに属性に関する情報をまとめた辞書
+    """
+    attr_to_infos = defaultdict(list)
     for linkdetails in analysis_result.link_dict.values():
-      attrs = []
-      candidate_term_list = []
-      hit_terms = []
       links = tuple(linkdetail.phrase_id for linkdetail in linkdetails)
-      flagment = _convert_link_to_flagment(links, 
-                                           analysis_result.chunk_dict)
-      candidate_linkdetails = self._get_canndidate_terms(linkdetails)
-      for linkdetail in candidate_linkdetails:
-        head, words, _, _ = linkdetail.phrase_detail
-        
-        candidate_terms = [head]
-        # 候補語が複合語の場合、属性辞書に載っていない場合がある
-        # そのことを防ぐために複合語を構成する形態素も候補語に追加する
-        if self.extend and words:
-          candidate_terms.extend(words)
-
-        candidate_term_list.extend(candidate_terms)
-        for attr, words in self.attrdict.items():
-          for term in candidate_terms:
-            if term in words:
-              hit_terms.append(term)
-              attrs.append(attr)
-
-      attrs = frozenset(unique_sort_by_index(attrs))
-      candidate_terms = frozenset(unique_sort_by_index(candidate_term_list))
-      hit_terms = frozenset(unique_sort_by_index(hit_terms))
-      phrases = frozenset(linkdetail.phrase_detail.head_surface 
-                          for linkdetail in linkdetails)
-      result_list.append(AttrExtractionResult(
-          attrs, flagment, candidate_terms, hit_terms, phrases, len(links)))
-
-    result_dict = defaultdict(list)
-    for result in result_list:
-      for attr in result.attrs:
-        info = AttrExtractionInfo.from_result(result)
-        result_dict[attr].append(info)
-
-    temp_dict = dict(result_dict)
+      if link_cache is None:
+        link_match = self._match_linkdetails(linkdetails, extend, ristrict)
+
+      else:
+        # 照合結果は文節の番号によらず、主辞・機能語の並びだけで決まる
+        key = (tuple(linkdetail.phrase_detail for linkdetail in linkdetails),
+               extend, ristrict)
+        link_match = link_cache.get(key)
+        if link_match is None:
+          link_match = self._match_linkdetails(linkdetails, extend, ristrict)
+          link_cache[key] = link_match
+
+      if not link_match.attributions:
+        continue
+
+      flagment = _convert_link_to_flagment(links, analysis_result.chunk_dict)
+      info = AttrExtractionInfo(flagment, link_match.candidate_terms,
+                                link_match.hit_terms, link_match.phrases,
+                                len(links))
+      for attr in link_match.attributions:
+        attr_to_infos[attr].append(info)
+
+    # 属性辞書の出現順に並べる
     result_dict = OrderedDict()
-    for attr in self.attrdict:
-      if attr in temp_dict:
-        info_list = temp_dict[attr]
-        info_set = unique_sort_by_index(info_list)
-        result_dict[attr] = tuple(OrderedDict(info._asdict()) 
-                                  for info in info_set)
+    for attr in sorted(attr_to_infos, key=self._attr_to_id.__getitem__):
+      info_list = OrderedDict.fromkeys(attr_to_infos[attr])
+      result_dict[attr] = tuple(OrderedDict(info._asdict())
+                                for info in info_list)
 
     return result_dict
 
+  def _match_attr_ids(self, analysis_result: DependencyAnalysisResult,
+                      extend: bool, ristrict: bool) -> Tuple[int, ...]:
+    """係り受け解析の結果から属性の番号だけを抽出するヘルパーメソッド"""
+    term_to_attr_ids = self._term_to_attr_ids
+    attr_ids = set()
+    for linkdetails in analysis_result.link_dict.values():
+      for linkdetail in self._get_canndidate_terms(linkdetails, ristrict):
+        head, words, _, _ = linkdetail.phrase_detail
+        attr_ids.update(term_to_attr_ids.get(head, ()))
+        if extend:
+          for word in words:
+            attr_ids.update(term_to_attr_ids.get(word, ()))
+
+    return tuple(sorted(attr_ids))
+
+  def _match_linkdetails(self, linkdetails: Tuple[LinkDetail, ...],
+                         extend: bool, ristrict: bool) -> LinkMatch:
+    """1つの係り受け関係の属性候補語を属性辞書と照合するヘルパーメソッド
+
+    Args:
+      linkdetails (Tuple[LinkDetail, ...]): 係り受け関係
+      extend (bool): 複合語を構成する形態素も属性候補語とするか
+      ristrict (bool): 係り受け関係を更新してから属性候補語を抽出するか
+
+    Returns:
+      LinkMatchインスタンス
+    """
+    attrs = []
+    candidate_term_list = []
+    hit_terms = []
+    candidate_linkdetails = self._get_canndidate_terms(linkdetails, ristrict)
+    for linkdetail in candidate_linkdetails:
+      head, words, _, _ = linkdetail.phrase_detail
+      
+      candidate_terms = [head]
+      # 候補語が複合語の場合、属性辞書に載っていない場合がある
+      # そのことを防ぐために複合語を構成する形態素も候補語に追加する
+      if extend and words:
+        candidate_terms.extend(words)
+
+      candidate_term_list.extend(candidate_terms)
+      # 結果は集合にするため、候補語1つにつき1回の索引の参照で済ませる
+      for term in candidate_terms:
+        attr_ids = self._term_to_attr_ids.get(term)
+        if attr_ids:
+          hit_terms.append(term)
+          attrs.extend(self._attr_names[attr_id] for attr_id in attr_ids)
+
+    phrases = frozenset(linkdetail.phrase_detail.head_surface
+                        for linkdetail in linkdetails)
+    return LinkMatch(frozenset(attrs), frozenset(candidate_term_list),
+                     frozenset(hit_terms), phrases)
+
   def _get_canndidate_terms(self, 
-      linkdetails: Tuple[LinkDetail, ...]) -> Tuple[LinkDetail, ...]:
+      linkdetails: Tuple[LinkDetail, ...],
+      ristrict: bool) -> Tuple[LinkDetail, ...]:
     """属性候補語を抽出するためのヘルパーメソッド
 
     Args:
       linkdetails (Tuple[LinkDetail, ...]): 係り受け関係
+      ristrict (bool): 係り受け関係を更新してから属性候補語を抽出するか
 
     Returns:
       属性候補語のみを含む文節の係り受け構造の一覧
     """
-    if self.ristrict:
+    if ristrict:
       linkdetails = self._update_linkdetails(linkdetails)
 
     candidate_link_prop_list = []
     for linkdetail in linkdetails[:-1]:
-      head, _, pos, func = linkdetail.phrase_content
-      if pos != '名詞' or head in self.stopwords:
+      head, _, pos, func = linkdetail.phrase_detail
+      if pos != '名詞' or head in self._stopword_set:
         continue                
 
       else:
@@ -190,7 +479,7 @@ class AttributionExtractor:
           candidate_link_prop_list.append(linkdetail)
 
     last_linkdetail = linkdetails[-1]
-    if last_linkdetail.phrase_content.pos == '名詞':
+    if last_linkdetail.phrase_detail.part_of_speech == '名詞':
       candidate_link_prop_list.append(last_linkdetail)
 
     return tuple(candidate_link_prop_list)
@@ -205,54 +494,7 @@ class AttributionExtractor:
     Returns:
       更新後の係り受け関係
     """
-    length = len(linkdetails) - 1
-    old_updated_linkdetails = linkdetails[:]
-    while True:
-      updated_linkdetails = []
-      for curr_idx, curr_linkdetail in enumerate(linkdetails[:-1]):
-        c_head, c_words, c_pos, c_func = curr_linkdetail.phrase_detail
-        is_not_noun = c_pos != '名詞'
-        is_noun_and_good = c_pos == '名詞' and _is_good_functional_word(c_func)
-        is_stopword = c_head in self.stopwords
-        if is_not_noun and is_noun_and_good and is_stopword:
-          updated_linkdetails = curr_linkdetail
-
-        # 属性候補語と思われる語句が含まれる文節の処理
-        else:
-          n_head, _, n_pos, n_func = linkdetails[curr_idx+1].phrase_detail
-          if n_pos != '名詞':
-            updated_linkdetail = curr_linkdetail
-
-          else:  # 機能語が一致しないことで抽出できない主辞や単語を減らすための処理
-            if c_func == 'の':  # 助詞「の」における処理
-              if n_head in self.stopwords:
-                # 次の主辞がストップワードなら次の機能語を現在の機能語とする
-                # そうすることで、機能語が一致しないことで抽出できない主辞や単語を減らせる
-                updated_linkdetail = LinkDetail(
-                    curr_linkdetail.chunk_id, 
-                    PhraseDetail(c_head, c_pos, c_words, n_func))
-
-              else:
-                updated_linkdetail = curr_linkdetail
-
-            elif c_func in PAEALLEL_PRESENTATION_WORDS:  # 助詞「と」「や」における処理
-              # 並列に述べられているので機能語を合わせても問題ない
-              updated_linkdetail = LinkDetail(
-                  curr_linkdetail.chunk_id, 
-                  PhraseDetail(c_head, c_pos, c_words, n_func))
-                
-            else:  # 今のところ対処できないものは更新しない
-              updated_linkdetail = curr_linkdetail
-
-        updated_linkdetails.append(updated_linkdetail)
-      
-      updated_linkdetails.append(linkdetails[length])
-      if updated_linkdetails == old_updated_linkdetails:  # もう更新できないなら処理をやめる
-        break
-
-      old_updated_linkdetails = tuple(updated_linkdetails[:])
-      
-    return tuple(updated_linkdetails)
+    return _update_linkdetails(linkdetails, self._stopword_set)
 
   def _analyze(self, sentence: str) -> DependencyAnalysisResult:
     chunk_dict, token_dict, _ = self._analyzer.analyze(sentence)
@@ -271,7 +513,7 @@ class AttributionExtractor:
         = self._attrdict_handler.attr_dict(category)
     self._category_to_attrdict[COMMON_DICTIONARY_NAME] = self._common_attr_dict
     self._ja2en = OrderedDict()
-    for _category, attrdict in self._category_to_attrdict:
+    for _category, attrdict in self._category_to_attrdict.items():
       for attr in attrdict:
         self._ja2en[attr] = self._attrdict_handler.ja2en(_category)[attr]
 
@@ -284,19 +526,72 @@ class AttributionExtractor:
       for attr, words in attrdict.items():
         self._attr_dict[attr] = words
 
+    # 属性語から属性の番号を引く索引
+    # 候補語1つにつき1回の辞書参照で、その語を含む全ての属性がわかる
+    # 商品カテゴリごとの索引は AttrDictHandler がコンパイル済みのものを使う
+    self._attr_names = tuple(self._attr_dict)
+    attr_to_id = {attr: attr_id for attr_id, attr in enumerate(self._attr_names)}
+    self._attr_to_id = attr_to_id
+    term_to_attr_ids = dict()
+    for _category, attrdict in self._category_to_attrdict.items():
+      term_index = self._attrdict_handler.term_index(_category)
+      for term, attrs in term_index.items():
+        for attr in attrs:
+          # 同名の属性が後の辞書で上書きされている場合は、上書きした方の語のみを使う
+          if self._attr_dict[attr] is attrdict[attr]:
+            term_to_attr_ids.setdefault(term, set()).add(attr_to_id[attr])
+
+    self._term_to_attr_ids = {term: tuple(sorted(attr_ids))
+                              for term, attr_ids in term_to_attr_ids.items()}
+    if self.prefilter:
+      self._automaton = AhoCorasick(_remove_whitespace(term)
+                                    for term in self._term_to_attr_ids)
+
 
 # ヘルパー関数群
-def _is_good_functional_word(functional_word: str) -> bool:
-  """数珠繋ぎをしないような機能語であるかをチェックする
+def _remove_whitespace(text: str) -> str:
+  """全角の空白も含めて、文字列中の全ての空白を除くヘルパー関数"""
+  return ''.join(text.split())
+
+def _update_linkdetails(linkdetails: Tuple[LinkDetail, ...],
+                        stopwords: FrozenSet[str]) -> Tuple[LinkDetail, ...]:
+  """係り受け関係の機能語を係り先に合わせて更新する
+
+  文節の機能語は係り先の文節の(更新後の)機能語によってのみ書き換わるため、
+  終端から係り元に向かって1度たどるだけで全ての更新を反映できる
 
   Args:
-    functional_word (str): 機能語
+    linkdetails (Tuple[LinkDetails, ...]): 更新したい係り受け関係
+    stopwords (FrozenSet[str]): ストップワード
 
   Returns:
-    数珠つなぎをしないような機能語ならば True, それ以外は False を返す
+    更新後の係り受け関係
   """
-  return functional_word != 'の' and \
-         functional_word not in PAEALLEL_PRESENTATION_WORDS
+  updated_linkdetails = list(linkdetails)
+  for curr_idx in range(len(linkdetails) - 2, -1, -1):
+    curr_linkdetail = linkdetails[curr_idx]
+    c_func = curr_linkdetail.phrase_detail.functional_word
+    n_head, _, n_pos, n_func = updated_linkdetails[curr_idx+1].phrase_detail
+    # 属性候補語と思われる語句が含まれる文節の処理
+    if n_pos != '名詞' or c_func == n_func:
+      continue
+
+    # 機能語が一致しないことで抽出できない主辞や単語を減らすための処理
+    if c_func == 'の':  # 助詞「の」における処理
+      # 次の主辞がストップワードなら次の機能語を現在の機能語とする
+      # そうすることで、機能語が一致しないことで抽出できない主辞や単語を減らせる
+      if n_head not in stopwords:
+        continue
+
+    # 助詞「と」「や」は並列に述べられているので機能語を合わせても問題ない
+    elif c_func not in PAEALLEL_PRESENTATION_WORDS:
+      continue  # 今のところ対処できないものは更新しない
+
+    updated_linkdetails[curr_idx] = LinkDetail(
+        curr_linkdetail.phrase_id,
+        curr_linkdetail.phrase_detail._replace(functional_word=n_func))
+
+  return tuple(updated_linkdetails)
 
 def _convert_link_to_flagment(
     link_list: Tuple[int, ...], chunk_dict: ChunkDict) -> str:
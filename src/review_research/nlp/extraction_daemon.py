@@ -0,0 +1,563 @@
+import asyncio
+import json
+import os
+import pathlib
+import socket
+import stat
+import tempfile
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Iterable, Iterator, Optional, Union, Dict, List, Tuple, Any, NoReturn, Sequence, FrozenSet
+
+from ..nlp import AttrDictHandler
+from ..nlp import ExtractionOption
+from ..nlp import AttributionExtractor
+from ..nlp import WorkItem
+from ..nlp import ExtractionOutput
+from ..nlp import WordRepr
+
+# デーモンの待ち受けアドレス(「ホスト:ポート」の形式でなければ Unix ソケットのパス)
+DEFAULT_DAEMON_ADDRESS = str(pathlib.Path(tempfile.gettempdir())
+                             / 'review_research_extraction.sock')
+# 1回の属性抽出でまとめて処理する文の最大数
+DEFAULT_MAX_BATCH_SIZE = 64
+# 他のリクエストの文をまとめるために待つ最大秒数
+DEFAULT_MAX_BATCH_DELAY = 0.002
+# クライアントが1回のリクエストで送る文の数
+DEFAULT_REQUEST_SIZE = 64
+# デーモンが受け付ける1行のリクエストの最大バイト数
+DEFAULT_MAX_REQUEST_BYTES = 32 * 1024 * 1024
+# レイテンシの集計に使う直近のリクエスト数
+LATENCY_WINDOW = 10000
+
+Address = Union[str, Tuple[str, int]]
+
+class DaemonStats(NamedTuple):
+  """デーモンの処理状況
+
+  Attributes:
+    requests (int): 処理したリクエストの数
+    sentences (int): 処理した文の数
+    batches (int): 属性抽出を行った回数
+    p50_ms (float): 直近のリクエストのレイテンシの中央値(ミリ秒)
+    p99_ms (float): 直近のリクエストのレイテンシの99パーセンタイル(ミリ秒)
+    throughput (float): 起動してから1秒あたりに処理した文の数
+  """
+  requests: int
+  sentences: int
+  batches: int
+  p50_ms: float
+  p99_ms: float
+  throughput: float
+
+  @property
+  def mean_batch_size(self) -> float:
+    """1回の属性抽出でまとめて処理した文の数の平均"""
+    return self.sentences / self.batches if self.batches else 0.0
+
+
+class _PendingSentence(NamedTuple):
+  """属性抽出を待っている1文"""
+  category: str
+  options: Tuple[ExtractionOption, ...]
+  sentence: str
+  future: asyncio.Future
+
+
+class ExtractionDaemon:
+  """全商品カテゴリの AttributionExtractor を常駐させて属性抽出を行うデーモン
+
+  Unix ソケットまたは localhost の TCP で1行1リクエストの JSON を受け付ける
+  max_request_bytes を超えるリクエストは読み飛ばし、エラーを返して同じ接続で次のリクエストを待つ
+  同時に届いた複数のリクエストの文は、max_batch_size 文までまとめて1つのスレッドで処理する
+  (形態素解析器と係り受け解析器はスレッドごとに生成されるため、処理は1スレッドで行う)
+
+  Usage:
+    >>> daemon = ExtractionDaemon(dic_dir, address='127.0.0.1:8765')
+    >>> asyncio.run(daemon.serve())
+
+    クライアントからは ExtractionClient を使う
+    >>> with ExtractionClient('127.0.0.1:8765') as client:
+    ...   for output in client.extract(work_items, category='smartphone'):
+    ...     print(output.result)
+  """
+
+  def __init__(self, dic_dir: Union[str, pathlib.Path],
+               address: str = DEFAULT_DAEMON_ADDRESS,
+               max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+               max_batch_delay: float = DEFAULT_MAX_BATCH_DELAY,
+               prefilter: bool = False, compact_tokens: bool = False,
+               max_request_bytes: int = DEFAULT_MAX_REQUEST_BYTES):
+    """
+    Args:
+      dic_dir (Union[str, pathlib.Path]): 属性辞書の大本のディレクトリ
+      address (str): 待ち受けアドレス(「ホスト:ポート」または Unix ソケットのパス)
+      max_batch_size (int): 1回の属性抽出でまとめて処理する文の最大数
+      max_batch_delay (float): 他のリクエストの文をまとめるために待つ最大秒数
+      prefilter (bool): AttributionExtractor の prefilter オプション
+      compact_tokens (bool): AttributionExtractor の compact_tokens オプション
+      max_request_bytes (int): 受け付ける1行のリクエストの最大バイト数
+    """
+    if max_batch_size < 1:
+      raise ValueError('max_batch_size must be a positive integer.')
+
+    if max_request_bytes < 1:
+      raise ValueError('max_request_bytes must be a positive integer.')
+
+    self._dic_dir = str(dic_dir)
+    self._address = _parse_address(address)
+    self._max_batch_size  = max_batch_size
+    self._max_batch_delay = max_batch_delay
+    self._prefilter = prefilter
+    self._compact_tokens = compact_tokens
+    self._max_request_bytes = max_request_bytes
+    self._attrdict_handler = None  # type: AttrDictHandler
+    self._extractors = dict()  # type: Dict[str, AttributionExtractor]
+    self._executor = ThreadPoolExecutor(max_workers=1)
+    self._queue = None  # type: asyncio.Queue
+    self._started_at = None  # type: float
+    self._num_requests = 0
+    self._num_sentences = 0
+    self._num_batches = 0
+    self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+  @property
+  def address(self) -> Address:
+    return self._address
+
+  @property
+  def categories(self) -> Tuple[str, ...]:
+    return tuple(self._extractors)
+
+  def stats(self) -> DaemonStats:
+    """起動してからの処理状況を返す"""
+    latencies = sorted(self._latencies)
+    elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+    return DaemonStats(self._num_requests, self._num_sentences,
+                       self._num_batches,
+                       _percentile(latencies, 0.50) * 1000,
+                       _percentile(latencies, 0.99) * 1000,
+                       self._num_sentences / elapsed if elapsed else 0.0)
+
+  async def serve(self) -> NoReturn:
+    """属性抽出器を準備してリクエストを待ち受ける(キャンセルされるまで戻らない)"""
+    loop = asyncio.get_running_loop()
+    # 解析器はスレッドごとに生成されるため、抽出を行うスレッドで準備する
+    await loop.run_in_executor(self._executor, self._load_extractors)
+    self._queue = asyncio.Queue()
+    self._started_at = time.perf_counter()
+
+    if isinstance(self._address, tuple):
+      host, port = self._address
+      server = await asyncio.start_server(self._handle_connection, host, port,
+                                          limit=self._max_request_bytes)
+
+    else:
+      _remove_stale_socket(self._address)
+      server = await asyncio.start_unix_server(self._handle_connection,
+                                               self._address,
+                                               limit=self._max_request_bytes)
+
+    batch_task = loop.create_task(self._process_batches())
+    try:
+      async with server:
+        await server.serve_forever()
+
+    finally:
+      batch_task.cancel()
+      self._executor.shutdown(wait=False)
+      if isinstance(self._address, str) and os.path.exists(self._address):
+        os.remove(self._address)
+
+  def _load_extractors(self) -> NoReturn:
+    self._attrdict_handler = AttrDictHandler(self._dic_dir)
+    for category in self._attrdict_handler.categories:
+      extractor = AttributionExtractor(self._dic_dir, prefilter=self._prefilter,
+                                       compact_tokens=self._compact_tokens)
+      extractor.category = category
+      self._extractors[category] = extractor
+
+  async def _handle_connection(self, reader: asyncio.StreamReader,
+                               writer: asyncio.StreamWriter) -> NoReturn:
+    """1つの接続から届くリクエストを順に処理する"""
+    try:
+      while True:
+        try:
+          line = await _read_line(reader)
+
+        except ValueError as e:
+          response = {'error': '{}: {}'.format(type(e).__name__, e)}
+
+        else:
+          if not line:
+            break
+
+          try:
+            response = await self._handle_request(json.loads(line.decode('utf-8')))
+
+          except Exception as e:
+            response = {'error': '{}: {}'.format(type(e).__name__, e)}
+
+        writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        writer.write(b'\n')
+        await writer.drain()
+
+    except ConnectionError:
+      pass
+
+    finally:
+      writer.close()
+
+  async def _handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    request_type = request.get('type', 'extract')
+    if request_type == 'ping':
+      return {'categories': list(self.categories)}
+
+    if request_type == 'stats':
+      return self.stats()._asdict()
+
+    if request_type == 'ja2en':
+      category = request['category']
+      ja2en = OrderedDict(self._attrdict_handler.ja2en(category))
+      ja2en.update(self._attrdict_handler.common_ja2en)
+      return {'ja2en': ja2en}
+
+    if request_type != 'extract':
+      raise ValueError('Unknown request type: {}'.format(request_type))
+
+    started_at = time.perf_counter()
+    category = request['category']
+    if category not in self._extractors:
+      raise KeyError(category)
+
+    options = tuple(ExtractionOption(*option) for option in request['options'])
+    loop = asyncio.get_running_loop()
+    futures = []
+    for sentence in request['sentences']:
+      future = loop.create_future()
+      self._queue.put_nowait(_PendingSentence(category, options, sentence, future))
+      futures.append(future)
+
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    for result in results:
+      if isinstance(result, Exception):
+        raise result
+
+    self._num_requests += 1
+    self._latencies.append(time.perf_counter() - started_at)
+    return {'results': [[_encode_result(result_dict[option]) for option in options]
+                        for result_dict in results]}
+
+  async def _process_batches(self) -> NoReturn:
+    """待ち行列の文をまとめて属性抽出するタスク"""
+    loop = asyncio.get_running_loop()
+    while True:
+      batch = [await self._queue.get()]
+      if self._max_batch_delay > 0 and self._queue.qsize() < self._max_batch_size - 1:
+        await asyncio.sleep(self._max_batch_delay)
+
+      while len(batch) < self._max_batch_size and not self._queue.empty():
+        batch.append(self._queue.get_nowait())
+
+      try:
+        results = await loop.run_in_executor(self._executor,
+                                             self._extract_batch, batch)
+
+      except Exception as e:
+        results = [e] * len(batch)
+
+      self._num_batches += 1
+      self._num_sentences += len(batch)
+      for pending, result in zip(batch, results):
+        if pending.future.done():
+          continue
+
+        if isinstance(result, Exception):
+          pending.future.set_exception(result)
+
+        else:
+          pending.future.set_result(result)
+
+  def _extract_batch(self, batch: List[_PendingSentence]) -> List[Any]:
+    """まとめた文の属性を抽出する
+
+    商品カテゴリとオプションが同じ文は1回の extract_attributions_with_options で処理する
+    (同じ文は1回だけ解析される)
+    """
+    groups = OrderedDict()
+    for index, pending in enumerate(batch):
+      groups.setdefault((pending.category, pending.options), []).append(index)
+
+    results = [None] * len(batch)
+    for (category, options), indices in groups.items():
+      extractor = self._extractors[category]
+      try:
+        result_dicts = extractor.extract_attributions_with_options(
+            [batch[index].sentence for index in indices], options)
+
+      except Exception as e:
+        result_dicts = [e] * len(indices)
+
+      for index, result in zip(indices, result_dicts):
+        results[index] = result
+
+    return results
+
+
+class ExtractionClient:
+  """ExtractionDaemon に属性抽出を依頼するクライアント
+
+  ExtractionEngine と同じ extract と ja2en をもつため、その代わりに使える
+
+  Usage:
+    >>> client = ExtractionClient.connect_if_running(options=ALL_EXTRACTION_OPTIONS)
+    >>> engine = client or ExtractionEngine(dic_dir, options=ALL_EXTRACTION_OPTIONS)
+    >>> with engine:
+    ...   outputs = list(engine.extract(work_items, category='smartphone'))
+  """
+
+  def __init__(self, address: str = DEFAULT_DAEMON_ADDRESS,
+               extend: bool = True, ristrict: bool = True,
+               options: Optional[Sequence[ExtractionOption]] = None,
+               request_size: int = DEFAULT_REQUEST_SIZE,
+               timeout: Optional[float] = None):
+    """
+    Args:
+      address (str): デーモンのアドレス(「ホスト:ポート」または Unix ソケットのパス)
+      extend (bool): AttributionExtractor の extend オプション
+      ristrict (bool): AttributionExtractor の ristrict オプション
+      options (Optional[Sequence[ExtractionOption]]):
+        抽出に使うオプションの一覧(指定した場合は extend と ristrict を無視する)
+      request_size (int): 1回のリクエストで送る文の数
+      timeout (Optional[float]): 応答を待つ最大秒数(None の場合は無期限に待つ)
+    """
+    if request_size < 1:
+      raise ValueError('request_size must be a positive integer.')
+
+    self._address = _parse_address(address)
+    if options:
+      self._options = tuple(ExtractionOption(*option) for option in options)
+
+    else:
+      self._options = (ExtractionOption(extend, ristrict),)
+
+    self._request_size = request_size
+    self._timeout = timeout
+    self._socket = None  # type: socket.socket
+    self._reader = None
+
+  @classmethod
+  def connect_if_running(cls, address: str = DEFAULT_DAEMON_ADDRESS,
+                         **kwargs) -> Optional['ExtractionClient']:
+    """デーモンが起動していれば接続したクライアントを返し、起動していなければ None を返す
+
+    Args:
+      address (str): デーモンのアドレス
+      kwargs: ExtractionClient のその他の引数
+    """
+    client = cls(address, **kwargs)
+    try:
+      client.open()
+      client._request({'type': 'ping'})
+
+    except (OSError, ValueError):
+      client.close()
+      return None
+
+    return client
+
+  @property
+  def options(self) -> Tuple[ExtractionOption, ...]:
+    return self._options
+
+  def __enter__(self):
+    self.open()
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def open(self) -> NoReturn:
+    """デーモンに接続する"""
+    if self._socket is not None:
+      return
+
+    if isinstance(self._address, tuple):
+      self._socket = socket.create_connection(self._address, self._timeout)
+
+    else:
+      self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      self._socket.settimeout(self._timeout)
+      try:
+        self._socket.connect(self._address)
+
+      except OSError:
+        self.close()
+        raise
+
+    self._reader = self._socket.makefile('rb')
+
+  def close(self) -> NoReturn:
+    """デーモンとの接続を閉じる"""
+    if self._reader is not None:
+      self._reader.close()
+      self._reader = None
+
+    if self._socket is not None:
+      self._socket.close()
+      self._socket = None
+
+  def ja2en(self, category: str) -> Dict[str, str]:
+    """categoryで抽出される属性名の日英変換辞書を返す(ExtractionEngine.ja2en と同じ)"""
+    response = self._request({'type': 'ja2en', 'category': category})
+    return response['ja2en']
+
+  def stats(self) -> DaemonStats:
+    """デーモンの処理状況を返す"""
+    return DaemonStats(**self._request({'type': 'stats'}))
+
+  def extract(self, work_items: Iterable[Tuple[int, int, str]],
+              category: str) -> Iterator[ExtractionOutput]:
+    """文ごとに属性を抽出する(ExtractionEngine.extract と同じ)
+
+    Args:
+      work_items (Iterable[Tuple[int, int, str]]):
+        (review_id, sentence_id, sentence) の組の一覧
+      category (str): 商品カテゴリ
+
+    Yields:
+      入力順に並んだ ExtractionOutput インスタンス
+    """
+    items = []
+    for item in work_items:
+      items.append(WorkItem(*item))
+      if len(items) == self._request_size:
+        yield from self._extract_items(items, category)
+        items = []
+
+    if items:
+      yield from self._extract_items(items, category)
+
+  def _extract_items(self, items: List[WorkItem],
+                     category: str) -> Iterator[ExtractionOutput]:
+    request = {'type': 'extract', 'category': category,
+               'options': [list(option) for option in self.options],
+               'sentences': [item.sentence for item in items]}
+    response = self._request(request)
+    for item, results in zip(items, response['results']):
+      yield ExtractionOutput(item.review_id, item.sentence_id, item.sentence,
+                             tuple(_decode_result(result) for result in results))
+
+  def _request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    self.open()
+    line = json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n'
+    self._socket.sendall(line)
+    response_line = self._reader.readline()
+    if not response_line:
+      raise ConnectionError('The extraction daemon closed the connection.')
+
+    response = json.loads(response_line.decode('utf-8'),
+                          object_pairs_hook=OrderedDict)
+    if 'error' in response:
+      raise RuntimeError(response['error'])
+
+    return response
+
+
+## ヘルパー関数
+def _parse_address(address: str) -> Address:
+  """「ホスト:ポート」は (ホスト, ポート) に変換し、それ以外は Unix ソケットのパスとする"""
+  host, separator, port = str(address).rpartition(':')
+  if separator and host and port.isdigit():
+    return host, int(port)
+
+  return str(address)
+
+async def _read_line(reader: asyncio.StreamReader) -> bytes:
+  """1行を読み込むヘルパー関数(接続が閉じられた場合は読み込めた分を返す)
+
+  Raises:
+    ValueError: 行の長さが StreamReader の上限を超えた場合に、その行を改行まで読み飛ばして発生
+  """
+  try:
+    return await reader.readuntil(b'\n')
+
+  except asyncio.IncompleteReadError as e:
+    return e.partial
+
+  except asyncio.LimitOverrunError as e:
+    consumed = e.consumed
+
+  # 上限を超えた分は StreamReader に残っているため、改行が見つかるまで捨てる
+  try:
+    while True:
+      await reader.readexactly(consumed)
+      try:
+        await reader.readuntil(b'\n')
+        break
+
+      except asyncio.LimitOverrunError as e:
+        consumed = e.consumed
+
+  except asyncio.IncompleteReadError:
+    pass
+
+  raise ValueError('The request line exceeds the limit of the extraction daemon.')
+
+def _remove_stale_socket(path: str) -> NoReturn:
+  """以前に起動したデーモンが残した Unix ソケットのファイルを削除する"""
+  try:
+    mode = os.stat(path).st_mode
+
+  except FileNotFoundError:
+    return
+
+  if not stat.S_ISSOCK(mode):
+    raise FileExistsError('{} exists and is not a socket.'.format(path))
+
+  with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+    try:
+      sock.connect(path)
+
+    except ConnectionRefusedError:
+      os.remove(path)
+      return
+
+  raise RuntimeError('Another daemon is listening on {}.'.format(path))
+
+def _encode_result(result_dict: Dict[str, Tuple[Dict[str, Any], ...]]) -> Dict[str, Any]:
+  """属性抽出の結果を JSON に変換できる形にする(集合は整列したリストにする)
+
+  集合の要素の WordRepr は [表層形, 原形] のリストとし、文字列の後ろに並べる
+  """
+  return OrderedDict(
+      (attr, [OrderedDict((key, _encode_terms(value) if isinstance(value, frozenset) else value)
+                          for key, value in info.items())
+              for info in infos])
+      for attr, infos in result_dict.items())
+
+def _decode_result(data: Dict[str, Any]) -> Dict[str, Tuple[Dict[str, Any], ...]]:
+  """_encode_result で変換した結果を AttributionExtractor の戻り値と同じ形に戻す"""
+  return OrderedDict(
+      (attr, tuple(OrderedDict((key, _decode_terms(value) if isinstance(value, list) else value)
+                               for key, value in info.items())
+                   for info in infos))
+      for attr, infos in data.items())
+
+def _encode_terms(terms: FrozenSet[Union[str, WordRepr]]) -> List[Union[str, List[str]]]:
+  """文字列と WordRepr が混在する集合を、整列したリストにするヘルパー関数"""
+  return [list(term) if isinstance(term, WordRepr) else term
+          for term in sorted(terms, key=lambda term: (isinstance(term, WordRepr), term))]
+
+def _decode_terms(terms: List[Union[str, List[str]]]) -> FrozenSet[Union[str, WordRepr]]:
+  """_encode_terms で変換したリストを集合に戻すヘルパー関数"""
+  return frozenset(WordRepr(*term) if isinstance(term, list) else term
+                   for term in terms)
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+  """整列済みの値の q 分位点を返す(値がない場合は 0)"""
+  if not sorted_values:
+    return 0.0
+
+  return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
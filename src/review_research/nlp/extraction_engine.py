@@ -0,0 +1,449 @@
+import gc
+import multiprocessing
+import os
+import pathlib
+import queue
+import time
+from collections import OrderedDict, deque
+from typing import NamedTuple, Iterable, Iterator, Optional, Union, Dict, List, Tuple, Any, NoReturn, Sequence
+
+from ..nlp import MecabTaggerSingleton
+from ..nlp import CabochaParserSingleton
+from ..nlp import AttrDictHandler
+from ..nlp import ParseCache
+from ..nlp import ExtractionOption
+from ..nlp import AttributionExtractor
+from ..nlp import PrefilterStats
+
+# 1回の受け渡しでワーカへ送る文の数
+DEFAULT_CHUNK_SIZE = 64
+# ワーカプロセスの起動を待つ最大秒数
+DEFAULT_STARTUP_TIMEOUT = 60.0
+# 保持する、プールが後から作り直したワーカの計測結果の最大数
+MAX_RESPAWNED_WORKER_STATS = 100
+
+ExtractionResultDict = Dict[str, Tuple[Dict[str, Any], ...]]
+
+class WorkItem(NamedTuple):
+  """属性抽出の対象となる1文
+
+  Attributes:
+    review_id (int): レビュー番号
+    sentence_id (int): レビュー文中の文番号
+    sentence (str): 対象の文
+  """
+  review_id: int
+  sentence_id: int
+  sentence: str
+
+class ExtractionOutput(NamedTuple):
+  """1文に対する属性抽出の結果
+
+  Attributes:
+    review_id (int): レビュー番号
+    sentence_id (int): レビュー文中の文番号
+    sentence (str): 対象の文
+    results (Tuple[ExtractionResultDict, ...]):
+      ExtractionEngine.options の順に並んだ AttributionExtractor.extract_attribution の戻り値
+  """
+  review_id: int
+  sentence_id: int
+  sentence: str
+  results: Tuple[ExtractionResultDict, ...]
+
+  @property
+  def result(self) -> ExtractionResultDict:
+    """最初のオプションでの抽出結果"""
+    return self.results[0]
+
+class WorkerStats(NamedTuple):
+  """ワーカプロセスの起動時の計測結果
+
+  Attributes:
+    pid (int): ワーカのプロセスID
+    startup_seconds (float): ワーカプールの起動開始から、ワーカの初期化が終わるまでの時間(秒)
+    rss_kb (Optional[int]): 初期化直後の RSS (KB)
+    private_kb (Optional[int]): RSS のうち他のプロセスと共有していない分 (KB)
+    respawned (Optional[bool]):
+      preload したワーカが、終了したワーカの代わりにプールの起動後に fork されたものか
+      (preload していない場合は None)
+  """
+  pid: int
+  startup_seconds: float
+  rss_kb: Optional[int]
+  private_kb: Optional[int]
+  respawned: Optional[bool] = None
+
+
+class ExtractionEngine:
+  """AttributionExtractor.extract_attribution を複数プロセスで実行するクラス
+
+  各ワーカプロセスは起動時に CabochaParserSingleton から自身の係り受け解析器を生成し、
+  AttributionExtractor をプロセス内で使い回す
+  preload が True の場合は、親プロセスで AttributionExtractor と解析器を1度だけ生成してから
+  ワーカを fork するため、ワーカは辞書を読み込み直さずに親のメモリを copy-on-write で共有する
+  終了したワーカの代わりにプールが後から fork したワーカも、同じ解析器を使い回す
+  (fork が使えない環境では、preload を指定しても通常のワーカプールを使う)
+  結果は入力した文の順番通りに返される
+  options を複数指定した場合は、1文につき1回だけ係り受け解析を行い、全てのオプションでの結果を返す
+
+  Usage:
+    >>> items = [WorkItem(1, 1, '画面がきれい。'), WorkItem(1, 2, '電池の持ちが悪い。')]
+    >>> with ExtractionEngine(dic_dir, processes=4, chunksize=64) as engine:
+    ...   for output in engine.extract(items, category='smartphone'):
+    ...     print(output.review_id, output.sentence_id, output.result)
+
+    ワーカの起動時間とメモリ使用量を確認する
+    >>> with ExtractionEngine(dic_dir, processes=4, preload=True) as engine:
+    ...   for stats in engine.worker_stats():
+    ...     print(stats.pid, stats.startup_seconds, stats.rss_kb, stats.private_kb)
+  """
+
+  def __init__(self, dic_dir: Union[str, pathlib.Path],
+               extend: bool = True, ristrict: bool = True,
+               options: Optional[Sequence[ExtractionOption]] = None,
+               processes: Optional[int] = None,
+               chunksize: int = DEFAULT_CHUNK_SIZE,
+               parse_cache_path: Optional[Union[str, pathlib.Path]] = None,
+               prefilter: bool = False, verify_rate: float = 0.0,
+               compact_tokens: bool = False, preload: bool = False,
+               maxtasksperchild: Optional[int] = None):
+    """
+    Args:
+      dic_dir (Union[str, pathlib.Path]): 属性辞書の大本のディレクトリ
+      extend (bool): AttributionExtractor の extend オプション
+      ristrict (bool): AttributionExtractor の ristrict オプション
+      options (Optional[Sequence[ExtractionOption]]):
+        抽出に使うオプションの一覧(指定した場合は extend と ristrict を無視する)
+      processes (Optional[int]): ワーカプロセス数(None の場合は CPU のコア数)
+      chunksize (int): 1回の受け渡しでワーカへ送る文の数
+      parse_cache_path (Optional[Union[str, pathlib.Path]]):
+        係り受け解析結果のキャッシュファイル(None の場合はキャッシュしない)
+      prefilter (bool): AttributionExtractor の prefilter オプション
+      verify_rate (float): AttributionExtractor の verify_rate オプション
+      compact_tokens (bool): AttributionExtractor の compact_tokens オプション
+      preload (bool):
+        親プロセスで辞書を読み込んでからワーカを fork するか(fork が使える環境のみ)
+      maxtasksperchild (Optional[int]):
+        ワーカを作り直すまでに処理するタスクの数(None の場合は作り直さない)
+    """
+    if chunksize < 1:
+      raise ValueError('chunksize must be a positive integer.')
+
+    self._dic_dir   = str(dic_dir)
+    if options:
+      self._options = tuple(ExtractionOption(*option) for option in options)
+
+    else:
+      self._options = (ExtractionOption(extend, ristrict),)
+
+    self._processes = processes or multiprocessing.cpu_count()
+    self._chunksize = chunksize
+    self._parse_cache_path = parse_cache_path and str(parse_cache_path)
+    self._prefilter   = prefilter
+    self._verify_rate = verify_rate
+    self._compact_tokens = compact_tokens
+    self._preload     = preload
+    self._maxtasksperchild = maxtasksperchild
+    self._pool = None
+    self._stats_queue = None
+    self._worker_stats = []
+    self._respawned_stats = deque(maxlen=MAX_RESPAWNED_WORKER_STATS)
+    self._prefilter_counts = [0, 0, 0, 0]
+    self._is_opened = False
+    self._attrdict_handler = AttrDictHandler(dic_dir)
+
+  @property
+  def options(self) -> Tuple[ExtractionOption, ...]:
+    return self._options
+
+  @property
+  def processes(self) -> int:
+    return self._processes
+
+  @property
+  def chunksize(self) -> int:
+    return self._chunksize
+
+  @property
+  def preload(self) -> bool:
+    return self._preload
+
+  @property
+  def prefilter_stats(self) -> PrefilterStats:
+    """全てのワーカでの事前照合による絞り込みの状況の合計"""
+    return PrefilterStats(*self._prefilter_counts)
+
+  def ja2en(self, category: str) -> Dict[str, str]:
+    """categoryで抽出される属性名の日英変換辞書を返す
+
+    Args:
+      category (str): 商品カテゴリ
+
+    Returns:
+      商品カテゴリと共通の属性の和名に対応した英名を格納する辞書
+    """
+    ja2en = OrderedDict(self._attrdict_handler.ja2en(category))
+    ja2en.update(self._attrdict_handler.common_ja2en)
+    return ja2en
+
+  def __enter__(self):
+    self.open()
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def open(self) -> NoReturn:
+    """ワーカプロセスを起動する"""
+    if self._is_opened:
+      return
+
+    started_at = time.time()
+    self._worker_stats = []
+    self._respawned_stats.clear()
+    initargs = (self._dic_dir, self._parse_cache_path,
+                self._prefilter, self._verify_rate, self._compact_tokens)
+    context = _get_fork_context() if self.preload else None
+    if self.processes == 1:
+      # 1プロセスならプールを作らずにこのプロセス内で処理する
+      _initialize_worker(*initargs)
+      self._worker_stats.append(_measure_worker(started_at))
+
+    elif context is not None:
+      _preload_worker(*initargs)
+      self._stats_queue = context.Queue()
+      # 読み込んだオブジェクトを GC の走査対象から外し、
+      # ワーカで参照カウント以外のページへの書き込みが起きないようにする
+      gc.freeze()
+      try:
+        self._pool = context.Pool(
+            self.processes, initializer=_initialize_preloaded_worker,
+            initargs=(self._parse_cache_path, started_at, self._stats_queue),
+            maxtasksperchild=self._maxtasksperchild)
+
+      finally:
+        gc.unfreeze()
+
+    else:
+      self._stats_queue = multiprocessing.Queue()
+      self._pool = multiprocessing.Pool(
+          self.processes, initializer=_initialize_worker,
+          initargs=initargs + (started_at, self._stats_queue),
+          maxtasksperchild=self._maxtasksperchild)
+
+    self._is_opened = True
+
+  def close(self) -> NoReturn:
+    """ワーカプロセスを終了する"""
+    if self._pool is not None:
+      # 計測結果が残っているとワーカが終了時に書き込みを待ち続けることがあるため、先に読み出す
+      self._drain_worker_stats()
+      self._pool.close()
+      self._pool.join()
+      self._pool = None
+
+    if self._stats_queue is not None:
+      self._stats_queue.close()
+      self._stats_queue = None
+
+    self._is_opened = False
+
+  def worker_stats(
+      self, timeout: float = DEFAULT_STARTUP_TIMEOUT) -> Tuple[WorkerStats, ...]:
+    """ワーカプロセスごとの起動時間とメモリ使用量を返す
+
+    全てのワーカの初期化が終わるまで最大 timeout 秒待つ
+    プールが後から作り直したワーカの計測結果も、届いていれば直近の
+    MAX_RESPAWNED_WORKER_STATS 個まで末尾に加える
+
+    Args:
+      timeout (float): 待つ最大秒数
+
+    Returns:
+      初期化が終わった順に並んだ WorkerStats インスタンスのタプル
+    """
+    self.open()
+    deadline = time.time() + timeout
+    while (self._stats_queue is not None
+           and len(self._worker_stats) < self.processes):
+      try:
+        stats = self._stats_queue.get(timeout=max(deadline - time.time(), 0))
+
+      except queue.Empty:
+        break
+
+      self._worker_stats.append(stats)
+
+    self._drain_worker_stats()
+    return tuple(self._worker_stats) + tuple(self._respawned_stats)
+
+  def _drain_worker_stats(self) -> NoReturn:
+    """待たずに読み出せるワーカの計測結果を全て読み出すヘルパーメソッド
+
+    maxtasksperchild を指定した場合は作り直されたワーカが計測結果を送り続けるため、
+    worker_stats を呼ばなくてもパイプが詰まらないように、extract の途中でも読み出す
+    """
+    while self._stats_queue is not None:
+      try:
+        stats = self._stats_queue.get_nowait()
+
+      except queue.Empty:
+        break
+
+      if len(self._worker_stats) < self.processes:
+        self._worker_stats.append(stats)
+
+      else:
+        self._respawned_stats.append(stats)
+
+  def extract(self, work_items: Iterable[Tuple[int, int, str]],
+              category: str) -> Iterator[ExtractionOutput]:
+    """文ごとに属性を抽出する
+
+    Args:
+      work_items (Iterable[Tuple[int, int, str]]):
+        (review_id, sentence_id, sentence) の組の一覧
+      category (str): 商品カテゴリ
+
+    Yields:
+      入力順に並んだ ExtractionOutput インスタンス
+    """
+    # chunksize 文ずつまとめて渡し、ワーカ内で同じ文の解析を1回にする
+    tasks = ((category, self.options, batch)
+             for batch in _iter_batches(work_items, self.chunksize))
+    self.open()
+
+    if self._pool is None:
+      outputs_list = map(_extract_in_worker, tasks)
+
+    else:
+      # imap は入力順に結果を返すため、結果の順番は実行ごとに変わらない
+      outputs_list = self._pool.imap(_extract_in_worker, tasks)
+
+    for outputs, prefilter_stats in outputs_list:
+      self._drain_worker_stats()
+      self._prefilter_counts = [count + diff for count, diff
+                                in zip(self._prefilter_counts, prefilter_stats)]
+      yield from outputs
+
+
+# ワーカプロセス内で使い回す属性抽出器
+_worker_extractor = None  # type: AttributionExtractor
+
+def _initialize_worker(dic_dir: str, parse_cache_path: Optional[str],
+                       prefilter: bool, verify_rate: float,
+                       compact_tokens: bool,
+                       started_at: Optional[float] = None,
+                       stats_queue: Optional[multiprocessing.Queue] = None) -> NoReturn:
+  """ワーカプロセスの初期化を行うヘルパー関数
+
+  シングルトンはプロセスごとに存在するため、ここで係り受け解析器を生成しておく
+  キャッシュファイルへの接続もプロセス間で共有できないため、ワーカごとに開く
+  """
+  global _worker_extractor
+  CabochaParserSingleton.get_instance()
+  parse_cache = ParseCache(parse_cache_path) if parse_cache_path else None
+  _worker_extractor = AttributionExtractor(dic_dir, parse_cache=parse_cache,
+                                           prefilter=prefilter,
+                                           verify_rate=verify_rate,
+                                           compact_tokens=compact_tokens)
+  if stats_queue is not None:
+    stats_queue.put(_measure_worker(started_at))
+
+def _preload_worker(dic_dir: str, parse_cache_path: Optional[str],
+                    prefilter: bool, verify_rate: float,
+                    compact_tokens: bool) -> NoReturn:
+  """fork する前の親プロセスで、ワーカが使うオブジェクトを生成するヘルパー関数
+
+  生成した解析器はこのスレッドから返却しておき、ワーカではどのスレッドからでも使い回せるようにする
+  (プールは終了したワーカの代わりを別のスレッドから fork するため)
+  キャッシュファイルへの接続は fork 後に使えないため、ここでは開かない
+  """
+  global _worker_extractor
+  MecabTaggerSingleton.get_instance()
+  CabochaParserSingleton.get_instance()
+  _worker_extractor = AttributionExtractor(dic_dir, prefilter=prefilter,
+                                           verify_rate=verify_rate,
+                                           compact_tokens=compact_tokens)
+  MecabTaggerSingleton.release()
+  CabochaParserSingleton.release()
+
+def _initialize_preloaded_worker(parse_cache_path: Optional[str],
+                                 started_at: float,
+                                 stats_queue: multiprocessing.Queue) -> NoReturn:
+  """親プロセスから fork したワーカの初期化を行うヘルパー関数
+
+  プールの起動中に fork したワーカは GC の走査対象から外した状態を引き継ぐが、
+  後から作り直されたワーカは引き継がないため、ここで改めて走査対象から外す
+  """
+  respawned = gc.get_freeze_count() == 0
+  gc.freeze()
+  if parse_cache_path:
+    _worker_extractor.parse_cache = ParseCache(parse_cache_path)
+
+  stats_queue.put(_measure_worker(started_at)._replace(respawned=respawned))
+
+def _get_fork_context() -> Optional[multiprocessing.context.BaseContext]:
+  """fork でワーカを起動するコンテキストを返すヘルパー関数(使えない環境では None)"""
+  try:
+    return multiprocessing.get_context('fork')
+
+  except ValueError:
+    return None
+
+def _measure_worker(started_at: float) -> WorkerStats:
+  """呼び出したプロセスの起動時間とメモリ使用量を計測するヘルパー関数
+
+  メモリ使用量は /proc/self/smaps_rollup から読み込む(読み込めない環境では None とする)
+  """
+  memory_kb = dict()
+  try:
+    with open('/proc/self/smaps_rollup', encoding='ascii') as f:
+      for line in f:
+        key, _, value = line.partition(':')
+        if value.rstrip().endswith('kB'):
+          memory_kb[key] = int(value.split()[0])
+
+  except OSError:
+    pass
+
+  private_kb = None
+  if 'Private_Clean' in memory_kb and 'Private_Dirty' in memory_kb:
+    private_kb = memory_kb['Private_Clean'] + memory_kb['Private_Dirty']
+
+  return WorkerStats(os.getpid(), time.time() - started_at,
+                     memory_kb.get('Rss'), private_kb)
+
+def _extract_in_worker(
+    task: Tuple[str, Tuple[ExtractionOption, ...], Tuple[WorkItem, ...]]
+) -> Tuple[List[ExtractionOutput], PrefilterStats]:
+  """ワーカプロセス内でまとめて渡された文の属性抽出を行うヘルパー関数
+
+  抽出結果と共に、この呼び出しで増えた事前照合による絞り込みの件数を返す
+  """
+  category, options, items = task
+  _worker_extractor.category = category
+  before = _worker_extractor.prefilter_stats
+  result_dicts = _worker_extractor.extract_attributions_with_options(
+      [item.sentence for item in items], options)
+  prefilter_stats = PrefilterStats(
+      *(after - count for after, count
+        in zip(_worker_extractor.prefilter_stats, before)))
+  outputs = [ExtractionOutput(item.review_id, item.sentence_id, item.sentence,
+                              tuple(result_dict.values()))
+             for item, result_dict in zip(items, result_dicts)]
+  return outputs, prefilter_stats
+
+def _iter_batches(work_items: Iterable[Tuple[int, int, str]],
+                  batch_size: int) -> Iterator[Tuple[WorkItem, ...]]:
+  """work_items を batch_size 個ずつの WorkItem のタプルに分けるヘルパー関数"""
+  batch = []
+  for item in work_items:
+    batch.append(WorkItem(*item))
+    if len(batch) == batch_size:
+      yield tuple(batch)
+      batch = []
+
+  if batch:
+    yield tuple(batch)
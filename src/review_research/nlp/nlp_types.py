@@ -1,6 +1,8 @@
-from typing import NamedTuple, Tuple, Optional, Dict, List, Set
+from typing import NamedTuple, Tuple, Optional, Dict, List, Set, TYPE_CHECKING
 
-import CaboCha
+if TYPE_CHECKING:
+  # 型注釈にのみ使うため、実行時には読み込まない
+  import CaboCha
 
 from ..nlp import ONE_HIRAGANA_REGEX
 from ..nlp import HIRAGANAS_REGEX
@@ -67,6 +69,29 @@ class TokenFeature(NamedTuple):
     else:
       return token_feature
 
+  @classmethod
+  def from_feature_string(cls, feature: str):
+    """形態素解析器が出力する素性の文字列からTokenFeatureを作成
+
+    未知語などで素性の数が足りない場合は '*' で補い、多い場合は切り捨てる
+
+    Args:
+      feature (str): カンマ区切りの素性
+
+    Returns:
+      TokenFeatureインスタンス
+    """
+    features = feature.split(',')
+    num_missing = _NUM_TOKEN_FEATURE_FIELDS - len(features)
+    if num_missing > 0:
+      features.extend(_MISSING_FEATURES[:num_missing])
+
+    return cls._make(features[:_NUM_TOKEN_FEATURE_FIELDS])
+
+# 素性の数と、足りない素性を補うための値
+_NUM_TOKEN_FEATURE_FIELDS = len(TokenFeature._fields)
+_MISSING_FEATURES = ('*',) * _NUM_TOKEN_FEATURE_FIELDS
+
 class Token(NamedTuple):
   """形態素の情報
 
@@ -109,6 +134,19 @@ class Token(NamedTuple):
     token_feature = TokenFeature.from_result(*features)
     return cls(surface, *token_feature)
 
+  @classmethod
+  def from_mecab_node(cls, surface: str, feature: str):
+    """MeCabの形態素ノードの表層と素性からTokenを作成
+
+    Args:
+      surface (str): 形態素の表層
+      feature (str): カンマ区切りの素性
+
+    Returns:
+      Tokenインスタンス
+    """
+    return cls(surface, *TokenFeature.from_feature_string(feature))
+
 
 class TokenDetail(NamedTuple):
   """形態素情報の詳細
@@ -118,18 +156,17 @@ class TokenDetail(NamedTuple):
     normalized: 正規化後の形
     feature (TokenFeature): 表層形を除いた形態素情報
     named_entity (str): 固有表現
-    chunk (CaboCha.Chunk): 複合語内の単語
+    chunk (Optional[CaboCha.Chunk]): 複合語内の単語(キャッシュから復元した場合は None)
   """
   surface: str
   normalized: str
   feature: TokenFeature
   named_entity: str
-  chunk: CaboCha.Chunk
+  chunk: Optional['CaboCha.Chunk']
 
   @classmethod
-  def from_cabocha_token(cls, token: CaboCha.Token):
-    feature = token.feature
-    token_feature = TokenFeature.from_result(*feature.split(','))
+  def from_cabocha_token(cls, token: 'CaboCha.Token'):
+    token_feature = TokenFeature.from_feature_string(token.feature)
     if token_feature.base_form == '*':
       token_feature._replace(base_form=token.surface)
 
@@ -180,6 +217,32 @@ class WordRepr(NamedTuple):
       return WordRepr(token_detail.surface, base_form)
 
 
+class WordSpan(NamedTuple):
+  """単語と、その単語の文中での位置
+
+  Attributes:
+    word (WordRepr): 単語
+    start (int): 文中での単語の開始位置(文字単位)
+    end (int): 文中での単語の終了位置(文字単位、この位置の文字は含まない)
+  """
+  word: WordRepr
+  start: int
+  end: int
+
+class SentenceSpan(NamedTuple):
+  """文章中の1文とその位置
+
+  Attributes:
+    index (int): 文章中での文の出現順
+    start (int): 文章中での文の開始位置
+    end (int): 文章中での文の終了位置(この位置の文字は含まない)
+    text (str): 文(区切り文字を含み、前後の空白は含まない)
+  """
+  index: int
+  start: int
+  end: int
+  text: str
+
 class AttrName(NamedTuple):
   """属性名
 
@@ -237,7 +300,7 @@ class ChunkDetail(NamedTuple):
   features: Dict[str, str]
 
   @classmethod
-  def from_phrase_and_chunk(cls, phrase: str, chunk: CaboCha.Chunk):
+  def from_phrase_and_chunk(cls, phrase: str, chunk: 'CaboCha.Chunk'):
     feature_tuple = tuple(str(chunk.feature_list(i))
                           for i in range(chunk.feature_list_size))
 
@@ -270,6 +333,10 @@ class PhraseDetail(NamedTuple):
                            tokens: Tuple[TokenDetail, ...]):
     """CaboChaが解析した情報から、人間がわかりやすい文節情報を取り出す
 
+    主辞と機能語の範囲は、文節の素性に記録された表層と一致する形態素を探して決める
+    同じ表層の形態素が文節内に複数ある場合は範囲を誤ることがあるため、
+    通常は from_token_positions を使う
+
     Args:
       chunk_detail (ChunkDetail): 文節情報
       tokens (Tuple[TokenDetail, ...]): 文節内の形態素
@@ -289,7 +356,55 @@ class PhraseDetail(NamedTuple):
     func_tokens = _search_tokens_range(begin_func_surface,
                                        end_func_surface,
                                        tokens)
+    return cls._from_head_and_func_tokens(head_tokens, func_tokens,
+                                          chunk_feature)
+
+  @classmethod
+  def from_token_positions(cls, chunk_detail: ChunkDetail,
+                           tokens: Dict[int, TokenDetail]):
+    """CaboChaが解析した主辞と機能語の位置から、人間がわかりやすい文節情報を取り出す
+
+    主辞(head_begin)までを主辞の範囲、主辞の次から機能語(func_begin)までを機能語の範囲とする
+    各範囲の先頭は、文節の素性に記録された表層(主辞は RL、機能語は LF)と一致する
+    範囲内で最初の形態素とし、一致するものがなければ範囲の先頭のままとする
+    (文節の先頭にある接頭詞や記号などを主辞に含めないため)
+    表層の照合は範囲内に限るため、同じ表層が文節内の別の位置にあっても範囲を誤らない
+    機能語の位置が主辞の位置より後ろにない場合は、機能語はないものとする
+
+    Args:
+      chunk_detail (ChunkDetail): 文節情報
+      tokens (Dict[int, TokenDetail]): 文節内の形態素
+
+    Returns:
+      詳細な文節情報を格納したPhraseDetailインスタンス
+    """
+    token_list = list(tokens.values())
+    chunk_feature = chunk_detail.features
+    head_end = chunk_detail.head_begin + 1
+    func_end = chunk_detail.func_begin + 1
+    head_begin = _find_token_index(
+        token_list, chunk_feature.get(BEGIN_HEAD_SURFACE_MARK), 0, head_end)
+    func_begin = _find_token_index(
+        token_list, chunk_feature.get(BEGIN_FUNC_SURFACE_MARK), head_end, func_end)
+    head_tokens = token_list[head_begin:head_end]
+    func_tokens = token_list[func_begin:func_end]
+    return cls._from_head_and_func_tokens(head_tokens, func_tokens,
+                                          chunk_detail.features)
 
+  @classmethod
+  def _from_head_and_func_tokens(cls, head_tokens: List[TokenDetail],
+                                 func_tokens: List[TokenDetail],
+                                 chunk_feature: Dict[str, str]):
+    """主辞と機能語の形態素からインスタンスを生成するヘルパーメソッド
+
+    Args:
+      head_tokens (List[TokenDetail]): 主辞の範囲の形態素
+      func_tokens (List[TokenDetail]): 機能語の範囲の形態素
+      chunk_feature (Dict[str, str]): 節内の形態素の詳細
+
+    Returns:
+      PhraseDetailインスタンス
+    """
     head_words = []
     for token in head_tokens:
       is_one_hiragana = _is_a_hiragana(token)
@@ -306,11 +421,11 @@ class PhraseDetail(NamedTuple):
 
     else:
       # 主辞としたいものの周りに記号がある場合は、その記号を除去する
-      if head_tokens[0].feature.pos == '記号':
-        head_tokens.remove(head_tokens[0])
+      if head_tokens and head_tokens[0].feature.pos == '記号':
+        head_tokens = head_tokens[1:]
 
-      if head_tokens[-1].feature.pos == '記号':
-        head_tokens.remove(head_tokens[-1])
+      if head_tokens and head_tokens[-1].feature.pos == '記号':
+        head_tokens = head_tokens[:-1]
 
       # 形態素の表層をくっつけて文節の主辞とする
       head_surface = ''.join(t.surface for t in head_tokens)
@@ -370,7 +485,7 @@ class AttrExtractionInfo(NamedTuple):
     Returns:
       AttrExtractionInfoインスタンス
     """
-    return cls(attr_extraction_result.fragment,
+    return cls(attr_extraction_result.flagment,
                attr_extraction_result.candidate_terms,
                attr_extraction_result.hit_terms,
                attr_extraction_result.phrases,
@@ -436,6 +551,25 @@ def _search_tokens_range(
                      if i in range(begin_index, end_index+1)]
   return searched_tokens
 
+def _find_token_index(tokens: List[TokenDetail], surface: Optional[str],
+                      start: int, stop: int) -> int:
+  """start から stop の手前までで、表層が surface と一致する最初の形態素の位置を返す
+
+  Args:
+    tokens (List[TokenDetail]): 文節内の形態素
+    surface (Optional[str]): 探す表層
+    start (int): 探し始める位置
+    stop (int): 探し終える位置(この位置は含まない)
+
+  Returns:
+    一致した形態素の位置(見つからない場合は start)
+  """
+  for index in range(start, min(stop, len(tokens))):
+    if tokens[index].surface == surface:
+      return index
+
+  return start
+
 def _is_a_hiragana(token: TokenDetail):
   is_one_hiragana = ONE_HIRAGANA_REGEX.match(token.feature.base_form)
   hiraganas = HIRAGANAS_REGEX.match(token.feature.base_form)
@@ -4,10 +4,19 @@
 
 import re
 import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
 
 NUMBERS_REGEX = re.compile(r'\d+')
 NORMAL_FORMS = ('NFC', 'NFKC', 'NFD', 'NFKD')
 
+# 2個以上の句点、または改行とその前後の空白
+# (句点の連続は「。」1つに置き換え、改行とその前後の空白は取り除く)
+_FIX_TEXT_REGEX = re.compile(r'(?P<periods>。{2,})|\s*\n\s*')
+
+# 絵文字を取り除くための str.translate 用の変換表(初めて使う時に作成する)
+_emoji_deletion_table = None  # type: Optional[Dict[int, None]]
+
 def normalize(text: str):
   """与えられた文を正規化する  
   行う正規化は以下の通り
@@ -25,6 +34,99 @@ def normalize(text: str):
   # normalized_text = lower_text(normalize_number(normalize_unicode(text)))
   return normalized_text
 
+class TextCleaner:
+  """レビュー文の前処理をまとめて行う
+
+  行う処理は以下の通り(normalize_text と fix_text で切り替えられる)
+
+  - normalize_text: Unicode正規化(NFKC)と英大文字の英小文字への変換(normalize と同じ)
+  - fix_text: 絵文字の除去、「。」の連続の「。」1つへの置換、改行とその前後の空白の除去
+
+  絵文字の除去は変換表による str.translate で、句点と改行の処理は1つの正規表現で行う
+  cache_size に1以上を指定すると、処理結果を文をキーとして最大 cache_size 件保持し、
+  同じ文を再び処理する場合は保持した結果を返す(最も長く使われていないものから捨てる)
+
+  Usage:
+    >>> cleaner = TextCleaner(cache_size=1024)
+    >>> cleaner('ＡＢＣの画面がキレイ。。。\n電池も持つ😀')
+    'abcの画面がキレイ。電池も持つ'
+  """
+
+  def __init__(self, normalize_text: bool = True, fix_text: bool = True,
+               cache_size: int = 0):
+    """
+    Args:
+      normalize_text (bool): Unicode正規化と英小文字への変換を行うか
+      fix_text (bool): 絵文字・句点の連続・改行の処理を行うか
+      cache_size (int): 保持する処理結果の最大件数(0 なら保持しない)
+    """
+    if cache_size < 0:
+      raise ValueError('cache_size must be 0 or more.')
+
+    self._normalize_text = normalize_text
+    self._fix_text = fix_text
+    self._emoji_table = _get_emoji_deletion_table() if fix_text else None
+    self._cache_size = cache_size
+    self._cache = OrderedDict()  # type: OrderedDict[str, str]
+
+  def __call__(self, text: str) -> str:
+    """cleanメソッドの呼び出し"""
+    return self.clean(text)
+
+  def __len__(self) -> int:
+    return len(self._cache)
+
+  def clean(self, text: str) -> str:
+    """文の前処理を行う
+
+    Args:
+      text (str): 対象の文字列
+
+    Returns:
+      前処理後の文字列
+    """
+    if not self._cache_size:
+      return self._clean(text)
+
+    cache = self._cache
+    cleaned_text = cache.get(text)
+    if cleaned_text is not None:
+      cache.move_to_end(text)
+      return cleaned_text
+
+    cleaned_text = self._clean(text)
+    cache[text] = cleaned_text
+    if len(cache) > self._cache_size:
+      cache.popitem(last=False)
+
+    return cleaned_text
+
+  def _clean(self, text: str) -> str:
+    if self._normalize_text:
+      text = unicodedata.normalize('NFKC', text).lower()
+
+    if self._fix_text:
+      has_newline = '\n' in text
+      text = _FIX_TEXT_REGEX.sub(_replace_fix_text_match,
+                                 text.translate(self._emoji_table))
+      # 改行で区切られていた場合は、各行の前後の空白を除いてつなげた形にする
+      if has_newline:
+        text = text.strip()
+
+    return text
+
+
+def clean_text(text: str) -> str:
+  """TextCleaner の全ての前処理を行う(結果は保持しない)
+
+  Args:
+    text (str): 対象の文字列
+
+  Returns:
+    前処理後の文字列
+  """
+  return TextCleaner()(text)
+
 def lower_text(text: str):
   """英大文字を英子文字に変換する
 
@@ -81,4 +183,18 @@ def normalize_number(text: str):
     置換後の文字列
   """
   replaced_text = NUMBERS_REGEX.sub('0', text)
-  return replaced_text
\ No newline at end of file
+  return replaced_text
+
+
+def _get_emoji_deletion_table() -> Dict[int, None]:
+  """1文字の絵文字を取り除く str.translate 用の変換表を返す"""
+  global _emoji_deletion_table
+  if _emoji_deletion_table is None:
+    import emoji
+    _emoji_deletion_table = {ord(c): None for c in emoji.UNICODE_EMOJI
+                             if len(c) == 1}
+
+  return _emoji_deletion_table
+
+def _replace_fix_text_match(match) -> str:
+  return '。' if match.lastgroup == 'periods' else ''
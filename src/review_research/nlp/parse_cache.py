@@ -0,0 +1,321 @@
+import hashlib
+import multiprocessing.util
+import os
+import pathlib
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple, Optional, Union, NoReturn, Dict
+
+import CaboCha
+
+from ..nlp import NeologdDirectoryPathBuilder
+from ..nlp import TokenFeature
+from ..nlp import ChunkDetail
+from ..nlp import TokenDetail
+from ..nlp.analyze_dependency import AnalysisResult
+
+# キャッシュに保存する解析結果の最大件数のデフォルト値
+DEFAULT_MAX_ENTRIES = 1000000
+# 参照日時の更新をまとめて書き込むまでのヒット回数のデフォルト値
+DEFAULT_FLUSH_INTERVAL = 256
+
+_CREATE_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS parse_cache (
+  key TEXT PRIMARY KEY,
+  payload BLOB NOT NULL,
+  last_access INTEGER NOT NULL
+)
+'''
+_CREATE_INDEX_SQL = '''
+CREATE INDEX IF NOT EXISTS parse_cache_last_access
+ON parse_cache (last_access)
+'''
+# 保存件数は全プロセスで共有するため、ファイル内でトリガーによって数える
+_CREATE_META_SQL = '''
+CREATE TABLE IF NOT EXISTS parse_cache_meta (
+  id INTEGER PRIMARY KEY CHECK (id = 0),
+  entries INTEGER NOT NULL
+)
+'''
+_INITIALIZE_META_SQL = '''
+INSERT OR IGNORE INTO parse_cache_meta (id, entries)
+SELECT 0, COUNT(*) FROM parse_cache
+'''
+_CREATE_TRIGGER_SQLS = ('''
+CREATE TRIGGER IF NOT EXISTS parse_cache_insert AFTER INSERT ON parse_cache
+BEGIN
+  UPDATE parse_cache_meta SET entries = entries + 1 WHERE id = 0;
+END
+''', '''
+CREATE TRIGGER IF NOT EXISTS parse_cache_delete AFTER DELETE ON parse_cache
+BEGIN
+  UPDATE parse_cache_meta SET entries = entries - 1 WHERE id = 0;
+END
+''')
+
+class CacheStats(NamedTuple):
+  """キャッシュの利用状況
+
+  Attributes:
+    hits (int): キャッシュにヒットした回数
+    misses (int): キャッシュにヒットしなかった回数
+    entries (int): 保存されている解析結果の件数
+  """
+  hits: int
+  misses: int
+  entries: int
+
+  @property
+  def hit_rate(self) -> float:
+    total = self.hits + self.misses
+    return self.hits / total if total else 0.0
+
+
+class ParseCache:
+  """係り受け解析の結果をファイルに保存するキャッシュ
+
+  キーは解析対象の文、形態素解析辞書、CaboCha のバージョンを合わせたもののハッシュ値である
+  解析結果は CaboCha のオブジェクトを含まない形(タプルの組)に変換してから保存するため、
+  キャッシュから取り出した TokenDetail の chunk は None となる
+  保存件数が max_entries を超えた場合は、最も長く参照されていないものから削除する
+  参照日時はヒットのたびには書き込まず、flush_interval 回のヒットごと、保存時、close 時
+  (またはプロセスの終了時)にまとめて書き込む
+  保存件数と参照日時はファイル内で共有するため、複数プロセスから使っても削除の順番は変わらない
+
+  Usage:
+    >>> cache = ParseCache('parse_cache.sqlite3')
+    >>> analyzer = DependencyAnalyzer(cache=cache)
+    >>> analysis_result = analyzer.analyze(text)  # 2回目以降は CaboCha を呼ばない
+    >>> print(cache.stats)
+  """
+
+  def __init__(self, path: Union[str, pathlib.Path],
+               max_entries: int = DEFAULT_MAX_ENTRIES,
+               dictionary_version: Optional[str] = None,
+               parser_version: Optional[str] = None,
+               flush_interval: int = DEFAULT_FLUSH_INTERVAL):
+    """
+    Args:
+      path (Union[str, pathlib.Path]): キャッシュファイルのパス
+      max_entries (int): 保存する解析結果の最大件数
+      dictionary_version (Optional[str]):
+        形態素解析辞書のバージョン(None の場合は辞書ファイルの更新日時から決める)
+      parser_version (Optional[str]):
+        係り受け解析器のバージョン(None の場合は CaboCha.VERSION)
+      flush_interval (int): 参照日時の更新をまとめて書き込むまでのヒット回数
+    """
+    if max_entries < 1:
+      raise ValueError('max_entries must be a positive integer.')
+
+    if flush_interval < 1:
+      raise ValueError('flush_interval must be a positive integer.')
+
+    self.path = pathlib.Path(path)
+    self.max_entries = max_entries
+    self.dictionary_version = dictionary_version or _dictionary_version()
+    self.parser_version = parser_version or str(CaboCha.VERSION)
+    self.flush_interval = flush_interval
+
+    self._hits   = 0
+    self._misses = 0
+    self._lock = Lock()
+    self._last_access = 0
+    self._pending_access = dict()  # type: Dict[str, int]
+    self._pending_hits = 0
+    self._connection = sqlite3.connect(str(self.path), timeout=60,
+                                       check_same_thread=False)
+    # 複数プロセスから同時に読み書きできるようにする
+    self._connection.execute('PRAGMA journal_mode=WAL')
+    # 件数の初期化とトリガーの作成の間に他のプロセスが書き込まないようにする
+    self._connection.execute('BEGIN IMMEDIATE')
+    self._connection.execute(_CREATE_TABLE_SQL)
+    self._connection.execute(_CREATE_INDEX_SQL)
+    self._connection.execute(_CREATE_META_SQL)
+    self._connection.execute(_INITIALIZE_META_SQL)
+    for create_trigger_sql in _CREATE_TRIGGER_SQLS:
+      self._connection.execute(create_trigger_sql)
+
+    self._connection.commit()
+    # プールのワーカは atexit を呼ばずに終了するため、multiprocessing の終了処理で書き込む
+    self._finalizer = multiprocessing.util.Finalize(
+        self, _close_connection,
+        args=(self._connection, self._pending_access, self._lock),
+        exitpriority=0)
+
+  @property
+  def hits(self) -> int:
+    return self._hits
+
+  @property
+  def misses(self) -> int:
+    return self._misses
+
+  @property
+  def stats(self) -> CacheStats:
+    return CacheStats(self.hits, self.misses, len(self))
+
+  def __len__(self) -> int:
+    with self._lock:
+      return self._count()
+
+  def make_key(self, text: str) -> str:
+    """文に対応するキャッシュのキーを生成する
+
+    Args:
+      text (str): 解析対象の文(正規化済みのもの)
+
+    Returns:
+      キャッシュのキー
+    """
+    source = '\0'.join((self.dictionary_version, self.parser_version, text))
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+  def get(self, text: str) -> Optional[AnalysisResult]:
+    """キャッシュから解析結果を取り出す
+
+    Args:
+      text (str): 解析対象の文
+
+    Returns:
+      キャッシュに存在すれば AnalysisResult インスタンス、存在しなければ None
+    """
+    key = self.make_key(text)
+    with self._lock:
+      row = self._connection.execute(
+          'SELECT payload FROM parse_cache WHERE key = ?', (key,)).fetchone()
+      if row is None:
+        self._misses += 1
+        return None
+
+      self._hits += 1
+      self._pending_access[key] = self._next_access()
+      self._pending_hits += 1
+      if self._pending_hits >= self.flush_interval:
+        self._flush()
+
+    return _attach(pickle.loads(row[0]))
+
+  def put(self, text: str, analysis_result: AnalysisResult) -> NoReturn:
+    """解析結果をキャッシュに保存する
+
+    Args:
+      text (str): 解析対象の文
+      analysis_result (AnalysisResult): text の解析結果
+    """
+    key = self.make_key(text)
+    payload = pickle.dumps(_detach(analysis_result),
+                           protocol=pickle.HIGHEST_PROTOCOL)
+    with self._lock:
+      self._pending_access.pop(key, None)
+      last_access = self._next_access()
+      cursor = self._connection.execute(
+          'INSERT OR IGNORE INTO parse_cache VALUES (?, ?, ?)',
+          (key, payload, last_access))
+      if cursor.rowcount == 0:
+        self._connection.execute(
+            'UPDATE parse_cache SET payload = ?, last_access = ? WHERE key = ?',
+            (payload, last_access, key))
+
+      # 書き込みを行うため、ためておいた参照日時も同じトランザクションで書き込む
+      _write_access(self._connection, self._pending_access)
+      self._pending_hits = 0
+      self._evict()
+      self._connection.commit()
+
+  def flush(self) -> NoReturn:
+    """ためておいた参照日時の更新を書き込む"""
+    with self._lock:
+      if self._pending_access:
+        self._flush()
+
+  def clear(self) -> NoReturn:
+    """保存されている解析結果と利用状況をすべて消去する"""
+    with self._lock:
+      self._connection.execute('DELETE FROM parse_cache')
+      self._connection.commit()
+      self._pending_access.clear()
+      self._pending_hits = 0
+      self._hits   = 0
+      self._misses = 0
+
+  def close(self) -> NoReturn:
+    """ためておいた参照日時の更新を書き込んでから、キャッシュファイルを閉じる"""
+    self._finalizer()
+
+  def _flush(self) -> NoReturn:
+    _write_access(self._connection, self._pending_access)
+    self._connection.commit()
+    self._pending_hits = 0
+
+  def _count(self) -> int:
+    # 他のプロセスが書き込んだ分も含めて、トリガーで数えた件数を読む
+    return self._connection.execute(
+        'SELECT entries FROM parse_cache_meta WHERE id = 0').fetchone()[0]
+
+  def _next_access(self) -> int:
+    """参照日時(マイクロ秒)を返す(同じインスタンス内では必ず増加させる)"""
+    self._last_access = max(self._last_access + 1, int(time.time() * 1000000))
+    return self._last_access
+
+  def _evict(self) -> NoReturn:
+    """最大件数を超えた分だけ、最も長く参照されていない解析結果を削除する"""
+    overflow = self._count() - self.max_entries
+    if overflow > 0:
+      self._connection.execute(
+          'DELETE FROM parse_cache WHERE key IN '
+          '(SELECT key FROM parse_cache ORDER BY last_access LIMIT ?)',
+          (overflow,))
+
+
+# ヘルパー関数群
+def _dictionary_version() -> str:
+  """形態素解析辞書のパスと更新日時から辞書のバージョンを表す文字列を作る"""
+  neologd_path = pathlib.Path(NeologdDirectoryPathBuilder.get_path())
+  sys_dic = neologd_path / 'sys.dic'
+  try:
+    mtime = os.stat(str(sys_dic)).st_mtime_ns
+
+  except OSError:
+    mtime = 0
+
+  return '{}:{}'.format(neologd_path, mtime)
+
+def _write_access(connection: sqlite3.Connection,
+                  pending_access: Dict[str, int]) -> NoReturn:
+  """ためておいた参照日時の更新を書き込むヘルパー関数(コミットは呼び出し側で行う)"""
+  connection.executemany('UPDATE parse_cache SET last_access = ? WHERE key = ?',
+                         [(last_access, key)
+                          for key, last_access in pending_access.items()])
+  pending_access.clear()
+
+def _close_connection(connection: sqlite3.Connection,
+                      pending_access: Dict[str, int], lock: Lock) -> NoReturn:
+  """ためておいた参照日時の更新を書き込んでから接続を閉じるヘルパー関数"""
+  with lock:
+    if pending_access:
+      _write_access(connection, pending_access)
+      connection.commit()
+
+    connection.close()
+
+def _detach(analysis_result: AnalysisResult) -> tuple:
+  """CaboCha のオブジェクトを取り除いたタプルの組に変換する"""
+  chunk_dict, token_dict, tree = analysis_result
+  chunks = tuple(tuple(chunk_detail) for chunk_detail in chunk_dict.values())
+  tokens = tuple((token_detail.surface, token_detail.normalized,
+                  tuple(token_detail.feature), token_detail.named_entity)
+                 for token_detail in token_dict.values())
+  return (chunks, tokens, tree)
+
+def _attach(detached: tuple) -> AnalysisResult:
+  """_detach で変換したタプルの組を AnalysisResult に戻す"""
+  chunks, tokens, tree = detached
+  chunk_dict = OrderedDict(
+      (idx, ChunkDetail(*chunk)) for idx, chunk in enumerate(chunks))
+  token_dict = OrderedDict(
+      (idx, TokenDetail(surface, normalized, TokenFeature(*feature), ne, None))
+      for idx, (surface, normalized, feature, ne) in enumerate(tokens))
+  return AnalysisResult(chunk_dict, token_dict, tree)
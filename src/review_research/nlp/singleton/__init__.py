@@ -1,6 +1,27 @@
-from .stopword_dictionary_path import StopwordDictionaryPathBuilder
-from .neologd_directory_path import NeologdDirectoryPathBuilder
-from .mecab_tagger_singleton import MecabTaggerSingleton
-from .cabocha_parser_singleton import CabochaParserSingleton 
+import importlib
 
-__all__ = ['MecabTaggerSingleton', 'CabochaParserSingleton']
\ No newline at end of file
+# MeCab と CaboCha の一方しか使わない場合に、もう一方を読み込まないようにする(PEP 562)
+_LAZY_ATTRIBUTES = {
+    'StopwordDictionaryPathBuilder': '.stopword_dictionary_path',
+    'NeologdDirectoryPathBuilder': '.neologd_directory_path',
+    'MecabTaggerSingleton': '.mecab_tagger_singleton',
+    'CabochaParserSingleton': '.cabocha_parser_singleton',
+    'ThreadLocalProvider': '.thread_local_provider',
+}
+
+__all__ = ['MecabTaggerSingleton', 'CabochaParserSingleton', 'ThreadLocalProvider']
+
+def __getattr__(name: str):
+  try:
+    module_name = _LAZY_ATTRIBUTES[name]
+
+  except KeyError:
+    msg = 'module {!r} has no attribute {!r}'
+    raise AttributeError(msg.format(__name__, name)) from None
+
+  value = getattr(importlib.import_module(module_name, __name__), name)
+  globals()[name] = value
+  return value
+
+def __dir__():
+  return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
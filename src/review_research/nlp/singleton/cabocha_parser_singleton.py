@@ -1,19 +1,39 @@
 import sys
-from threading import Lock
+from typing import Optional
 
 import CaboCha
 
 from ..singleton import NeologdDirectoryPathBuilder
+from ..singleton import ThreadLocalProvider
+
+def _create_parser() -> CaboCha.Parser:
+  """NEologd 辞書を使う係り受け解析器を生成する(使えない場合は標準の辞書を使う)"""
+  neologd_path = NeologdDirectoryPathBuilder.get_path()
+  try:
+    arg = 'Ochasen -d {}'.format(neologd_path)
+    return CaboCha.Parser(arg)
+
+  except RuntimeError:
+    msg = 'Cannot use dictionary in "{}". So use default dictionary.'
+    print(msg.format(neologd_path), file=sys.stderr)
+    return CaboCha.Parser('Ochasen')
+
 
 class CabochaParserSingleton(object):
-  """係り受け解析器のシングルトンを有するクラス
+  """係り受け解析器をスレッドごとに1つだけ有するクラス
+
+  CaboCha.Parser は複数のスレッドから同時に使うことができないため、
+  スレッドごとに別のインスタンスを遅延生成して渡す
+  同じスレッドからは常に同じインスタンスが返される
+
+  Usage:
+    >>> parser = CabochaParserSingleton.get_instance()
 
-  複数Cabocha.Parserインスタンスを起動させると期待する出力をしない可能性があるため、  
-  シングルトンパターンによる実装を行った
+    同時に生成するインスタンスの数を制限する
+    >>> CabochaParserSingleton.set_max_instances(4)
   """
 
-  _cabocha_parser = None  # type: CaboCha.Parser
-  _lock = Lock()
+  _provider = ThreadLocalProvider(_create_parser)  # type: ThreadLocalProvider[CaboCha.Parser]
 
   def __new__(cls):
     raise NotImplementedError('Cannot initialize using constructor.')
@@ -24,18 +44,17 @@ class CabochaParserSingleton(object):
 
   @classmethod
   def get_instance(cls) -> CaboCha.Parser:
-    if not cls._cabocha_parser:
-      with cls._lock:
-        # わずかに前に初期化されている可能性があるため、ifブロックを追加
-        if not cls._cabocha_parser:
-          neologd_path = NeologdDirectoryPathBuilder.get_path()
-          try:
-            arg = 'Ochasen -d {}'.format(neologd_path)
-            cls._cabocha_parser = CaboCha.Parser(arg)
-
-          except RuntimeError:
-            msg = 'Cannot use dictionary in "{}". So use default dictionary.'
-            print(msg.format(neologd_path), file=sys.stderr)
-            cls._cabocha_parser = CaboCha.Parser('Ochasen')
-
-    return cls._cabocha_parser
+    return cls._provider.get_instance()
+
+  @classmethod
+  def release(cls):
+    """呼び出したスレッドの係り受け解析器を返却し、次に要求したスレッドで使い回せるようにする"""
+    cls._provider.release()
+
+  @classmethod
+  def set_max_instances(cls, max_instances: Optional[int]):
+    """同時に使われる係り受け解析器の最大数を設定する(None の場合は無制限)
+
+    上限に達している場合、新しいスレッドは他のスレッドが終了するまで待つ
+    """
+    cls._provider.max_instances = max_instances
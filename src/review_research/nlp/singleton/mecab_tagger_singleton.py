@@ -1,19 +1,39 @@
 import sys
-from threading import Lock
+from typing import Optional
 
 import MeCab
 
 from ..singleton import NeologdDirectoryPathBuilder
+from ..singleton import ThreadLocalProvider
+
+def _create_tagger() -> MeCab.Tagger:
+  """NEologd 辞書を使う形態素解析器を生成する(使えない場合は標準の辞書を使う)"""
+  neologd_path = NeologdDirectoryPathBuilder.get_path()
+  try:
+    arg = 'Ochasen -d {}'.format(neologd_path)
+    return MeCab.Tagger(arg)
+
+  except RuntimeError:
+    msg = 'Cannot use dictionary in "{}". So use default dictionary.'
+    print(msg.format(neologd_path), file=sys.stderr)
+    return MeCab.Tagger('Ochasen')
+
 
 class MecabTaggerSingleton(object):
-  """形態素解析器のシングルトンを有するクラス
+  """形態素解析器をスレッドごとに1つだけ有するクラス
+
+  MeCab.Tagger は複数のスレッドから同時に使うことができないため、
+  スレッドごとに別のインスタンスを遅延生成して渡す
+  同じスレッドからは常に同じインスタンスが返される
+
+  Usage:
+    >>> tagger = MecabTaggerSingleton.get_instance()
 
-  複数MeCab.Taggerインスタンスを起動させると期待する出力をしない可能性があるため、  
-  シングルトンパターンによる実装を行った
+    同時に生成するインスタンスの数を制限する
+    >>> MecabTaggerSingleton.set_max_instances(4)
   """
 
-  _mecab_tagger = None  # type: MeCab.Tagger
-  _lock = Lock()
+  _provider = ThreadLocalProvider(_create_tagger)  # type: ThreadLocalProvider[MeCab.Tagger]
 
   def __new__(cls):
     raise NotImplementedError('Cannot initialize using constructor.')
@@ -24,18 +44,17 @@ class MecabTaggerSingleton(object):
 
   @classmethod
   def get_instance(cls) -> MeCab.Tagger:
-    if not cls._mecab_tagger:
-      with cls._lock:
-        # わずかに前に初期化されている可能性があるため、ifブロックを追加
-        if not cls._mecab_tagger:
-          neologd_path = NeologdDirectoryPathBuilder.get_path()
-          try:
-            arg = 'Ochasen -d {}'.format(neologd_path)
-            cls._mecab_tagger = MeCab.Tagger(arg)
-
-          except RuntimeError:
-            msg = 'Cannot use dictionary in "{}". So use default dictionary.'
-            print(msg.format(neologd_path), file=sys.stderr)
-            cls._mecab_tagger = MeCab.Tagger('Ochasen')
-
-    return cls._mecab_tagger
+    return cls._provider.get_instance()
+
+  @classmethod
+  def release(cls):
+    """呼び出したスレッドの形態素解析器を返却し、次に要求したスレッドで使い回せるようにする"""
+    cls._provider.release()
+
+  @classmethod
+  def set_max_instances(cls, max_instances: Optional[int]):
+    """同時に使われる形態素解析器の最大数を設定する(None の場合は無制限)
+
+    上限に達している場合、新しいスレッドは他のスレッドが終了するまで待つ
+    """
+    cls._provider.max_instances = max_instances
@@ -0,0 +1,128 @@
+import threading
+import weakref
+from typing import Callable, Generic, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+class _Lease(object):
+  """スレッドが借りているインスタンス
+
+  スレッドローカルな領域にだけ置くため、スレッドが終了すると参照がなくなり、
+  finalizer によってインスタンスがプロバイダへ返却される
+  """
+  __slots__ = ('instance', 'finalizer', '__weakref__')
+
+  def __init__(self, instance):
+    self.instance = instance
+    self.finalizer = None  # type: Optional[weakref.finalize]
+
+
+class ThreadLocalProvider(Generic[T]):
+  """スレッドごとに別のインスタンスを渡すクラス
+
+  インスタンスは各スレッドで初めて要求された時点で factory から生成する
+  スレッドが終了する(または release を呼ぶ)と、そのインスタンスは破棄せずに保持しておき、
+  次に要求したスレッドへ渡す
+  max_instances を指定した場合、同時に貸し出すインスタンスの数がこれを超えないように、
+  新しいスレッドは他のスレッドがインスタンスを返却するまで待つ
+
+  Usage:
+    >>> provider = ThreadLocalProvider(lambda: MeCab.Tagger('Ochasen'), max_instances=8)
+    >>> tagger = provider.get_instance()  # 同じスレッドでは常に同じインスタンス
+  """
+
+  def __init__(self, factory: Callable[[], T],
+               max_instances: Optional[int] = None,
+               timeout: Optional[float] = None):
+    """
+    Args:
+      factory (Callable[[], T]): インスタンスを生成する関数
+      max_instances (Optional[int]): 同時に貸し出すインスタンスの最大数(None の場合は無制限)
+      timeout (Optional[float]): 返却を待つ最大秒数(None の場合は無期限に待つ)
+    """
+    self._factory = factory
+    self._local = threading.local()
+    self._condition = threading.Condition(threading.RLock())
+    self._idle = []  # type: List[T]
+    self._num_leased = 0
+    self._max_instances = None  # type: Optional[int]
+    self.max_instances = max_instances
+    self.timeout = timeout
+
+  @property
+  def max_instances(self) -> Optional[int]:
+    return self._max_instances
+
+  @max_instances.setter
+  def max_instances(self, max_instances: Optional[int]):
+    if max_instances is not None and max_instances < 1:
+      msg = 'max_instances must be positive or None, but got {}.'
+      raise ValueError(msg.format(max_instances))
+
+    with self._condition:
+      self._max_instances = max_instances
+      # 上限を下げた場合は、使われていないインスタンスを上限に収まるまで破棄する
+      if max_instances is not None:
+        num_kept = max(max_instances - self._num_leased, 0)
+        del self._idle[num_kept:]
+
+      self._condition.notify_all()
+
+  @property
+  def num_instances(self) -> int:
+    """生成済みのインスタンスの数(貸出中と返却済みの合計)"""
+    with self._condition:
+      return self._num_leased + len(self._idle)
+
+  def get_instance(self) -> T:
+    """呼び出したスレッドのインスタンスを返す
+
+    Raises:
+      RuntimeError: timeout 秒以内に他のスレッドからインスタンスが返却されなかった場合
+    """
+    lease = getattr(self._local, 'lease', None)
+    if lease is not None:
+      return lease.instance
+
+    with self._condition:
+      if not self._condition.wait_for(self._can_lease, self.timeout):
+        msg = 'No instance was released within {} seconds (max_instances={}).'
+        raise RuntimeError(msg.format(self.timeout, self._max_instances))
+
+      self._num_leased += 1
+      instance = self._idle.pop() if self._idle else None
+
+    if instance is None:
+      # 辞書の読み込みに時間がかかるため、生成はロックの外で行う
+      try:
+        instance = self._factory()
+
+      except BaseException:
+        with self._condition:
+          self._num_leased -= 1
+          self._condition.notify()
+
+        raise
+
+    lease = _Lease(instance)
+    lease.finalizer = weakref.finalize(lease, self._give_back, instance)
+    lease.finalizer.atexit = False
+    self._local.lease = lease
+    return instance
+
+  def release(self):
+    """呼び出したスレッドのインスタンスを返却する(借りていない場合は何もしない)"""
+    lease = self._local.__dict__.pop('lease', None)
+    if lease is not None:
+      lease.finalizer()
+
+  def _can_lease(self) -> bool:
+    return self._max_instances is None or self._num_leased < self._max_instances
+
+  def _give_back(self, instance: T):
+    with self._condition:
+      self._num_leased -= 1
+      if self._max_instances is None or self.num_instances < self._max_instances:
+        self._idle.append(instance)
+
+      self._condition.notify()
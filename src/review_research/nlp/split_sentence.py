@@ -1,8 +1,8 @@
 import re
 from collections import OrderedDict
-from typing import Dict, List
+from typing import Dict, List, Iterable, Iterator, Tuple
 
-REP_MARK = '<SENTENCE>'
+from ..nlp import SentenceSpan
 
 class Splitter(object):
   """文章分割を行う
@@ -14,6 +14,14 @@ class Splitter(object):
     
     分割は以下の呼び出しでも可能
     >>> result = splitter(sentence)
+
+    文の位置も取得する
+    >>> for index, start, end, text in splitter.split_spans(sentence):
+    ...   assert sentence[start:end] == text
+
+    複数の文章を順に分割する(文章ごとの辞書は作らない)
+    >>> for review_index, span in splitter.split_iter(reviews):
+    ...   print(review_index, span.index, span.text)
   """
     
   def __init__(self, pattern: str = r'。+\s*'):
@@ -44,26 +52,68 @@ class Splitter(object):
     Returns:
       文の出現順に文とその文を区切ったもの（空白の場合もある）を結合したものを格納した辞書
     """
-    text_list = self._sep_regex.split(sentence)
-    rep_text = sentence[:]
-    for s in text_list:
-      if s != '':
-        rep_text = rep_text.replace(s, REP_MARK, 1)
+    return OrderedDict((span.index, span.text)
+                       for span in self.split_spans(sentence))
 
-    separators = [sep for sep in rep_text.split(REP_MARK) if sep != '']
-    
-    # 区切り文字の数が文章中の文の数と対応付かない場合
-    if len(text_list) != len(separators):
-      diff = len(text_list) - len(separators)
-      for _ in range(diff):
-        separators.append('')
-
-    id_to_text = OrderedDict()
-    text_index = 0
-    for text, separator in zip(text_list, separators):
-      if text:
-        sentence = text + separator
-        id_to_text[text_index] = sentence.strip()
-        text_index += 1
-
-    return id_to_text
\ No newline at end of file
+  def split_spans(self, sentence: str) -> Iterator[SentenceSpan]:
+    """文章を先頭から1度だけ走査して一文毎に区切る
+
+    各文は文とその文を区切ったものを結合し、前後の空白を除いたものとする
+
+    Args:
+      sentence (str): 文章
+
+    Yields:
+      文の出現順に SentenceSpan インスタンス
+    """
+    index = 0
+    begin = 0
+    for match in self._sep_regex.finditer(sentence):
+      # 区切りの前に文がない場合は、区切りだけを文とはしない
+      if match.start() > begin:
+        yield _make_span(sentence, index, begin, match.end())
+        index += 1
+
+      begin = match.end()
+
+    if begin < len(sentence):
+      yield _make_span(sentence, index, begin, len(sentence))
+
+  def split_iter(self,
+      sentences: Iterable[str]) -> Iterator[Tuple[int, SentenceSpan]]:
+    """複数の文章を順に一文毎に区切る
+
+    文章を1つずつ読み込んで区切るため、大量の文章もそのまま流し込める
+
+    Args:
+      sentences (Iterable[str]): 文章の一覧(イテレータでもよい)
+
+    Yields:
+      (文章の出現順, SentenceSpan インスタンス) の組
+    """
+    for sentence_index, sentence in enumerate(sentences):
+      for span in self.split_spans(sentence):
+        yield sentence_index, span
+
+
+def _make_span(sentence: str, index: int, begin: int, end: int) -> SentenceSpan:
+  """文章中の begin から end までを、前後の空白を除いた SentenceSpan にする
+
+  Args:
+    sentence (str): 文章
+    index (int): 文の出現順
+    begin (int): 文の開始位置(空白を含む)
+    end (int): 文の終了位置(空白を含む)
+
+  Returns:
+    SentenceSpanインスタンス
+  """
+  part = sentence[begin:end]
+  stripped = part.strip()
+  if stripped:
+    begin += len(part) - len(part.lstrip())
+
+  else:
+    begin = end
+
+  return SentenceSpan(index, begin, begin + len(stripped), stripped)
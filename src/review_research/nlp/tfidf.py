@@ -1,8 +1,12 @@
+import hashlib
 import json
-import math
+import operator
+from array import array
+from collections.abc import Mapping
 from pathlib import Path
 from pprint import pprint
 from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
 import pandas
 import numpy as np
@@ -12,98 +16,561 @@ from ..nlp import normalize
 from ..nlp import TextAlignment
 
 COLUMNS = ['word', 'tfidf']
+# 文書ごとの TF-IDF 上位の単語を保存するファイル名
+TOP_K_INDEX_NAME = 'tfidf_top_k.json'
+DEFAULT_TOP_K = 10
+# 書き出し時に1度に扱う行(または単語)の数
+DEFAULT_EXPORT_CHUNK_SIZE = 1024
+DEFAULT_EXPORT_MAX_CELLS = 1 << 20
+
+class CSRMatrix(NamedTuple):
+  """CSR 形式の疎行列
+
+  scipy を使う場合は scipy.sparse.csr_matrix((data, indices, indptr), shape)
+  でそのまま変換できる
+
+  Attributes:
+    data (np.ndarray): 非ゼロ要素の値
+    indices (np.ndarray): 非ゼロ要素の列番号
+    indptr (np.ndarray): 各行の非ゼロ要素が data 中で始まる位置(末尾は要素数)
+    shape (Tuple[int, int]): 行列の形 (行数, 列数)
+  """
+  data: np.ndarray
+  indices: np.ndarray
+  indptr: np.ndarray
+  shape: Tuple[int, int]
+
+  def row(self, row_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """row_id 行目の非ゼロ要素の (列番号, 値) を返す"""
+    begin, end = self.indptr[row_id], self.indptr[row_id+1]
+    return self.indices[begin:end], self.data[begin:end]
+
+
+class TermScore(NamedTuple):
+  """単語とその TF-IDF
+
+  Attributes:
+    word (str): 単語
+    score (float): TF-IDF
+  """
+  word: str
+  score: float
+
 
 class TFIDF:
+  """文書ごとの単語の TF-IDF を計算する
 
-  def __init__(self):
-    self._ta        = TextAlignment()
-    self.word_dict  = OrderedDict()
-    self.df_dict    = OrderedDict()
-    self.idf_dict   = OrderedDict()
-    self.tfidf_dict = OrderedDict()
-    self.N          = 0
+  文書中の単語の出現回数を語彙の番号を列とする CSR 形式の疎行列として保持し、
+  IDF と TF-IDF はまとめて配列演算で求める
+  TF は文書中の単語の出現回数を文書中の全単語数で割ったもの(L1 正規化)、
+  IDF は log(文書数 / 文書頻度) + 1 とする
+
+  tfidf_dict などの文書ごとの辞書や DataFrame は、参照された時点で作成する
+
+  partial_fit で文書を追加すると、追加した文書の行と IDF だけを更新する
+  語彙・文書頻度・各文書の TF は save で保存し、load で読み込める
+
+  Usage:
+    >>> tfidf = TFIDF()
+    >>> tfidf_dict = tfidf.compute(doc_list)
+    >>> tfidf_dict[0]  # 0番目の文書の全語彙の TF-IDF(DataFrame)
+    >>> tfidf.matrix   # 全文書の TF-IDF(CSRMatrix)
 
+    文書ごとの TF-IDF 上位の単語のみを取り出す
+    >>> tfidf.top_k(0, k=5)
+    >>> tfidf.save_top_k_index('tfidf_top_k.json', k=5)
+
+    新しい文書を追加して保存し直す
+    >>> tfidf = TFIDF.load('tfidf_state.npz')
+    >>> new_doc_ids = tfidf.partial_fit(new_doc_list)
+    >>> tfidf.save('tfidf_state.npz')
+  """
+
+  def __init__(self):
+    self._ta = TextAlignment()
     self._text_dict      = OrderedDict()
     self._alignment_dict = OrderedDict()
+    self._reset()
 
+  def _reset(self):
+    self._vocabulary = dict()  # type: Dict[str, int]
+    self._words      = []      # type: List[str]
+    self._df         = array('q')
+    self._indptr     = array('q', [0])
+    self._indices    = array('q')
+    self._tf         = array('d')
+    self._text_dict.clear()
+    self._alignment_dict.clear()
+    self._invalidate()
+
+  def _invalidate(self):
+    # 文書を追加した場合は、配列演算の結果を作り直す
+    self._idf    = None
+    self._matrix = None
+
+  @property
+  def N(self) -> int:
+    """文書数"""
+    return len(self._indptr) - 1
 
   @property
   def alignment_dict(self) -> OrderedDict:
     return self._alignment_dict
-  
+
+  @property
+  def vocabulary(self) -> Dict[str, int]:
+    """単語と列番号の対応"""
+    return self._vocabulary
+
+  @property
+  def df_dict(self) -> OrderedDict:
+    """単語ごとの文書頻度(語彙の出現順)"""
+    return OrderedDict(zip(self._words, self._df))
+
+  @property
+  def idf_dict(self) -> OrderedDict:
+    """単語ごとの IDF(語彙の出現順)"""
+    return OrderedDict(zip(self._words, self.idf.tolist()))
+
+  @property
+  def idf(self) -> np.ndarray:
+    """列番号順に並べた IDF"""
+    if self._idf is None:
+      df = np.array(self._df, dtype=float)
+      self._idf = np.log(self.N / df) + 1
+
+    return self._idf
+
+  @property
+  def matrix(self) -> CSRMatrix:
+    """全文書の TF-IDF を格納した疎行列(行は文書、列は語彙)"""
+    if self._matrix is None:
+      indptr = np.array(self._indptr, dtype=np.int64)
+      indices = np.array(self._indices, dtype=np.int64)
+      data = np.array(self._tf, dtype=float) * self.idf[indices]
+      shape = (self.N, len(self._words))
+      self._matrix = CSRMatrix(data, indices, indptr, shape)
+
+    return self._matrix
+
+  @property
+  def word_dict(self) -> Mapping:
+    """文書ごとの単語の TF を格納した辞書(参照時に作成する)"""
+    return _LazyRowDict(self.N, self._tf_dict)
+
+  @property
+  def tfidf_dict(self) -> Mapping:
+    """文書ごとの全語彙の TF-IDF を格納した DataFrame の辞書(参照時に作成する)"""
+    return _LazyRowDict(self.N, self._tfidf_frame)
+
+  @property
+  def sorted_tfidf_dict(self) -> Mapping:
+    """tfidf_dict の DataFrame を TF-IDF の降順に並べたものの辞書"""
+    sort = lambda doc_id: self._tfidf_frame(doc_id).sort_values(
+        COLUMNS[1], ascending=False)
+    return _LazyRowDict(self.N, sort)
+
   def compute(self, doc_list: list, sort=False):
-    # tfとdfの計算
-    # print('calculate tf and df...')
-    for idx, doc in enumerate(doc_list):
-      tf_dict = self._compute_tf(normalize(doc))
-      self._alignment_dict[idx] = self._ta.alignment
-      self._text_dict[idx]      = self._ta.text
-      # pprint(self.correspond_words_dict)
-      self.word_dict[idx] = tf_dict
-
-      for w in tf_dict:
-        if w in self.df_dict:
-          self.df_dict[w] += 1
-
-        else:
-          self.df_dict[w] = 1
-
-    # idfの計算
-    self.N = len(doc_list)
-    for w, df in self.df_dict.items():
-      self.idf_dict[w] = math.log(self.N / df) + 1
-
-    # tfidfの計算
-    self.sorted_tfidf_dict = OrderedDict()
-    for idx in range(self.N):
-      target_tf_dict = self.word_dict[idx]
-      tfidf = [idf * target_tf_dict[w] if w in target_tf_dict else 0
-               for i, (w, idf) in enumerate(self.idf_dict.items())]
-      tfidf = np.array(tfidf)
-      tfidf_list = np.array([[*self.df_dict], tfidf]).T
-
-      tfidf_df = pandas.DataFrame(tfidf_list, columns=COLUMNS)
-      tfidf_df = tfidf_df.astype({'tfidf': float})
-      self.tfidf_dict[idx] = tfidf_df
-      self.sorted_tfidf_dict[idx] = tfidf_df.sort_values(COLUMNS[1],
-                                                         ascending=False)
+    """文書の一覧から TF-IDF を計算する
+
+    Args:
+      doc_list (list): 文書の一覧
+      sort (bool): TF-IDF の降順に並べた DataFrame を返すか
 
+    Returns:
+      文書の出現順をキーとして、全語彙の TF-IDF を格納した DataFrame の辞書
+    """
+    self._reset()
+    self.partial_fit(doc_list)
     if sort:
       return self.sorted_tfidf_dict
 
     else:
       return self.tfidf_dict
-      
-
-  def to_csv(self, out_file, code='utf-8'):
-    text_list = []
-    header = ['review_index']
-    header.extend([*self.df_dict.keys()])
-    text_list.append(header)
-    for idx, df in self.tfidf_dict.items():
-      content = [idx]
-      content.extend(df[COLUMNS[1]].values.tolist())
-      text_list.append(content)
-
-    text_array = np.array(text_list).T
+
+  def top_k(self, doc_id: int, k: int = DEFAULT_TOP_K) -> List[TermScore]:
+    """doc_id 番目の文書で TF-IDF が大きい単語を k 個返す
+
+    文書中に現れた単語だけから部分選択で上位を選び、その k 個だけを並べ替える
+
+    Args:
+      doc_id (int): 文書の番号
+      k (int): 取り出す単語の数
+
+    Returns:
+      TF-IDF の降順(同じ値なら語彙の出現順)に並んだ TermScore のリスト
+    """
+    if not 0 <= doc_id < self.N:
+      raise IndexError('doc_id {} is out of range.'.format(doc_id))
+
+    indices, values = _select_top_k(*self._tfidf_row(doc_id), k)
+    return [TermScore(self._words[i], v)
+            for i, v in zip(indices.tolist(), values.tolist())]
+
+  def save_top_k_index(self, path, k: int = DEFAULT_TOP_K,
+                       doc_keys: Optional[Sequence[str]] = None):
+    """全文書の TF-IDF 上位 k 個の単語を JSON 形式で保存する
+
+    保存したファイルは load_top_k_index で読み込めるため、
+    上位の単語だけを使う場合は TF-IDF 全体を読み込む必要がない
+    文書数と doc_keys も保存し、読み込む側で同じ文書の一覧から作られたかを確かめられるようにする
+
+    Args:
+      path: 保存先のファイルパス
+      k (int): 文書ごとに保存する単語の数
+      doc_keys (Optional[Sequence[str]]):
+        文書の出現順に並んだ、文書を識別する文字列(document_key で作成したものなど)
+
+    Raises:
+      ValueError: doc_keys の数が文書数と一致しない場合に発生
+    """
+    if doc_keys is not None and len(doc_keys) != self.N:
+      msg = 'doc_keys has {} keys, but there are {} documents.'
+      raise ValueError(msg.format(len(doc_keys), self.N))
+
+    matrix = self.matrix
+    documents = []
+    for doc_id in range(self.N):
+      indices, values = _select_top_k(*matrix.row(doc_id), k)
+      documents.append([[self._words[i], v]
+                        for i, v in zip(indices.tolist(), values.tolist())])
+
+    with open(path, mode='w', encoding='utf-8') as fp:
+      json.dump({'k': k, 'num_documents': self.N,
+                 'doc_keys': None if doc_keys is None else list(doc_keys),
+                 'documents': documents}, fp, ensure_ascii=False)
+
+  def partial_fit(self, doc_list: Iterable[str]) -> range:
+    """これまでの文書を保持したまま文書を追加する
+
+    追加した文書の行を作成し、文書頻度を更新する
+    既存の文書の TF はそのまま使い、IDF は次に参照された時点でまとめて計算し直す
+
+    Args:
+      doc_list (Iterable[str]): 追加する文書の一覧
+
+    Returns:
+      追加した文書の番号
+    """
+    begin = self.N
+    for doc in doc_list:
+      self._add_document(doc)
+
+    return range(begin, self.N)
+
+  def save(self, path):
+    """語彙・文書頻度・各文書の TF を NumPy の npz 形式で保存する
+
+    文書の本文と対応付けの結果(alignment_dict)は保存しない
+
+    Args:
+      path: 保存先のファイルパス(拡張子 .npz がない場合は付加される)
+    """
+    np.savez(path,
+             words=np.array(self._words, dtype=str),
+             df=np.array(self._df, dtype=np.int64),
+             indptr=np.array(self._indptr, dtype=np.int64),
+             indices=np.array(self._indices, dtype=np.int64),
+             tf=np.array(self._tf, dtype=float))
+
+  @classmethod
+  def load(cls, path) -> 'TFIDF':
+    """save で保存した状態を読み込む
+
+    Args:
+      path: save で保存したファイルパス
+
+    Returns:
+      TFIDFインスタンス
+    """
+    this = cls()
+    with np.load(path) as state:
+      this._words = state['words'].tolist()
+      this._vocabulary = {word: word_id
+                          for word_id, word in enumerate(this._words)}
+      this._df = array('q', state['df'].tolist())
+      this._indptr = array('q', state['indptr'].tolist())
+      this._indices = array('q', state['indices'].tolist())
+      this._tf = array('d', state['tf'].tolist())
+
+    return this
+
+  def to_csv(self, out_file, code='utf-8',
+             max_cells: int = DEFAULT_EXPORT_MAX_CELLS):
+    """全文書の TF-IDF を CSV 形式で書き出す
+
+    1行目は review_index と文書の番号、2行目以降は単語ごとの全文書の TF-IDF とする
+    疎行列を単語(列)ごとに並べ直し、要素数が max_cells を超えない語数ずつ
+    密な行列に展開して書き出す(文書数が max_cells 以上なら1語ずつ展開する)
+
+    Args:
+      out_file: 書き出し先のファイルパス
+      code (str): 文字コード
+      max_cells (int): 1度に展開する密な行列の要素数の上限
+    """
+    indptr = np.array(self._indptr, dtype=np.int64)
+    indices = np.array(self._indices, dtype=np.int64)
+    values = np.array(self._tf, dtype=float) * self.idf[indices]
+    doc_ids = np.repeat(np.arange(self.N), np.diff(indptr))
+    # 列番号で安定ソートした順序と、列ごとの開始位置
+    order = np.argsort(indices, kind='stable')
+    column_counts = np.bincount(indices, minlength=len(self._words))
+    column_ptr = np.concatenate(([0], np.cumsum(column_counts)))
+
     with open(out_file, mode='w', encoding=code) as fp:
-      for text in text_array:
-        fp.write('{}\n'.format(','.join(str(t) for t in text)))
-  
-  def _compute_tf(self, text: str) -> np.ndarray:
-    self._ta.align(text)
-    result_list = [w.word for w in self._ta.words]
-    word_count_list = np.array([[w, result_list.count(w)]
-                                for w in set(result_list)])
+      header = ['review_index', *(str(i) for i in range(self.N))]
+      fp.write('{}\n'.format(','.join(header)))
+      # 1行は文書数分の要素を持つため、展開する語数は文書数から決める
+      num_rows = max(1, max_cells // max(1, self.N))
+      for begin in range(0, len(self._words), num_rows):
+        end = min(begin + num_rows, len(self._words))
+        entries = order[column_ptr[begin]:column_ptr[end]]
+        block = np.zeros((end - begin, self.N))
+        block[indices[entries] - begin, doc_ids[entries]] = values[entries]
+        for word, row in zip(self._words[begin:end], block.tolist()):
+          fp.write('{}\n'.format(','.join([word, *(str(v) for v in row)])))
+
+  def to_npz(self, path):
+    """全文書の TF-IDF を疎行列のまま npz 形式で書き出す
+
+    scipy.sparse.save_npz と同じ形式のため scipy.sparse.load_npz で読み込める
+    語彙は列番号順に words として格納する
+
+    Args:
+      path: 書き出し先のファイルパス(拡張子 .npz がない場合は付加される)
+    """
+    matrix = self.matrix
+    np.savez(path, data=matrix.data, indices=matrix.indices,
+             indptr=matrix.indptr, shape=np.array(matrix.shape),
+             format=np.array(b'csr'), words=np.array(self._words, dtype=str))
+
+  def to_mtx(self, path, chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE):
+    """全文書の TF-IDF を Matrix Market の座標形式で書き出す
+
+    行は文書、列は語彙の出現順(どちらも1始まり)とし、chunk_size 文書ずつ書き出す
+
+    Args:
+      path: 書き出し先のファイルパス
+      chunk_size (int): 1度に書き出す文書の数
+    """
+    with open(path, mode='w', encoding='utf-8') as fp:
+      fp.write('%%MatrixMarket matrix coordinate real general\n')
+      fp.write('{} {} {}\n'.format(self.N, len(self._words), len(self._indices)))
+      for begin, indptr, indices, data in self._iter_row_blocks(chunk_size):
+        doc_ids = begin + np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        np.savetxt(fp, np.column_stack((doc_ids + 1, indices + 1, data)),
+                   fmt=['%d', '%d', '%.17g'])
+
+  def to_parquet(self, path, chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE):
+    """全文書の TF-IDF の非ゼロ要素を列指向の Parquet 形式で書き出す
+
+    review_index, word, tfidf の3列の表とし、chunk_size 文書ごとに
+    1つの row group として書き出す(pyarrow が必要)
+
+    Args:
+      path: 書き出し先のファイルパス
+      chunk_size (int): 1つの row group に含める文書の数
+
+    Raises:
+      ImportError: pyarrow がインストールされていない場合に発生
+    """
+    try:
+      import pyarrow
+      import pyarrow.parquet
+
+    except ImportError as e:
+      raise ImportError('to_parquet requires pyarrow.') from e
+
+    schema = pyarrow.schema([('review_index', pyarrow.int64()),
+                             ('word', pyarrow.string()),
+                             ('tfidf', pyarrow.float64())])
+    with pyarrow.parquet.ParquetWriter(str(path), schema) as writer:
+      for begin, indptr, indices, data in self._iter_row_blocks(chunk_size):
+        doc_ids = begin + np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        words = [self._words[i] for i in indices.tolist()]
+        writer.write_table(pyarrow.table(
+            {'review_index': doc_ids, 'word': words, 'tfidf': data},
+            schema=schema))
+
+  def _iter_row_blocks(self, chunk_size: int
+                       ) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+    """chunk_size 文書ずつ TF-IDF の疎行列の行を取り出す
+
+    全体の疎行列は作らず、取り出す行の TF にだけ IDF を掛ける
+
+    Yields:
+      (先頭の文書の番号, indptr, indices, data) の組(indptr は 0 始まりに直したもの)
+    """
+    idf = self.idf
+    for begin in range(0, self.N, chunk_size):
+      end = min(begin + chunk_size, self.N)
+      indptr = np.array(self._indptr[begin:end+1], dtype=np.int64)
+      first, last = indptr[0], indptr[-1]
+      indices = np.array(self._indices[first:last], dtype=np.int64)
+      data = np.array(self._tf[first:last], dtype=float) * idf[indices]
+      yield begin, indptr - first, indices, data
+
+  def _add_document(self, doc: str):
+    """文書の単語の出現回数を疎行列の1行として追加する"""
+    doc_id = self.N
+    self._ta.align(normalize(doc))
+    self._alignment_dict[doc_id] = self._ta.alignment
+    self._text_dict[doc_id]      = self._ta.text
+
+    counts = dict()
+    for w in self._ta.words:
+      counts[w.base_form] = counts.get(w.base_form, 0) + 1
+
+    total = float(sum(counts.values()))
+    for word, count in counts.items():
+      word_id = self._vocabulary.get(word)
+      if word_id is None:
+        word_id = len(self._words)
+        self._vocabulary[word] = word_id
+        self._words.append(word)
+        self._df.append(0)
+
+      self._df[word_id] += 1
+      self._indices.append(word_id)
+      self._tf.append(count / total)
+
+    self._indptr.append(len(self._indices))
+    self._invalidate()
+
+  def _tf_dict(self, doc_id: int) -> OrderedDict:
+    begin, end = self._indptr[doc_id], self._indptr[doc_id+1]
+    return OrderedDict((self._words[self._indices[i]], self._tf[i])
+                       for i in range(begin, end))
+
+  def _tfidf_row(self, doc_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """doc_id 番目の文書の非ゼロ要素の (列番号, TF-IDF) を返す
+
+    全体の疎行列は作らず、その文書の TF に IDF を掛ける
+    """
+    if self._matrix is not None:
+      return self._matrix.row(doc_id)
+
+    begin, end = self._indptr[doc_id], self._indptr[doc_id+1]
+    indices = np.array(self._indices[begin:end], dtype=np.int64)
+    tf = np.array(self._tf[begin:end], dtype=float)
+    return indices, tf * self.idf[indices]
+
+  def _tfidf_frame(self, doc_id: int) -> pandas.DataFrame:
+    indices, values = self._tfidf_row(doc_id)
+    tfidf = np.zeros(len(self._words))
+    tfidf[indices] = values
+    return pandas.DataFrame({COLUMNS[0]: self._words, COLUMNS[1]: tfidf},
+                            columns=COLUMNS)
 
-    word_list = word_count_list[:, 0]
-    count_list = np.array(word_count_list[:, 1], dtype=float)
-    tf = count_list / np.sum(count_list)
-    tf_dict = OrderedDict()
-    for w, tf in zip(word_list, tf):
-      tf_dict[w] = tf
 
-    return tf_dict
+class _LazyRowDict(Mapping):
+  """文書の番号をキーとし、参照された時点で値を作成する読み取り専用の辞書"""
+
+  def __init__(self, num_rows: int, make_value: Callable):
+    self._num_rows = num_rows
+    self._make_value = make_value
+
+  def __len__(self) -> int:
+    return self._num_rows
+
+  def __iter__(self) -> Iterator[int]:
+    return iter(range(self._num_rows))
+
+  def __getitem__(self, row_id: int):
+    # np.int64 などの整数型のキーも int のキーと同じように扱う
+    try:
+      index = operator.index(row_id)
+
+    except TypeError:
+      raise KeyError(row_id) from None
+
+    if not 0 <= index < self._num_rows:
+      raise KeyError(row_id)
+
+    return self._make_value(index)
+
+
+def document_key(text: str) -> str:
+  """文書を識別するための文字列(本文の SHA-1 の先頭16文字)を返す
+
+  Args:
+    text (str): 文書
+
+  Returns:
+    文書を識別する文字列
+  """
+  return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+def load_top_k_index(
+    path, doc_keys: Optional[Sequence[str]] = None, k: Optional[int] = None
+) -> Tuple[Tuple[TermScore, ...], ...]:
+  """TFIDF.save_top_k_index で保存したファイルを読み込む
+
+  doc_keys を指定した場合は、ファイルが同じ文書の一覧から作られたかを確かめる
+  (文書数が一致しない場合と、保存された doc_keys と一致しない場合はエラーとする)
+  k を指定した場合は、保存時の k と一致するかも確かめる
+
+  Args:
+    path: save_top_k_index で保存したファイルパス
+    doc_keys (Optional[Sequence[str]]): 文書の出現順に並んだ、文書を識別する文字列
+    k (Optional[int]): 文書ごとに保存されているはずの単語の数
+
+  Returns:
+    文書の出現順に、TF-IDF 上位の TermScore を格納したタプル
+
+  Raises:
+    ValueError: ファイルの文書と doc_keys、または保存時の k と k が一致しない場合に発生
+  """
+  with open(path, mode='r', encoding='utf-8') as fp:
+    index = json.load(fp)
+
+  if k is not None and index.get('k') != k:
+    msg = '{} was saved with k={}, but k={} was given.'
+    raise ValueError(msg.format(path, index.get('k'), k))
+
+  num_documents = index.get('num_documents', len(index['documents']))
+  if num_documents != len(index['documents']):
+    msg = '{} has {} documents, but {} were saved.'
+    raise ValueError(msg.format(path, len(index['documents']), num_documents))
+
+  if doc_keys is not None:
+    if len(doc_keys) != num_documents:
+      msg = '{} was built from {} documents, but {} were given.'
+      raise ValueError(msg.format(path, num_documents, len(doc_keys)))
+
+    saved_keys = index.get('doc_keys')
+    if saved_keys is not None and list(doc_keys) != saved_keys:
+      msg = '{} was built from different documents.'
+      raise ValueError(msg.format(path))
+
+  return tuple(tuple(TermScore(word, score) for word, score in document)
+               for document in index['documents'])
+
+def _select_top_k(indices: np.ndarray, values: np.ndarray,
+                  k: int) -> Tuple[np.ndarray, np.ndarray]:
+  """疎行列の1行から値の大きい k 個の要素を選ぶヘルパー関数
+
+  Args:
+    indices (np.ndarray): 非ゼロ要素の列番号
+    values (np.ndarray): 非ゼロ要素の値
+    k (int): 選ぶ要素の数
+
+  Returns:
+    値の降順(同じ値なら列番号の昇順)に並べた (列番号, 値)
+  """
+  if k <= 0:
+    return indices[:0], values[:0]
+
+  if k < len(values):
+    # k 番目の値以上の要素を選ぶ(k 番目と同じ値の要素は列番号の小さいものを残す)
+    kth_value = -np.partition(-values, k - 1)[k - 1]
+    selected = np.flatnonzero(values >= kth_value)
+
+  else:
+    selected = np.arange(len(values))
+
+  order = selected[np.lexsort((indices[selected], -values[selected]))][:k]
+  return indices[order], values[order]
 
 
 def main(args):
@@ -130,6 +597,3 @@ if __name__ == "__main__":
   parser.add_argument('input_dir')
 
   main(parser.parse_args())
-
-
-    
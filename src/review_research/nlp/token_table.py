@@ -0,0 +1,304 @@
+import operator
+import threading
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, NoReturn
+
+from ..nlp import TokenFeature
+from ..nlp import TokenDetail
+
+# 整数IDに置き換えて保持する TokenFeature の項目(種類の限られた品詞と活用の情報)
+INTERNED_FEATURE_FIELDS = ('pos', 'pos_detail1', 'pos_detail2', 'pos_detail3',
+                           'infl_type', 'infl_form')
+# 1つの文字列に連結して保持する項目(語ごとに異なる値をとるため ID にはしない)
+STRING_FIELDS = ('surface', 'normalized', 'base_form', 'reading', 'phonetic')
+
+class FeatureVocabulary:
+  """品詞などの文字列と整数IDを対応付ける辞書
+
+  同じ文字列には常に同じIDを割り当てるため、文字列の比較をIDの比較に置き換えられる
+  複数のスレッドから同時に登録しても、異なる文字列に同じIDを割り当てることはない
+  """
+
+  def __init__(self):
+    self._str_to_id = dict()  # type: Dict[str, int]
+    self._id_to_str = []      # type: List[str]
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return len(self._id_to_str)
+
+  def intern(self, value: str) -> int:
+    """文字列に対応するIDを返す(未登録なら登録する)
+
+    Args:
+      value (str): 文字列
+
+    Returns:
+      文字列のID
+    """
+    value_id = self._str_to_id.get(value)
+    if value_id is None:
+      with self._lock:
+        # ロックを待つ間に他のスレッドが登録している場合がある
+        value_id = self._str_to_id.get(value)
+        if value_id is None:
+          value_id = len(self._id_to_str)
+          self._id_to_str.append(value)
+          self._str_to_id[value] = value_id
+
+    return value_id
+
+  def lookup(self, value: str) -> Optional[int]:
+    """文字列に対応するIDを返す(未登録なら None)"""
+    return self._str_to_id.get(value)
+
+  def string(self, value_id: int) -> str:
+    """IDに対応する文字列を返す"""
+    return self._id_to_str[value_id]
+
+# プロセス内の全ての TokenTable で共有する辞書
+FEATURE_VOCABULARY = FeatureVocabulary()
+
+
+class TokenTable(Mapping):
+  """1文の形態素情報を列ごとにまとめて保持するクラス
+
+  表層形・正規化後の形・原形・読み・発音はそれぞれ1つの文字列に連結して開始位置の配列で区切り、
+  品詞・活用と固有表現は FEATURE_VOCABULARY のIDとして array に格納する
+  形態素の番号をキーとし、TokenDetail と同じ属性をもつ TokenView を値とする
+  Mapping として振る舞うため、TokenDict の代わりに使える
+  CaboCha.Chunk は保持しないため、TokenView の chunk は常に None となる
+
+  Usage:
+    >>> table = TokenTable.from_cabocha_tree(tree)
+    >>> table[0].surface, table[0].feature.pos
+    >>> nouns = table.indices_with_pos(['名詞'])
+
+    NumPy で扱う場合は列をそのまま配列として読み込める
+    >>> pos_ids = numpy.frombuffer(table.column('pos'), dtype=numpy.uint32)
+  """
+  __slots__ = ('_strings', '_offsets', '_named_entity_ids',
+               '_feature_columns', '_vocabulary')
+
+  def __init__(self, vocabulary: FeatureVocabulary = FEATURE_VOCABULARY):
+    self._vocabulary = vocabulary
+    self._strings = {field: '' for field in STRING_FIELDS}
+    self._offsets = {field: array('I', [0]) for field in STRING_FIELDS}
+    self._named_entity_ids = array('I')
+    self._feature_columns = {field: array('I')
+                             for field in INTERNED_FEATURE_FIELDS}
+
+  @classmethod
+  def from_token_details(
+      cls, token_details: Iterable[TokenDetail],
+      vocabulary: FeatureVocabulary = FEATURE_VOCABULARY) -> 'TokenTable':
+    """TokenDetailの一覧からTokenTableを作成
+
+    Args:
+      token_details (Iterable[TokenDetail]): 出現順に並んだ形態素情報
+      vocabulary (FeatureVocabulary): 品詞などのIDの辞書
+
+    Returns:
+      TokenTableインスタンス
+    """
+    return cls._from_tokens(
+        ((token_detail.surface, token_detail.normalized, token_detail.feature,
+          token_detail.named_entity) for token_detail in token_details),
+        vocabulary)
+
+  @classmethod
+  def from_cabocha_tree(
+      cls, tree: 'CaboCha.Tree',
+      vocabulary: FeatureVocabulary = FEATURE_VOCABULARY) -> 'TokenTable':
+    """CaboChaの解析結果からTokenDetailを作らずにTokenTableを作成
+
+    形態素情報は TokenDetail.from_cabocha_token と同じ値になる
+
+    Args:
+      tree (CaboCha.Tree): 係り受け解析の結果
+      vocabulary (FeatureVocabulary): 品詞などのIDの辞書
+
+    Returns:
+      TokenTableインスタンス
+    """
+    tokens = (tree.token(i) for i in range(tree.token_size()))
+    return cls._from_tokens(
+        ((token.surface, token.normalized_surface,
+          TokenFeature.from_feature_string(token.feature), token.ne)
+         for token in tokens),
+        vocabulary)
+
+  @classmethod
+  def _from_tokens(
+      cls, tokens: Iterable[Tuple[str, str, TokenFeature, Optional[str]]],
+      vocabulary: FeatureVocabulary) -> 'TokenTable':
+    """(表層形, 正規化後の形, 素性, 固有表現)の組の一覧からTokenTableを作成するヘルパーメソッド"""
+    this = cls(vocabulary)
+    intern = vocabulary.intern
+    values = {field: [] for field in STRING_FIELDS}
+    surfaces, normalized_forms, base_forms, readings, phonetics = \
+        (values[field] for field in STRING_FIELDS)
+    columns = [this._feature_columns[field] for field in INTERNED_FEATURE_FIELDS]
+    for surface, normalized, feature, named_entity in tokens:
+      surfaces.append(surface)
+      normalized_forms.append(normalized)
+      base_forms.append(feature.base_form)
+      readings.append(feature.reading)
+      phonetics.append(feature.phonetic)
+      this._named_entity_ids.append(intern(named_entity))
+      for column, value in zip(columns, feature):
+        column.append(intern(value))
+
+    for field in STRING_FIELDS:
+      this._strings[field] = ''.join(values[field])
+      this._offsets[field].extend(accumulate(map(len, values[field])))
+
+    return this
+
+  def __len__(self) -> int:
+    return len(self._named_entity_ids)
+
+  def __iter__(self) -> Iterator[int]:
+    return iter(range(len(self)))
+
+  def __getitem__(self, key: int) -> 'TokenView':
+    # np.int64 などの整数型のキーも int のキーと同じように扱う
+    try:
+      index = operator.index(key)
+
+    except TypeError:
+      raise KeyError(key) from None
+
+    if not 0 <= index < len(self):
+      raise KeyError(key)
+
+    return TokenView(self, index)
+
+  def column(self, field: str) -> array:
+    """品詞などの項目のID列を返す
+
+    Args:
+      field (str): INTERNED_FEATURE_FIELDS のいずれか
+
+    Returns:
+      形態素の出現順に並んだIDの配列
+    """
+    return self._feature_columns[field]
+
+  def string(self, field: str, index: int) -> str:
+    """index番目の形態素の、連結して保持している項目の値を返す
+
+    Args:
+      field (str): STRING_FIELDS のいずれか
+      index (int): 形態素の番号
+
+    Returns:
+      項目の値
+    """
+    offsets = self._offsets[field]
+    return self._strings[field][offsets[index]:offsets[index+1]]
+
+  def surface(self, index: int) -> str:
+    return self.string('surface', index)
+
+  def base_form(self, index: int) -> str:
+    return self.string('base_form', index)
+
+  def pos(self, index: int) -> str:
+    return self._vocabulary.string(self._feature_columns['pos'][index])
+
+  def feature(self, index: int) -> TokenFeature:
+    """index番目の形態素の TokenFeature を作成する"""
+    string = self._vocabulary.string
+    columns = self._feature_columns
+    return TokenFeature(string(columns['pos'][index]),
+                        string(columns['pos_detail1'][index]),
+                        string(columns['pos_detail2'][index]),
+                        string(columns['pos_detail3'][index]),
+                        string(columns['infl_type'][index]),
+                        string(columns['infl_form'][index]),
+                        self.base_form(index),
+                        self.string('reading', index),
+                        self.string('phonetic', index))
+
+  def indices_with_pos(self, pos_list: Iterable[str]) -> Tuple[int, ...]:
+    """品詞が pos_list のいずれかである形態素の番号を返す
+
+    品詞の比較は整数IDで行う
+
+    Args:
+      pos_list (Iterable[str]): 品詞の一覧
+
+    Returns:
+      形態素の番号のタプル
+    """
+    pos_ids = {self._vocabulary.lookup(pos) for pos in pos_list}
+    pos_ids.discard(None)
+    return tuple(i for i, pos_id in enumerate(self._feature_columns['pos'])
+                 if pos_id in pos_ids)
+
+  def to_token_detail(self, index: int) -> TokenDetail:
+    """index番目の形態素の TokenDetail を作成する"""
+    return TokenDetail(self.surface(index),
+                       self.string('normalized', index),
+                       self.feature(index),
+                       self._vocabulary.string(self._named_entity_ids[index]),
+                       None)
+
+
+class TokenView:
+  """TokenTable 内の1形態素を TokenDetail と同じ属性名で参照するためのクラス
+
+  Attributes:
+    surface (str): 表層形
+    normalized: 正規化後の形
+    feature (TokenFeature): 表層形を除いた形態素情報
+    named_entity (str): 固有表現
+    chunk (None): TokenTable は CaboCha.Chunk を保持しないため常に None
+  """
+  __slots__ = ('_table', '_index')
+
+  def __init__(self, table: TokenTable, index: int):
+    self._table = table
+    self._index = index
+
+  @property
+  def surface(self) -> str:
+    return self._table.surface(self._index)
+
+  @property
+  def normalized(self) -> str:
+    return self._table.string('normalized', self._index)
+
+  @property
+  def feature(self) -> TokenFeature:
+    return self._table.feature(self._index)
+
+  @property
+  def named_entity(self) -> str:
+    table = self._table
+    return table._vocabulary.string(table._named_entity_ids[self._index])
+
+  @property
+  def chunk(self) -> None:
+    return None
+
+  def to_token_detail(self) -> TokenDetail:
+    return self._table.to_token_detail(self._index)
+
+  def __iter__(self):
+    return iter(self.to_token_detail())
+
+  def __eq__(self, other) -> bool:
+    if isinstance(other, TokenView):
+      other = other.to_token_detail()
+
+    return self.to_token_detail() == other
+
+  def __hash__(self) -> int:
+    return hash(self.to_token_detail())
+
+  def __repr__(self) -> str:
+    return 'TokenView({!r})'.format(self.to_token_detail())
@@ -1,18 +1,23 @@
 import sys
 from collections import namedtuple, OrderedDict
-from typing import List, Iterator
+from typing import List, Iterator, Iterable, Tuple
+
+import MeCab
 
 from ..nlp import ONE_HIRAGANA_REGEX
 from ..nlp import HIRAGANAS_REGEX
-from ..nlp import MECAB_RESULT_SPLIT_REGEX
 from ..nlp import MecabTaggerSingleton
 from ..nlp import Token
 from ..nlp import WordRepr
+from ..nlp import WordSpan
 from ..nlp import StopwordRemover
 
 DEFAULT_POS = tuple(['名詞', '動詞', '形容詞'])
 ALL_POS     = DEFAULT_POS + tuple(['副詞', '助詞', '助動詞', '記号'])
 
+# 文頭・文末を表す形態素ノードの種類
+BOS_EOS_NODE_STATS = (MeCab.MECAB_BOS_NODE, MeCab.MECAB_EOS_NODE)
+
 class Tokenizer(object):
   """
   形態素解析器のラッパー
@@ -21,14 +26,24 @@ class Tokenizer(object):
     >>> tokenizer = Tokenizer()
     >>> text = '何らかの文章'
     >>> word_list = tokenizer.get_baseforms(text)
+
+    単語の文中での位置も取得する
+    >>> for word, start, end in tokenizer.get_baseform_spans(text):
+    ...   assert text[start:end] == word.surface
+
+    複数の文をまとめて形態素解析する
+    >>> for tokens in tokenizer.tokenize_many(texts):
+    ...   print(tokens)
   """
   _tagger = None
 
   def __init__(self):
     self.remover = StopwordRemover()
+    self._stopword_set = frozenset(self.remover.stopwords)
 
   @property
   def tagger(self):
+    """呼び出したスレッド専用の形態素解析器"""
     return MecabTaggerSingleton.get_instance()
 
   def get_baseforms(self, text: str, 
@@ -61,6 +76,54 @@ class Tokenizer(object):
 
     return words
 
+  def get_baseform_spans(self, text: str,
+                         remove_stopwords = True, remove_a_hiragana = True,
+                         pos_list: List[str] = DEFAULT_POS) -> List[WordSpan]:
+    """get_baseforms と同じ単語を、文中での位置とともに返す
+
+    位置は形態素解析器が返す形態素の長さから求めるため、文を探索し直すことはない
+
+    Params:
+      text (str): 形態素解析にかけたい文
+
+      pos_list (List[str]): 
+        品詞のフィルタリングに使うリスト
+        (default ['名詞', '動詞', '形容詞'])
+
+    Returns
+      pos_listでフィルタリングされて残った単語と、その位置のリスト
+    """
+    self.tagger.parse('')  # 形態素解析器の初期設定
+    node = self.tagger.parseToNode(text)
+    spans = [WordSpan(WordRepr.from_token(t), start, end)
+             for t, start, end in _iter_node_spans(node, text)
+             if pos_list is None or t.pos in pos_list]
+
+    if remove_stopwords:
+      stopwords = self._stopword_set
+      spans = [s for s in spans if s.word.base_form not in stopwords]
+
+    if remove_a_hiragana:
+      spans = [s for s in spans if not is_a_hiragana(s.word)]
+
+    return spans
+
+  def tokenize_many(self, texts: Iterable[str]) -> Iterator[Tuple[Token, ...]]:
+    """複数の文を1つのラティスを使い回して形態素解析する
+
+    Args:
+      texts (Iterable[str]): 文の一覧
+
+    Yields:
+      文ごとのTokenインスタンスのタプル
+    """
+    tagger = self.tagger
+    lattice = MeCab.Lattice()
+    for text in texts:
+      lattice.set_sentence(text)
+      tagger.parse(lattice)
+      yield tuple(_iter_node_tokens(lattice.bos_node()))
+
   def _tokenize(self, text: str) -> Iterator[Token]:
     """形態素解析のラッパーメソッド
 
@@ -71,16 +134,56 @@ class Tokenizer(object):
       Tokenインスタンスのジェネレータ
     """
     self.tagger.parse('')  # 形態素解析器の初期設定
-    result = self.tagger.parse(text)
-    lines = result.strip().split('\n')
-    chunk_list = [MECAB_RESULT_SPLIT_REGEX.split(line) for line in lines 
-                  if line != u'EOS']
-    for chunks in chunk_list:
-      if len(chunks) <= 1:
-        continue
-
-      surface, *features = chunks
-      yield Token.from_mecab_result(surface, *features)
+    yield from _iter_node_tokens(self.tagger.parseToNode(text))
+
+
+def _iter_node_tokens(node: MeCab.Node) -> Iterator[Token]:
+  """形態素ノードを順にたどり、文頭・文末以外のノードをTokenに変換するヘルパー関数
+
+  Args:
+    node (MeCab.Node): 最初の形態素ノード
+
+  Yields:
+    Tokenインスタンスのジェネレータ
+  """
+  while node:
+    if node.stat not in BOS_EOS_NODE_STATS:
+      yield Token.from_mecab_node(node.surface, node.feature)
+
+    node = node.next
+
+
+def _iter_node_spans(node: MeCab.Node,
+                     text: str) -> Iterator[Tuple[Token, int, int]]:
+  """形態素ノードを順にたどり、Tokenと文中での位置の組を返すヘルパー関数
+
+  MeCab はノードの長さをバイト数で返すため、
+  形態素の前にある空白のバイト数を文字数に直しながら位置を進める
+
+  Args:
+    node (MeCab.Node): 最初の形態素ノード
+    text (str): 形態素解析した文
+
+  Yields:
+    (Tokenインスタンス, 開始位置, 終了位置) の組(位置は文字単位)
+  """
+  encoded = text.encode('utf-8')
+  byte_pos = char_pos = 0
+  while node:
+    if node.stat not in BOS_EOS_NODE_STATS:
+      num_space_bytes = node.rlength - node.length
+      if num_space_bytes:
+        space = encoded[byte_pos:byte_pos+num_space_bytes]
+        char_pos += len(space.decode('utf-8'))
+        byte_pos += num_space_bytes
+
+      surface = node.surface
+      start = char_pos
+      char_pos += len(surface)
+      byte_pos += node.length
+      yield Token.from_mecab_node(surface, node.feature), start, char_pos
+
+    node = node.next
 
 
 def is_a_hiragana(word: WordRepr) -> bool:
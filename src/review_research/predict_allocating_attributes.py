@@ -9,7 +9,12 @@ from tqdm import tqdm
 
 from review_research.nlp import Splitter
 from review_research.nlp import normalize
-from review_research.nlp import AttributionExtractor
+from review_research.nlp import ALL_EXTRACTION_OPTIONS
+from review_research.nlp import WorkItem
+from review_research.nlp import ExtractionEngine
+from review_research.nlp import ExtractionClient
+from review_research.nlp.extraction_engine import DEFAULT_CHUNK_SIZE
+from review_research.nlp.extraction_daemon import DEFAULT_DAEMON_ADDRESS
 from review_research.evaluation import ReviewTextInfo
 from review_research.evaluation import AttrPredictionResult
 from review_research.review import ReviewPageJSON
@@ -25,25 +30,29 @@ def main(args):
   review_jsons = [pathlib.Path(f).resolve() for f in all_files
                   if pathlib.Path(f).name == 'review.json']
 
-  OPTION_FIELD = ['is_extended', 'is_ristrict']
-  Option = namedtuple('Option', OPTION_FIELD)
-
-  option_list = [Option(False, False), 
-                 Option(False, True),
-                 Option(True, False),
-                 Option(True, True)]
-          
   file_fmt = 'prediction{}{}.json'
-  for json_path in tqdm(review_jsons, ascii=True):
-    for option in option_list:
-      extention    = '_extended' if option.is_extended else ''
-      restricition = '_ristrict' if option.is_ristrict else ''
-
-      extractor = AttributionExtractor(dic_dir, extend=option.is_extended,
-                                       ristrict=option.is_ristrict)
+  option_list = ALL_EXTRACTION_OPTIONS
+  out_name_list = [file_fmt.format('_extended' if option.extend else '',
+                                   '_ristrict' if option.ristrict else '')
+                   for option in option_list]
 
-      out_file = json_path.parent / file_fmt.format(extention, restricition)
+  # 属性抽出のデーモンが起動していれば、辞書を読み込まずにデーモンへ依頼する
+  engine = None
+  if args.daemon:
+    engine = ExtractionClient.connect_if_running(args.daemon,
+                                                 options=option_list)
 
+  if engine is None:
+    engine = ExtractionEngine(dic_dir, options=option_list,
+                              processes=args.processes,
+                              chunksize=args.chunksize,
+                              parse_cache_path=args.parse_cache,
+                              prefilter=args.prefilter,
+                              verify_rate=args.verify_rate,
+                              compact_tokens=args.compact_tokens,
+                              preload=args.preload)
+  with engine:
+    for json_path in tqdm(review_jsons, ascii=True):
       review_data = ReviewPageJSON.load(json_path)
       reviews = review_data.reviews
       category = review_data.category
@@ -53,36 +62,51 @@ def main(args):
       ave_star = review_data.average_stars
       stars_dist = review_data.stars_distribution
 
-      extractor.category = category
       total_review = len(reviews)
       last_review_id = total_review
-      review_text_info_list = []
-      for idx, review_info in enumerate(reviews):
-        star   = review_info.star
-        title  = review_info.title
-        review = review_info.review
+      review_sentences = OrderedDict()
+      work_items = []
+      review_texts = (normalize(review_info.review) for review_info in reviews)
+      for idx, span in splitter.split_iter(review_texts):
         review_id = idx + 1
+        # 文は出現順に得られるため、最後に登録した文の番号がその文章の文の数となる
+        review_sentences[review_id] = (reviews[idx], span.index + 1)
+        work_items.append(WorkItem(review_id, span.index + 1, span.text))
 
-        sentences = splitter.split_sentence(normalize(review))
-        last_sentence_id = len(sentences)
-        for sidx, sentence in sentences.items():
-          sentence_id = sidx + 1
-          result_dict = extractor.extract_attribution(sentence)
+      # 1文につき1回の係り受け解析で、全オプションの結果をまとめて得る
+      ja2en = engine.ja2en(category)
+      review_text_info_lists = [[] for _ in option_list]
+      for output in engine.extract(work_items, category):
+        review_info, last_sentence_id = review_sentences[output.review_id]
+        for review_text_info_list, result_dict in zip(review_text_info_lists,
+                                                      output.results):
           editted_dict = OrderedDict()
           for attr, results in result_dict.items():
-            editted_dict[extractor.ja2en[attr]] = results
+            editted_dict[ja2en[attr]] = results
 
           review_text_info_list.append(
-              ReviewTextInfo(review_id, last_review_id,
-                             sentence_id, last_sentence_id,
-                             star, title, review, sentence, editted_dict))
+              ReviewTextInfo(output.review_id, last_review_id,
+                             output.sentence_id, last_sentence_id,
+                             review_info.star, review_info.title,
+                             review_info.review, output.sentence,
+                             editted_dict))
 
-      total_sentence = len(review_text_info_list)
-      result = AttrPredictionResult(
-          json_path, product_name, link, maker, ave_star, stars_dist,
-          total_review, total_sentence, tuple(review_text_info_list)
-      )
-      result.dump(out_file)
+      for out_name, review_text_info_list in zip(out_name_list,
+                                                 review_text_info_lists):
+        total_sentence = len(review_text_info_list)
+        result = AttrPredictionResult(
+            json_path, category, product_name, link, maker, ave_star,
+            stars_dist, total_review, total_sentence,
+            tuple(review_text_info_list)
+        )
+        result.dump(json_path.parent / out_name)
+
+  # デーモンに依頼した場合、絞り込みの状況はデーモン側にしか残らない
+  if args.prefilter and isinstance(engine, ExtractionEngine):
+    stats = engine.prefilter_stats
+    msg = 'prefilter: skipped {}, passed {}, verified {}, disagreements {}'
+    print(msg.format(stats.skipped, stats.passed, stats.verified,
+                     stats.disagreements))
       
 
 if __name__ == "__main__":
@@ -90,4 +114,22 @@ if __name__ == "__main__":
   parser.add_argument('dic_dir',
                       help='属性辞書を格納しているフォルダパス')
   parser.add_argument('review_dir',
-                      help='review.json を格納しているフォルダパス')
\ No newline at end of file
+                      help='review.json を格納しているフォルダパス')
+  parser.add_argument('--processes', type=int, default=None,
+                      help='属性抽出に使うワーカプロセス数(デフォルトは CPU のコア数)')
+  parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE,
+                      help='1回の受け渡しでワーカへ送る文の数')
+  parser.add_argument('--parse-cache', default=None,
+                      help='係り受け解析結果のキャッシュファイルのパス')
+  parser.add_argument('--prefilter', action='store_true',
+                      help='属性辞書の語を含まない文の係り受け解析を省略する')
+  parser.add_argument('--verify-rate', type=float, default=0.0,
+                      help='解析を省略した文のうち、絞り込みの検証に使う文の割合')
+  parser.add_argument('--compact-tokens', action='store_true',
+                      help='形態素情報を列ごとにまとめて保持し、メモリ使用量を抑える')
+  parser.add_argument('--preload', action='store_true',
+                      help='辞書を1度だけ読み込んでからワーカプロセスを fork する')
+  parser.add_argument('--daemon', nargs='?', const=DEFAULT_DAEMON_ADDRESS, default=None,
+                      help='起動していれば使う属性抽出デーモンのアドレス(serve_extraction.py)')
+
+  main(parser.parse_args())
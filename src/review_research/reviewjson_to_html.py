@@ -12,13 +12,46 @@ from tqdm import tqdm
 
 from review_research.htmlgenerator import ReviewDataConvertor
 from review_research.misc import get_all_jsonfiles
+from review_research.nlp import TFIDF
+from review_research.nlp import TOP_K_INDEX_NAME
+from review_research.nlp import document_key
+from review_research.nlp import load_top_k_index
+from review_research.review import ReviewPageJSON
+
+def save_keyword_index(tfidf: TFIDF, reviewjson: pathlib.Path, k: int) -> bool:
+  """review.json のレビューごとの TF-IDF 上位語を、同じフォルダに保存する
+
+  既存のファイルが同じレビューの一覧と k から作られていれば、TF-IDF を計算し直さない
+
+  Returns:
+    ファイルを保存し直した場合は True
+  """
+  reviews = ReviewPageJSON.load(reviewjson).reviews
+  doc_list = [review_info.review for review_info in reviews]
+  doc_keys = [document_key(doc) for doc in doc_list]
+  index_path = reviewjson.parent / TOP_K_INDEX_NAME
+  if index_path.exists():
+    try:
+      load_top_k_index(index_path, doc_keys=doc_keys, k=k)
+      return False
+
+    except (OSError, ValueError, KeyError):
+      # 読み込めないファイルや異なるレビューの一覧から作られたファイルは作り直す
+      pass
+
+  tfidf.compute(doc_list)
+  tfidf.save_top_k_index(index_path, k=k, doc_keys=doc_keys)
+  return True
 
 def main(args):
   input_dir = args.input_dir
   json_list = get_all_jsonfiles(input_dir, 'review.json')
 
   normalize = args.normalize
-  convertor = ReviewDataConvertor(normalize_mode=normalize)
+  keyword_index_name = TOP_K_INDEX_NAME if args.keywords else None
+  tfidf = TFIDF() if args.keywords else None
+  convertor = ReviewDataConvertor(normalize_mode=normalize,
+                                  keyword_index_name=keyword_index_name)
   out_dir = pathlib.Path(args.out_dir)
   for path in tqdm(json_list, ascii=True):
     tqdm.write('\n[file] {}'.format(path))
@@ -28,6 +61,9 @@ def main(args):
 
     product_dir = out_dir.parent
     out_name = product_dir / out_name
+    if args.keywords:
+      save_keyword_index(tfidf, path, args.keywords)
+
     html = convertor.convert(path)
     with out_name.open(mode='w', encoding='utf-8') as fp:
       fp.write(html)
@@ -39,4 +75,6 @@ if __name__ == "__main__":
   parser.add_argument('out_dir')
   parser.add_argument('--normalize',
                       action='store_true', default=False)
+  parser.add_argument('--keywords', type=int, default=0,
+                      help='レビューごとの TF-IDF 上位語をこの数だけ表に加える')
   main(parser.parse_args())
\ No newline at end of file
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import signal
+
+from review_research.nlp import ExtractionDaemon
+from review_research.nlp.extraction_daemon import DEFAULT_DAEMON_ADDRESS
+from review_research.nlp.extraction_daemon import DEFAULT_MAX_BATCH_SIZE
+from review_research.nlp.extraction_daemon import DEFAULT_MAX_BATCH_DELAY
+from review_research.nlp.extraction_daemon import DEFAULT_MAX_REQUEST_BYTES
+
+def main(args):
+  daemon = ExtractionDaemon(args.dic_dir, address=args.address,
+                            max_batch_size=args.max_batch_size,
+                            max_batch_delay=args.max_batch_delay,
+                            prefilter=args.prefilter,
+                            compact_tokens=args.compact_tokens,
+                            max_request_bytes=args.max_request_bytes)
+  # SIGTERM で終了した場合も、Ctrl-C と同じようにソケットを削除して処理状況を表示する
+  signal.signal(signal.SIGTERM, signal.default_int_handler)
+  try:
+    asyncio.run(daemon.serve())
+
+  except KeyboardInterrupt:
+    stats = daemon.stats()
+    print('requests: {}, sentences: {}, mean batch size: {:.1f}'.format(
+        stats.requests, stats.sentences, stats.mean_batch_size))
+    print('p50: {:.1f} ms, p99: {:.1f} ms, throughput: {:.1f} sentences/s'.format(
+        stats.p50_ms, stats.p99_ms, stats.throughput))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument('dic_dir',
+                      help='属性辞書を格納しているフォルダパス')
+  parser.add_argument('--address', default=DEFAULT_DAEMON_ADDRESS,
+                      help='待ち受けアドレス(「ホスト:ポート」または Unix ソケットのパス)')
+  parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                      help='1回の属性抽出でまとめて処理する文の最大数')
+  parser.add_argument('--max-batch-delay', type=float, default=DEFAULT_MAX_BATCH_DELAY,
+                      help='他のリクエストの文をまとめるために待つ最大秒数')
+  parser.add_argument('--prefilter', action='store_true',
+                      help='属性辞書の語を含まない文の係り受け解析を省略する')
+  parser.add_argument('--compact-tokens', action='store_true',
+                      help='形態素情報を列ごとにまとめて保持し、メモリ使用量を抑える')
+  parser.add_argument('--max-request-bytes', type=int, default=DEFAULT_MAX_REQUEST_BYTES,
+                      help='受け付ける1行のリクエストの最大バイト数')
+
+  main(parser.parse_args())
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from review_research.htmlgenerator import ReviewDataConvertor
+from review_research.nlp import TFIDF
+from review_research.nlp import TOP_K_INDEX_NAME
+from review_research.nlp import document_key
+
+reviews = ['画面がきれい。画面が大きい。', '電池の持ちが悪い。', '画面が暗い。']
+
+def write_review_json(product_dir, reviews):
+  review_infos = [{'date': '2019年5月1日', 'star': 5.0, 'vote': 0,
+                   'name': 'reviewer', 'title': 'title', 'review': review}
+                  for review in reviews]
+  review_data = {'link': 'https://www.amazon.co.jp', 'maker': 'maker',
+                 'product': 'product', 'category': 'smartphone',
+                 'average_stars': 5.0, 'total_reviews': len(reviews),
+                 'real_reviews': len(reviews),
+                 'stars_distribution': [0, 0, 0, 0, 100],
+                 'reviews': review_infos}
+  reviewjson = product_dir / 'review.json'
+  with reviewjson.open(mode='w', encoding='utf-8') as fp:
+    json.dump(review_data, fp, ensure_ascii=False)
+
+  return reviewjson
+
+def save_keyword_index(product_dir, reviews, k=2):
+  tfidf = TFIDF()
+  tfidf.compute(reviews)
+  tfidf.save_top_k_index(product_dir / TOP_K_INDEX_NAME, k=k,
+                         doc_keys=[document_key(review) for review in reviews])
+  return tfidf
+
+def test_keywords_column(tmp_path):
+  reviewjson = write_review_json(tmp_path, reviews)
+  tfidf = save_keyword_index(tmp_path, reviews)
+  convertor = ReviewDataConvertor(keyword_index_name=TOP_K_INDEX_NAME)
+  html = convertor.convert(reviewjson)
+
+  assert 'keywords' in html
+  for doc_id in range(len(reviews)):
+    words = '、'.join(term.word for term in tfidf.top_k(doc_id, k=2))
+    assert words in html
+
+def test_keywords_column_without_index(tmp_path):
+  reviewjson = write_review_json(tmp_path, reviews)
+  convertor = ReviewDataConvertor(keyword_index_name=TOP_K_INDEX_NAME)
+  assert 'keywords' not in convertor.convert(reviewjson)
+
+@pytest.mark.parametrize('indexed_reviews', [
+    # レビューの数が異なる
+    reviews[:2],
+    # レビューの数は同じだが、別のレビューの一覧から作られている
+    reviews[1:] + ['電池が大きい。'],
+])
+def test_stale_keyword_index(tmp_path, indexed_reviews):
+  reviewjson = write_review_json(tmp_path, reviews)
+  save_keyword_index(tmp_path, indexed_reviews)
+  convertor = ReviewDataConvertor(keyword_index_name=TOP_K_INDEX_NAME)
+  with pytest.raises(ValueError):
+    convertor.convert(reviewjson)
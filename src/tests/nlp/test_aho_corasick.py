@@ -0,0 +1,13 @@
+from review_research.nlp import AhoCorasick
+
+automaton = AhoCorasick(['画面', '電池', '電池の持ち', 'の持ち', ''])
+
+def test_search():
+  assert automaton.search('電池の持ちが悪い')
+  assert not automaton.search('とても悪い')
+  assert not automaton.search('')
+
+def test_find_all():
+  result = list(automaton.find_all('電池の持ちが悪い'))
+  assert result == [(0, '電池'), (0, '電池の持ち'), (2, 'の持ち')]
+  assert len(automaton) == 4
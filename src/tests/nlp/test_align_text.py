@@ -16,3 +16,10 @@ def test_text_alignment2():
   assert ta2.text != text
   assert ta2.text == ta1.text
   assert len(ta1.alignment) == len(ta2.alignment)
+
+
+def test_text_alignment_spans():
+  assert len(ta1.spans) == len(ta1.alignment)
+  assert ''.join(a.surface for a in ta1.alignment) == ta1.text
+  for alignment, (start, end) in zip(ta1.alignment, ta1.spans):
+    assert ta1.text[start:end] == alignment.surface
@@ -0,0 +1,92 @@
+import pickle
+
+import pytest
+
+from review_research.nlp import AttrDictHandler
+from review_research.nlp import attr_dictionary
+from review_research.nlp.attr_dictionary import COMPILED_ATTR_DICT_NAME
+from review_research.nlp.attr_dictionary import load_compiled_attr_dict
+
+DICTIONARIES = {
+    ('smartphone', 'screen'): ('画面', ('画面', 'ディスプレイ', '液晶')),
+    ('smartphone', 'battery'): ('電池', ('電池', 'バッテリー', '液晶')),
+    ('common', 'price'): ('値段', ('値段', '価格')),
+}
+
+def write_dictionary(dic_dir, category, en_name, ja_name, words):
+  dic_path = dic_dir / category / '{}.txt'.format(en_name)
+  dic_path.parent.mkdir(parents=True, exist_ok=True)
+  dic_path.write_text('name:{}\n{}\n'.format(ja_name, '\n'.join(words)),
+                      encoding='utf-8')
+
+@pytest.fixture
+def dic_dir(tmp_path, monkeypatch):
+  # 他のテストで読み込んだ属性辞書を使わないようにする
+  monkeypatch.setattr(attr_dictionary, '_compiled_attr_dicts', dict())
+  for (category, en_name), (ja_name, words) in DICTIONARIES.items():
+    write_dictionary(tmp_path, category, en_name, ja_name, words)
+
+  return tmp_path
+
+def test_attr_dict_handler(dic_dir):
+  handler = AttrDictHandler(dic_dir)
+  assert handler.categories == ('smartphone',)
+  assert handler.ja2en('smartphone') == {'画面': 'screen', '電池': 'battery'}
+  assert handler.common_en2ja == {'price': '値段'}
+  # 辞書ファイルを見つけた順に並ぶため、属性の順番は比較しない
+  assert set(handler.term_index('smartphone')['液晶']) == {'画面', '電池'}
+  assert handler.term_index('smartphone')['バッテリー'] == ('電池',)
+
+def test_ambiguous_terms(dic_dir):
+  handler = AttrDictHandler(dic_dir)
+  ambiguous_terms = handler.ambiguous_terms('smartphone')
+  assert 'バッテリー' not in ambiguous_terms
+  assert set(ambiguous_terms['液晶']) == {'画面', '電池'}
+  assert handler.ambiguous_terms('smartphone') is ambiguous_terms
+  assert handler.ambiguous_terms('common') == {}
+
+  attr_dict = handler.remove_intersection_word('smartphone')
+  assert '液晶' not in attr_dict['画面']
+  assert '液晶' not in attr_dict['電池']
+
+def test_compiled_attr_dict_is_shared_in_process(dic_dir):
+  compiled = load_compiled_attr_dict(dic_dir)
+  assert (dic_dir / COMPILED_ATTR_DICT_NAME).exists()
+  assert load_compiled_attr_dict(dic_dir) is compiled
+  assert AttrDictHandler(dic_dir).attr_dict('smartphone') \
+      is compiled.attr_dicts['smartphone']
+
+def test_compiled_attr_dict_is_loaded_from_file(dic_dir, monkeypatch):
+  compiled = load_compiled_attr_dict(dic_dir)
+  monkeypatch.setattr(attr_dictionary, '_compiled_attr_dicts', dict())
+  monkeypatch.setattr(attr_dictionary, 'compile_attr_dict', None)
+  loaded = load_compiled_attr_dict(dic_dir)
+  assert loaded is not compiled
+  assert loaded == compiled
+
+def test_compiled_attr_dict_is_invalidated(dic_dir):
+  compiled = load_compiled_attr_dict(dic_dir)
+  write_dictionary(dic_dir, 'smartphone', 'screen', '画面', ('画面', 'スクリーン'))
+  updated = load_compiled_attr_dict(dic_dir)
+  assert updated.signature != compiled.signature
+  assert 'スクリーン' in updated.term_indices['smartphone']
+  assert '液晶' in updated.term_indices['smartphone']
+  assert 'ディスプレイ' not in updated.term_indices['smartphone']
+
+  with (dic_dir / COMPILED_ATTR_DICT_NAME).open(mode='rb') as fp:
+    assert pickle.load(fp) == updated
+
+@pytest.mark.parametrize('content', [
+    b'',
+    b'broken',
+    # 名前が変わって存在しなくなったモジュールのクラス
+    b'crenamed_module\nCompiledAttrDict\n.',
+    pickle.dumps(('signature', 'attr_dicts')),
+])
+def test_stale_compiled_attr_dict_is_rebuilt(dic_dir, content):
+  (dic_dir / COMPILED_ATTR_DICT_NAME).write_bytes(content)
+  compiled = load_compiled_attr_dict(dic_dir)
+  assert set(compiled.attr_dicts) == {'smartphone', 'common'}
+
+  with (dic_dir / COMPILED_ATTR_DICT_NAME).open(mode='rb') as fp:
+    assert pickle.load(fp) == compiled
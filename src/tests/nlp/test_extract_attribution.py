@@ -0,0 +1,145 @@
+from collections import OrderedDict, namedtuple
+
+import pytest
+
+from review_research.nlp import AttributionExtractor
+from review_research.nlp import COMMON_DICTIONARY_NAME
+from review_research.nlp import ExtractionOption
+from review_research.nlp import LinkDetail
+from review_research.nlp import PhraseDetail
+from review_research.nlp import PrefilterStats
+from review_research.nlp import extract_attribution
+from review_research.nlp.extract_attribution import DependencyAnalysisResult
+from review_research.nlp.extract_attribution import _update_linkdetails
+
+stopwords = frozenset(['こと'])
+
+def _make_chain(*phrases):
+  return tuple(LinkDetail(i, PhraseDetail(head, tuple(), pos, func))
+               for i, (head, pos, func) in enumerate(phrases))
+
+def _functional_words(linkdetails):
+  return [ld.phrase_detail.functional_word for ld in linkdetails]
+
+def test_update_linkdetails_propagates_from_the_end():
+  # 画面と 電池の こと が: 「の」はストップワードの機能語に、「と」は更新後の機能語に合わせる
+  chain = _make_chain(('画面', '名詞', 'と'), ('電池', '名詞', 'の'),
+                      ('こと', '名詞', 'が'))
+  updated = _update_linkdetails(chain, stopwords)
+  assert _functional_words(updated) == ['が', 'が', 'が']
+  assert [ld.phrase_id for ld in updated] == [0, 1, 2]
+
+def test_update_linkdetails_keeps_unsupported_links():
+  chain = _make_chain(('画面', '名詞', 'の'), ('電池', '名詞', 'が'),
+                      ('値段', '名詞', 'と'), ('高い', '形容詞', ''))
+  updated = _update_linkdetails(chain, stopwords)
+  assert updated == chain
+
+Chunk = namedtuple('Chunk', 'phrase')
+
+class FakeAttrDictHandler:
+  """カテゴリごとの属性辞書と、属性語から属性を引く索引を返す"""
+  dictionaries = {
+      'smartphone': OrderedDict([('画面', ('画面',)), ('電池', ('電池',)),
+                                 ('ケーブル', ('USBケーブル',))]),
+      COMMON_DICTIONARY_NAME: OrderedDict([('値段', ('値段', '価格'))]),
+  }
+  ja2en_dict = {'画面': 'screen', '電池': 'battery', 'ケーブル': 'cable',
+                '値段': 'price'}
+
+  def __init__(self, dic_dir):
+    self.common_attr_dict = self.dictionaries[COMMON_DICTIONARY_NAME]
+
+  def attr_dict(self, category):
+    return self.dictionaries[category]
+
+  def ja2en(self, category):
+    return {attr: self.ja2en_dict[attr] for attr in self.dictionaries[category]}
+
+  def term_index(self, category):
+    term_index = dict()
+    for attr, words in self.dictionaries[category].items():
+      for word in words:
+        term_index.setdefault(word, []).append(attr)
+
+    return {term: tuple(attrs) for term, attrs in term_index.items()}
+
+class FakeStopwordRemover:
+  stopwords = list(stopwords)
+
+@pytest.fixture
+def make_extractor(monkeypatch):
+  monkeypatch.setattr(extract_attribution, 'AttrDictHandler', FakeAttrDictHandler)
+  monkeypatch.setattr(extract_attribution, 'StopwordRemover', FakeStopwordRemover)
+  def make(sentence_to_chain, **kwargs):
+    # 係り受け解析を行わずに、文ごとに決めた係り受け関係を返す属性抽出器
+    extractor = AttributionExtractor('dic', **kwargs)
+    extractor.category = 'smartphone'
+    extractor.analyzed = []
+    def analyze(sentence):
+      extractor.analyzed.append(sentence)
+      chain = sentence_to_chain[sentence]
+      chunk_dict = OrderedDict((ld.phrase_id, Chunk(ld.phrase_detail.head_surface))
+                               for ld in chain)
+      return DependencyAnalysisResult(chunk_dict, None, None, None, {0: chain})
+
+    extractor._analyze = analyze
+    return extractor
+
+  return make
+
+def test_extract_attributions(make_extractor):
+  sentence_to_chain = {
+      '画面が良い': _make_chain(('画面', '名詞', 'が'), ('良い', '形容詞', '')),
+      '電池も画面も': _make_chain(('電池', '名詞', 'も'), ('画面', '名詞', 'も')),
+      '良いです': _make_chain(('良い', '形容詞', '')),
+  }
+  sentences = ['画面が良い', '良いです', '電池も画面も', '良いです', '画面が良い']
+  extractor = make_extractor(sentence_to_chain)
+  results = extractor.extract_attributions(sentences)
+  assert extractor.analyzed == ['画面が良い', '良いです', '電池も画面も']
+
+  expected = [extractor.extract_attribution(sentence) for sentence in sentences]
+  assert results == expected
+  assert list(results[2]) == ['画面', '電池']
+  assert results[1] == OrderedDict()
+
+  options = (ExtractionOption(False, False), ExtractionOption(True, True))
+  results = extractor.extract_attributions_with_options(sentences, options)
+  assert results == [extractor.extract_attribution_with_options(sentence, options)
+                     for sentence in sentences]
+
+def test_extract_attribute_ids(make_extractor):
+  sentence_to_chain = {
+      '画面が良い': _make_chain(('画面', '名詞', 'が'), ('良い', '形容詞', '')),
+      '電池も画面も': _make_chain(('電池', '名詞', 'も'), ('画面', '名詞', 'も')),
+      '良いです': _make_chain(('良い', '形容詞', '')),
+      # 共通の属性辞書の語
+      '価格が高い': _make_chain(('価格', '名詞', 'が'), ('高い', '形容詞', '')),
+  }
+  extractor = make_extractor(sentence_to_chain)
+  for sentence in sentence_to_chain:
+    attr_ids = extractor.extract_attribute_ids(sentence)
+    names = [extractor.attr_names[attr_id] for attr_id in attr_ids]
+    assert names == list(extractor.extract_attribution(sentence))
+
+  assert extractor.extract_attribute_ids('電池も画面も') == (0, 1)
+  assert extractor.extract_attribute_ids('良いです') == ()
+  assert extractor.extract_attribute_ids('価格が高い') \
+      == (extractor.attr_names.index('値段'),)
+
+def test_prefilter_ignores_whitespace(make_extractor):
+  sentence_to_chain = {
+      # 形態素解析は空白を読み飛ばすため、主辞は空白を含まない
+      'USB ケーブルが短い': _make_chain(('USBケーブル', '名詞', 'が'), ('短い', '形容詞', '')),
+      'USB\u3000ケーブルが短い': _make_chain(('USBケーブル', '名詞', 'が'),
+                                       ('短い', '形容詞', '')),
+      '良いです': _make_chain(('良い', '形容詞', '')),
+  }
+  extractor = make_extractor(sentence_to_chain, prefilter=True)
+  for sentence in ('USB ケーブルが短い', 'USB\u3000ケーブルが短い'):
+    assert list(extractor.extract_attribution(sentence)) == ['ケーブル']
+
+  assert extractor.extract_attribution('良いです') == OrderedDict()
+  assert extractor.analyzed == ['USB ケーブルが短い', 'USB\u3000ケーブルが短い']
+  assert extractor.prefilter_stats == PrefilterStats(1, 2, 0, 0)
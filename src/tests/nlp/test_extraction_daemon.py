@@ -0,0 +1,174 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import pytest
+
+from review_research.nlp import AttributionExtractor
+from review_research.nlp import COMMON_DICTIONARY_NAME
+from review_research.nlp import ExtractionOption
+from review_research.nlp import ExtractionClient
+from review_research.nlp import ExtractionDaemon
+from review_research.nlp import LinkDetail
+from review_research.nlp import PhraseDetail
+from review_research.nlp import WordRepr
+from review_research.nlp import extract_attribution
+from review_research.nlp import extraction_daemon
+from review_research.nlp.extract_attribution import DependencyAnalysisResult
+
+OPTIONS = (ExtractionOption(False, False), ExtractionOption(True, True))
+
+class FakeAttrDictHandler:
+  categories = ('smartphone',)
+  dictionaries = {
+      'smartphone': OrderedDict([('画面', ('画面',)), ('電池', ('電池',))]),
+      COMMON_DICTIONARY_NAME: OrderedDict([('その他', ('その他',))]),
+  }
+  ja2en_dict = {'画面': 'screen', '電池': 'battery', 'その他': 'other'}
+  common_ja2en = {'その他': 'other'}
+
+  def __init__(self, dic_dir):
+    self.common_attr_dict = self.dictionaries[COMMON_DICTIONARY_NAME]
+
+  def attr_dict(self, category):
+    return self.dictionaries[category]
+
+  def ja2en(self, category):
+    return {attr: self.ja2en_dict[attr] for attr in self.dictionaries[category]}
+
+  def term_index(self, category):
+    return {word: (attr,) for attr, words in self.dictionaries[category].items()
+            for word in words}
+
+class FakeStopwordRemover:
+  stopwords = ['こと']
+
+Chunk = namedtuple('Chunk', 'phrase')
+
+def _make_chain(*phrases):
+  # 主辞を構成する形態素も持たせ、extend で候補語に WordRepr が含まれるようにする
+  return tuple(LinkDetail(i, PhraseDetail(head, tuple(WordRepr(*word) for word in words),
+                                          pos, func))
+               for i, (head, words, pos, func) in enumerate(phrases))
+
+SENTENCE_TO_CHAIN = {
+    '画面が明るい': _make_chain(('画面', (('画面', '画面'),), '名詞', 'が'),
+                          ('明るい', (), '形容詞', '')),
+    '電池も画面も': _make_chain(('電池', (('電池', '電池'),), '名詞', 'も'),
+                          ('画面', (('画面', '画面'),), '名詞', 'も')),
+    '良いです': _make_chain(('良い', (), '形容詞', '')),
+}
+
+def analyze(self, sentence):
+  # 係り受け解析を行わずに、文ごとに決めた係り受け関係を返す
+  chain = SENTENCE_TO_CHAIN[sentence]
+  chunk_dict = OrderedDict((ld.phrase_id, Chunk(ld.phrase_detail.head_surface))
+                           for ld in chain)
+  return DependencyAnalysisResult(chunk_dict, None, None, None, {0: chain})
+
+@pytest.fixture
+def fake_analysis(monkeypatch):
+  monkeypatch.setattr(extract_attribution, 'AttrDictHandler', FakeAttrDictHandler)
+  monkeypatch.setattr(extract_attribution, 'StopwordRemover', FakeStopwordRemover)
+  monkeypatch.setattr(AttributionExtractor, '_analyze', analyze)
+
+@pytest.fixture
+def daemon_address(request, tmp_path, monkeypatch, fake_analysis):
+  monkeypatch.setattr(extraction_daemon, 'AttrDictHandler', FakeAttrDictHandler)
+  address = str(tmp_path / 'daemon.sock')
+  # indirect で指定した引数をデーモンに渡す
+  daemon = ExtractionDaemon('dic', address=address,
+                            **getattr(request, 'param', dict()))
+  loop = asyncio.new_event_loop()
+  task = loop.create_task(daemon.serve())
+  def serve():
+    with pytest.raises(asyncio.CancelledError):
+      loop.run_until_complete(task)
+
+  thread = threading.Thread(target=serve)
+  thread.start()
+  for _ in range(100):
+    client = ExtractionClient.connect_if_running(address)
+    if client is not None:
+      client.close()
+      break
+
+    time.sleep(0.01)
+
+  yield address
+  loop.call_soon_threadsafe(task.cancel)
+  thread.join()
+  loop.close()
+
+def test_parse_address():
+  assert extraction_daemon._parse_address('127.0.0.1:8765') == ('127.0.0.1', 8765)
+  assert extraction_daemon._parse_address('/tmp/daemon.sock') == '/tmp/daemon.sock'
+
+def test_extract(daemon_address):
+  sentences = list(SENTENCE_TO_CHAIN) * 2
+  items = [(1, i, sentence) for i, sentence in enumerate(sentences)]
+  with ExtractionClient(daemon_address, options=OPTIONS, request_size=2) as client:
+    outputs = list(client.extract(items, 'smartphone'))
+    assert client.ja2en('smartphone') == {'画面': 'screen', '電池': 'battery',
+                                          'その他': 'other'}
+    stats = client.stats()
+
+  extractor = AttributionExtractor('dic')
+  extractor.category = 'smartphone'
+  for (review_id, sentence_id, sentence), output in zip(items, outputs):
+    expected = extractor.extract_attribution_with_options(sentence, OPTIONS)
+    assert output.sentence_id == sentence_id
+    assert output.results == tuple(expected.values())
+
+  # extend では文字列と WordRepr が混在した候補語の集合を受け渡す
+  candidate_terms = outputs[0].results[1]['画面'][0]['candidate_terms']
+  assert candidate_terms == frozenset(['画面', WordRepr('画面', '画面')])
+  assert stats.requests == 3
+  assert stats.sentences == 6
+
+def test_large_request(daemon_address):
+  # StreamReader の既定の上限(64 KiB)を超えるリクエスト
+  sentences = list(SENTENCE_TO_CHAIN) * 3000
+  items = [(1, i, sentence) for i, sentence in enumerate(sentences)]
+  request_bytes = len(json.dumps(sentences, ensure_ascii=False).encode('utf-8'))
+  assert request_bytes > 64 * 1024
+  with ExtractionClient(daemon_address, options=OPTIONS,
+                        request_size=len(items)) as client:
+    outputs = list(client.extract(items, 'smartphone'))
+    stats = client.stats()
+
+  assert [output.sentence for output in outputs] == sentences
+  assert stats.requests == 1
+
+@pytest.mark.parametrize('daemon_address', [{'max_request_bytes': 1024}],
+                         indirect=True)
+def test_request_too_large(daemon_address):
+  items = [(1, i, '画面が明るい') for i in range(200)]
+  with ExtractionClient(daemon_address, options=OPTIONS,
+                        request_size=len(items)) as client:
+    with pytest.raises(RuntimeError, match='exceeds the limit'):
+      list(client.extract(items, 'smartphone'))
+
+    # 上限を超えたリクエストを読み飛ばし、同じ接続で次のリクエストを処理する
+    outputs = list(client.extract(items[:2], 'smartphone'))
+    assert [output.sentence_id for output in outputs] == [0, 1]
+    assert client.stats().requests == 1
+
+def test_encode_result_with_word_repr(fake_analysis):
+  extractor = AttributionExtractor('dic')
+  extractor.category = 'smartphone'
+  result = extractor.extract_attribution_with_options('電池も画面も', OPTIONS)
+  for result_dict in result.values():
+    encoded = json.loads(json.dumps(extraction_daemon._encode_result(result_dict)),
+                         object_pairs_hook=OrderedDict)
+    assert extraction_daemon._decode_result(encoded) == result_dict
+
+def test_unknown_category(daemon_address):
+  with ExtractionClient(daemon_address) as client:
+    with pytest.raises(RuntimeError):
+      list(client.extract([(1, 1, '文')], 'unknown'))
+
+def test_not_running(tmp_path):
+  assert ExtractionClient.connect_if_running(str(tmp_path / 'none.sock')) is None
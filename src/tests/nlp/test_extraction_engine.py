@@ -0,0 +1,145 @@
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+
+import pytest
+
+from review_research.nlp import CabochaParserSingleton
+from review_research.nlp import ExtractionEngine
+from review_research.nlp import MecabTaggerSingleton
+from review_research.nlp import PrefilterStats
+from review_research.nlp import ThreadLocalProvider
+from review_research.nlp import WorkerStats
+from review_research.nlp import extraction_engine
+from review_research.nlp.extraction_engine import _measure_worker
+
+requires_fork = pytest.mark.skipif(
+    'fork' not in multiprocessing.get_all_start_methods(),
+    reason='fork is not available')
+
+class FakeAttrDictHandler:
+  def __init__(self, dic_dir):
+    pass
+
+class FakeExtractor:
+  """生成したプロセスと、使った解析器を生成したプロセスを結果として返す属性抽出器"""
+
+  def __init__(self, dic_dir, parse_cache=None, prefilter=False,
+               verify_rate=0.0, compact_tokens=False):
+    self.category = None
+    self.parse_cache = parse_cache
+    self.prefilter_stats = PrefilterStats(0, 0, 0, 0)
+    self.created_in = os.getpid()
+
+  def extract_attributions_with_options(self, texts, options):
+    info = {'extractor': self.created_in,
+            'parser': CabochaParserSingleton.get_instance(),
+            'worker': os.getpid()}
+    return [OrderedDict((option, info) for option in options) for _ in texts]
+
+@pytest.fixture
+def engine_factory(monkeypatch):
+  monkeypatch.setattr(extraction_engine, 'AttrDictHandler', FakeAttrDictHandler)
+  monkeypatch.setattr(extraction_engine, 'AttributionExtractor', FakeExtractor)
+  # 解析器の代わりに、生成したプロセスのIDを返す
+  monkeypatch.setattr(CabochaParserSingleton, '_provider',
+                      ThreadLocalProvider(os.getpid))
+  monkeypatch.setattr(MecabTaggerSingleton, '_provider',
+                      ThreadLocalProvider(os.getpid))
+  engines = []
+  def create(**kwargs):
+    engine = ExtractionEngine('dic', chunksize=1, **kwargs)
+    engines.append(engine)
+    return engine
+
+  yield create
+  for engine in engines:
+    engine.close()
+
+def extract(engine, num_items=8):
+  items = [(i, 1, 'sentence{}'.format(i)) for i in range(num_items)]
+  return [output.result for output in engine.extract(items, 'smartphone')]
+
+def test_measure_worker():
+  started_at = time.time()
+  stats = _measure_worker(started_at)
+  assert stats.pid == os.getpid()
+  assert 0 <= stats.startup_seconds <= time.time() - started_at
+  assert stats.respawned is None
+  if os.path.exists('/proc/self/smaps_rollup'):
+    assert 0 < stats.private_kb <= stats.rss_kb
+
+def test_measure_worker_without_proc(monkeypatch):
+  def unreadable(*args, **kwargs):
+    raise OSError('not available')
+
+  monkeypatch.setattr(extraction_engine, 'open', unreadable, raising=False)
+  stats = _measure_worker(time.time())
+  assert (stats.rss_kb, stats.private_kb) == (None, None)
+
+@requires_fork
+def test_preloaded_workers_share_parent_objects(engine_factory):
+  engine = engine_factory(processes=2, preload=True)
+  engine.open()
+  stats = engine.worker_stats(timeout=10)
+  assert len(stats) == 2
+  assert all(isinstance(s, WorkerStats) for s in stats)
+  assert {s.pid for s in stats}.isdisjoint({os.getpid()})
+  assert not any(s.respawned for s in stats)
+
+  # 属性抽出器も解析器も親プロセスで生成したものを使う
+  for info in extract(engine):
+    assert info['extractor'] == os.getpid()
+    assert info['parser'] == os.getpid()
+    assert info['worker'] != os.getpid()
+
+@requires_fork
+def test_respawned_worker_does_not_reload(engine_factory):
+  # 1タスクごとにワーカを作り直させる
+  engine = engine_factory(processes=2, preload=True, maxtasksperchild=1)
+  initial = {s.pid for s in engine.worker_stats(timeout=10)}
+  infos = extract(engine)
+  assert not {info['worker'] for info in infos} <= initial
+
+  deadline = time.time() + 10
+  stats = engine.worker_stats(timeout=0)
+  while len(stats) == 2 and time.time() < deadline:
+    time.sleep(0.01)
+    stats = engine.worker_stats(timeout=0)
+
+  assert [s.respawned for s in stats[:2]] == [False, False]
+  assert any(s.respawned for s in stats[2:])
+  # プールを作ったスレッド以外から fork されても、解析器を生成し直さない
+  for info in infos:
+    assert info['extractor'] == os.getpid()
+    assert info['parser'] == os.getpid()
+
+@requires_fork
+def test_many_respawned_workers(engine_factory):
+  # 作り直されたワーカの計測結果がパイプの容量(64 KiB)を超えても詰まらない
+  engine = engine_factory(processes=2, preload=True, maxtasksperchild=1)
+  infos = extract(engine, num_items=1000)
+  assert len(infos) == 1000
+
+  stats = engine.worker_stats(timeout=0)
+  assert len(stats) <= 2 + extraction_engine.MAX_RESPAWNED_WORKER_STATS
+  engine.close()
+
+def test_preload_without_fork(engine_factory, monkeypatch):
+  get_context = multiprocessing.get_context
+  def get_context_without_fork(method=None):
+    if method == 'fork':
+      raise ValueError('cannot find context for {!r}'.format(method))
+
+    return get_context(method)
+
+  monkeypatch.setattr(multiprocessing, 'get_context', get_context_without_fork)
+  engine = engine_factory(processes=2, preload=True)
+  engine.open()
+  stats = engine.worker_stats(timeout=10)
+  assert len(stats) == 2
+  assert all(s.respawned is None for s in stats)
+  # 各ワーカが自身で属性抽出器を生成する
+  for info in extract(engine):
+    assert info['extractor'] == info['worker']
@@ -0,0 +1,20 @@
+from review_research.nlp import normalize
+from review_research.nlp import TextCleaner
+
+text = 'ＪＵｎｉｔに触発された😀ものです。。。\n  ﾃｽﾄの自動化をサポートしています。'
+
+def test_text_cleaner():
+  cleaner = TextCleaner()
+  assert cleaner(text) == 'junitに触発されたものです。テストの自動化をサポートしています。'
+
+def test_text_cleaner_switches():
+  assert TextCleaner(fix_text=False)(text) == normalize(text)
+  assert TextCleaner(normalize_text=False)('ＡＢ。。\n Ｃ') == 'ＡＢ。Ｃ'
+
+def test_text_cleaner_cache():
+  cleaner = TextCleaner(cache_size=2)
+  for t in ('Ａ', 'Ｂ', 'Ａ', 'Ｃ'):
+    assert cleaner(t) == normalize(t)
+
+  assert len(cleaner) == 2
+  assert 'Ｂ' not in cleaner._cache
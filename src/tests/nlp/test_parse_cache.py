@@ -0,0 +1,93 @@
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+
+from review_research.nlp import normalize
+from review_research.nlp import DependencyAnalyzer
+from review_research.nlp import ParseCache
+from review_research.nlp.analyze_dependency import AnalysisResult
+
+text = normalize('ユニットテストフレームワークは元々JUnitに触発されたもので、他の言語の主要なユニットテストフレームワークと同じような感じです。')
+
+def test_parse_cache_hit(tmp_path):
+  cache = ParseCache(tmp_path / 'cache.sqlite3')
+  da = DependencyAnalyzer(cache=cache)
+  result1 = da.analyze(text)
+  result2 = da.analyze(text)
+  assert cache.stats == (1, 1, 1)
+  assert result1.chunk_dict == result2.chunk_dict
+  assert [t.feature for t in result1.token_dict.values()] \
+      == [t.feature for t in result2.token_dict.values()]
+  assert all(t.chunk is None for t in result2.token_dict.values())
+
+def test_parse_cache_eviction(tmp_path):
+  cache = ParseCache(tmp_path / 'cache.sqlite3', max_entries=2)
+  da = DependencyAnalyzer(cache=cache)
+  for sentence in ('画面がきれい。', '電池の持ちが悪い。', '値段が安い。'):
+    da.analyze(sentence)
+
+  assert len(cache) == 2
+  assert cache.get('画面がきれい。') is None
+  assert cache.get('値段が安い。') is not None
+
+def make_cache(path, **kwargs):
+  return ParseCache(path, dictionary_version='dic', parser_version='parser',
+                    **kwargs)
+
+def make_result(tree):
+  return AnalysisResult(OrderedDict(), OrderedDict(), tree)
+
+def last_access(path, cache, sentence):
+  # 別の接続から、ファイルに書き込まれた参照日時を読む
+  with closing(sqlite3.connect(str(path))) as connection:
+    return connection.execute('SELECT last_access FROM parse_cache WHERE key = ?',
+                              (cache.make_key(sentence),)).fetchone()[0]
+
+def test_parse_cache_buffers_access(tmp_path):
+  path = tmp_path / 'cache.sqlite3'
+  cache = make_cache(path, flush_interval=3)
+  cache.put('a', make_result('tree a'))
+  put_at = last_access(path, cache, 'a')
+  assert cache.get('a').tree == 'tree a'
+  assert cache.get('a').tree == 'tree a'
+  assert last_access(path, cache, 'a') == put_at
+
+  cache.get('a')
+  flushed_at = last_access(path, cache, 'a')
+  assert flushed_at > put_at
+
+  cache.get('a')
+  cache.close()
+  assert last_access(path, cache, 'a') > flushed_at
+
+def test_parse_cache_eviction_is_shared(tmp_path):
+  path = tmp_path / 'cache.sqlite3'
+  cache1 = make_cache(path, max_entries=2)
+  cache2 = make_cache(path, max_entries=2)
+  cache1.put('a', make_result('tree a'))
+  cache2.put('b', make_result('tree b'))
+  # 他のインスタンスでの参照も削除の順番に反映される
+  assert cache2.get('a') is not None
+  cache2.flush()
+  cache1.put('c', make_result('tree c'))
+
+  assert len(cache1) == len(cache2) == 2
+  assert cache1.get('b') is None
+  assert cache1.get('a') is not None
+  assert cache2.get('c') is not None
+
+  cache1.clear()
+  assert len(cache2) == 0
+
+def test_parse_cache_counts_existing_entries(tmp_path):
+  path = tmp_path / 'cache.sqlite3'
+  cache = make_cache(path)
+  for sentence in ('a', 'b', 'c'):
+    cache.put(sentence, make_result(sentence))
+
+  cache.close()
+  cache = make_cache(path, max_entries=2)
+  assert len(cache) == 3
+  cache.put('d', make_result('d'))
+  assert len(cache) == 2
+  assert cache.get('a') is None
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+
+import pytest
+
+from review_research.nlp import ChunkDetail
+from review_research.nlp import PhraseDetail
+from review_research.nlp import TokenDetail
+from review_research.nlp import TokenFeature
+from review_research.nlp import WordRepr
+
+FEATURES = {
+    '「': '記号,括弧開,*,*,*,*,「,「,「',
+    '」': '記号,括弧閉,*,*,*,*,」,」,」',
+    'お': '接頭詞,名詞接続,*,*,*,*,お,オ,オ',
+    '手入れ': '名詞,サ変接続,*,*,*,*,手入れ,テイレ,テイレ',
+    '画面': '名詞,一般,*,*,*,*,画面,ガメン,ガメン',
+    'スマホ': '名詞,一般,*,*,*,*,スマホ,スマホ,スマホ',
+    '用': '名詞,接尾,一般,*,*,*,用,ヨウ,ヨー',
+    'ケース': '名詞,一般,*,*,*,*,ケース,ケース,ケース',
+    '簡単': '名詞,形容動詞語幹,*,*,*,*,簡単,カンタン,カンタン',
+    'が': '助詞,格助詞,一般,*,*,*,が,ガ,ガ',
+    'は': '助詞,係助詞,*,*,*,*,は,ハ,ワ',
+    'です': '助動詞,*,*,*,特殊・デス,基本形,です,デス,デス',
+}
+
+def make_chunk(surfaces, head_begin, func_begin, first_token_id=0):
+  """文節内の形態素と、CaboCha と同じ形式の文節情報を作る
+
+  主辞の範囲の先頭(RL)は接頭詞と記号を除いた最初の形態素、
+  機能語の範囲の先頭(LF)は主辞より後ろにある記号以外の最初の形態素とする
+  """
+  tokens = OrderedDict()
+  for token_id, surface in enumerate(surfaces, first_token_id):
+    feature = TokenFeature.from_feature_string(FEATURES[surface])
+    tokens[token_id] = TokenDetail(surface, surface, feature, 'O', None)
+
+  token_list = list(tokens.values())
+  content = [t for t in token_list[:head_begin + 1]
+             if t.feature.pos not in ('接頭詞', '記号')]
+  func = [t for t in token_list[head_begin + 1:func_begin + 1]
+          if t.feature.pos != '記号']
+  features = {'RL': content[0].surface if content else '',
+              'RH': token_list[head_begin].surface,
+              'LF': func[0].surface if func else '',
+              'RF': func[-1].surface if func else '',
+              'SHP0': token_list[head_begin].feature.pos}
+  chunk_detail = ChunkDetail(''.join(surfaces), 0.0, -1, len(surfaces),
+                             first_token_id, head_begin, func_begin, features)
+  return chunk_detail, tokens
+
+@pytest.mark.parametrize('surfaces, head_begin, func_begin', [
+    (('画面', 'が'), 0, 1),
+    (('画面',), 0, 0),
+    # 文節の先頭に記号や接頭詞がある場合
+    (('「', '画面', '」', 'が'), 1, 3),
+    (('お', '手入れ', 'が'), 1, 2),
+    (('「', 'お', '手入れ', '」', 'は'), 2, 4),
+    (('簡単', 'です'), 0, 1),
+])
+def test_positions_agree_with_surfaces(surfaces, head_begin, func_begin):
+  chunk_detail, tokens = make_chunk(surfaces, head_begin, func_begin,
+                                    first_token_id=5)
+  assert PhraseDetail.from_token_positions(chunk_detail, tokens) \
+      == PhraseDetail.from_analysis_result(chunk_detail, tokens)
+
+def test_positions_strip_leading_non_content_tokens():
+  chunk_detail, tokens = make_chunk(('「', 'お', '手入れ', '」', 'は'), 2, 4)
+  phrase_detail = PhraseDetail.from_token_positions(chunk_detail, tokens)
+  assert phrase_detail == PhraseDetail('手入れ', (WordRepr('手入れ', '手入れ'),),
+                                       '名詞', 'は')
+
+def test_positions_with_repeated_surfaces():
+  # 主辞の範囲の先頭と同じ表層が範囲内に2回現れる場合
+  chunk_detail, tokens = make_chunk(('スマホ', '用', 'スマホ', 'ケース', 'が'), 3, 4)
+  phrase_detail = PhraseDetail.from_token_positions(chunk_detail, tokens)
+  assert phrase_detail.head_surface == 'スマホ用スマホケース'
+  assert [word.surface for word in phrase_detail.head_words] \
+      == ['スマホ', '用', 'スマホ', 'ケース']
+  assert phrase_detail.functional_word == 'が'
+
+  # 表層の照合では最後に現れた位置を範囲の先頭としてしまう
+  assert PhraseDetail.from_analysis_result(chunk_detail, tokens).head_surface \
+      == 'スマホケース'
+
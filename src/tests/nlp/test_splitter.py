@@ -24,3 +24,18 @@ def test_split3():
   assert len(result) == 9
 
 
+
+def test_split_spans():
+  splitter = Splitter()
+  text4 = '画面がきれい。。 画面がきれい。\n電池の持ちが悪い'
+  spans = list(splitter.split_spans(text4))
+  assert [s.text for s in spans] == ['画面がきれい。。', '画面がきれい。', '電池の持ちが悪い']
+  assert [s.index for s in spans] == [0, 1, 2]
+  assert all(text4[s.start:s.end] == s.text for s in spans)
+
+def test_split_iter():
+  splitter = Splitter()
+  reviews = iter(['画面がきれい。電池の持ちが悪い。', '', '値段が安い。'])
+  result = [(review_index, span.text)
+            for review_index, span in splitter.split_iter(reviews)]
+  assert result == [(0, '画面がきれい。'), (0, '電池の持ちが悪い。'), (2, '値段が安い。')]
@@ -0,0 +1,122 @@
+import math
+
+import numpy as np
+import pytest
+
+from review_research.nlp import TFIDF
+from review_research.nlp import load_top_k_index
+
+docs = ['画面がきれい。画面が大きい。', '電池の持ちが悪い。', '画面が暗い。']
+
+def test_tfidf_compute():
+  tfidf = TFIDF()
+  tfidf_dict = tfidf.compute(docs)
+  assert len(tfidf_dict) == tfidf.N == 3
+  assert tfidf.df_dict['画面'] == 2
+  assert math.isclose(tfidf.idf_dict['画面'], math.log(3 / 2) + 1)
+  assert list(tfidf_dict[0]['word']) == list(tfidf.df_dict)
+
+  row = tfidf_dict[0].set_index('word')['tfidf']
+  tf = tfidf.word_dict[0]['画面']
+  assert math.isclose(row['画面'], tf * tfidf.idf_dict['画面'])
+  assert row['電池'] == 0.0
+
+def test_tfidf_dict_keys():
+  tfidf = TFIDF()
+  tfidf_dict = tfidf.compute(docs)
+  assert tfidf_dict[np.int64(2)].equals(tfidf_dict[2])
+  assert np.int64(1) in tfidf_dict
+  for key in (3, -1, '0'):
+    assert key not in tfidf_dict
+    with pytest.raises(KeyError):
+      tfidf_dict[key]
+
+def test_tfidf_matrix():
+  tfidf = TFIDF()
+  sorted_dict = tfidf.compute(docs, sort=True)
+  matrix = tfidf.matrix
+  assert matrix.shape == (3, len(tfidf.vocabulary))
+  indices, values = matrix.row(1)
+  assert {list(tfidf.vocabulary)[i] for i in indices} \
+      == set(tfidf.word_dict[1])
+  assert sorted_dict[1]['tfidf'].iloc[0] == values.max()
+
+def test_tfidf_partial_fit(tmp_path):
+  expected = TFIDF()
+  expected.compute(docs)
+
+  tfidf = TFIDF()
+  tfidf.partial_fit(docs[:2])
+  tfidf.save(tmp_path / 'tfidf.npz')
+  tfidf = TFIDF.load(tmp_path / 'tfidf.npz')
+  assert tfidf.partial_fit(docs[2:]) == range(2, 3)
+  assert tfidf.df_dict == expected.df_dict
+  assert tfidf.idf_dict == expected.idf_dict
+  for doc_id in range(len(docs)):
+    assert tfidf.tfidf_dict[doc_id].equals(expected.tfidf_dict[doc_id])
+
+def test_tfidf_top_k(tmp_path):
+  tfidf = TFIDF()
+  sorted_dict = tfidf.compute(docs, sort=True)
+  top_terms = tfidf.top_k(0, k=2)
+  assert len(top_terms) == 2
+  assert [t.score for t in top_terms] \
+      == sorted_dict[0]['tfidf'].iloc[:2].tolist()
+
+  tfidf.save_top_k_index(tmp_path / 'top_k.json', k=2)
+  index = load_top_k_index(tmp_path / 'top_k.json')
+  assert len(index) == len(docs)
+  assert list(index[0]) == top_terms
+  with pytest.raises(ValueError):
+    load_top_k_index(tmp_path / 'top_k.json', k=3)
+
+def test_tfidf_export(tmp_path):
+  tfidf = TFIDF()
+  tfidf_dict = tfidf.compute(docs)
+  # 文書数より小さい上限でも1語ずつ展開して書き出す
+  tfidf.to_csv(tmp_path / 'tfidf.csv', max_cells=1)
+  with open(tmp_path / 'tfidf.csv', encoding='utf-8') as fp:
+    lines = fp.read().splitlines()
+
+  tfidf.to_csv(tmp_path / 'tfidf_large.csv')
+  with open(tmp_path / 'tfidf_large.csv', encoding='utf-8') as fp:
+    assert fp.read().splitlines() == lines
+
+  assert lines[0] == 'review_index,0,1,2'
+  assert len(lines) == len(tfidf.vocabulary) + 1
+  word, *values = lines[1].split(',')
+  assert [float(v) for v in values] \
+      == [tfidf_dict[i]['tfidf'].iloc[0] for i in range(len(docs))]
+
+  tfidf.to_npz(tmp_path / 'tfidf.npz')
+  with np.load(tmp_path / 'tfidf.npz') as saved:
+    assert tuple(saved['shape']) == tfidf.matrix.shape
+    assert np.array_equal(saved['data'], tfidf.matrix.data)
+
+  tfidf.to_mtx(tmp_path / 'tfidf.mtx', chunk_size=1)
+  with open(tmp_path / 'tfidf.mtx', encoding='utf-8') as fp:
+    assert len(fp.read().splitlines()) == 2 + len(tfidf.matrix.data)
+
+def test_tfidf_csv_block_is_bounded(tmp_path, monkeypatch):
+  tfidf = TFIDF()
+  tfidf.compute(docs)
+  shapes = []
+  zeros = np.zeros
+  def recording_zeros(shape, *args, **kwargs):
+    shapes.append(shape)
+    return zeros(shape, *args, **kwargs)
+
+  monkeypatch.setattr(np, 'zeros', recording_zeros)
+  tfidf.to_csv(tmp_path / 'tfidf.csv', max_cells=2 * len(docs))
+  assert shapes
+  assert all(rows * cols <= 2 * len(docs) for rows, cols in shapes)
+  assert sum(rows for rows, _ in shapes) == len(tfidf.vocabulary)
+
+def test_tfidf_to_parquet(tmp_path):
+  parquet = pytest.importorskip('pyarrow.parquet')
+  tfidf = TFIDF()
+  tfidf.compute(docs)
+  tfidf.to_parquet(tmp_path / 'tfidf.parquet', chunk_size=2)
+  table = parquet.read_table(tmp_path / 'tfidf.parquet')
+  assert table.column_names == ['review_index', 'word', 'tfidf']
+  assert table.num_rows == len(tfidf.matrix.data)
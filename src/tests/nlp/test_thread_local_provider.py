@@ -0,0 +1,48 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from review_research.nlp import ThreadLocalProvider
+
+def run_in_thread(func):
+  with ThreadPoolExecutor(max_workers=1) as executor:
+    return executor.submit(func).result()
+
+def test_instance_per_thread():
+  counter = itertools.count()
+  provider = ThreadLocalProvider(lambda: next(counter))
+  assert provider.num_instances == 0
+
+  instance = provider.get_instance()
+  assert provider.get_instance() == instance
+  assert run_in_thread(provider.get_instance) != instance
+
+def test_reuse_instance_of_finished_thread():
+  counter = itertools.count()
+  provider = ThreadLocalProvider(lambda: next(counter))
+  first = run_in_thread(provider.get_instance)
+  second = run_in_thread(provider.get_instance)
+  assert first == second
+  assert provider.num_instances == 1
+
+def test_release():
+  counter = itertools.count()
+  provider = ThreadLocalProvider(lambda: next(counter), max_instances=1)
+  instance = provider.get_instance()
+  provider.release()
+  provider.release()
+  assert run_in_thread(provider.get_instance) == instance
+
+def test_max_instances():
+  provider = ThreadLocalProvider(object, max_instances=1, timeout=0.01)
+  provider.get_instance()
+  with pytest.raises(RuntimeError):
+    run_in_thread(provider.get_instance)
+
+  provider.max_instances = 2
+  run_in_thread(provider.get_instance)
+  assert provider.num_instances == 2
+
+  with pytest.raises(ValueError):
+    provider.max_instances = 0
@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from review_research.nlp import FeatureVocabulary
+from review_research.nlp import TokenDetail
+from review_research.nlp import TokenFeature
+from review_research.nlp import TokenTable
+
+token_details = [
+    TokenDetail('画面', '画面',
+                TokenFeature.from_feature_string('名詞,一般,*,*,*,*,画面,ガメン,ガメン'),
+                'O', None),
+    TokenDetail('が', 'が',
+                TokenFeature.from_feature_string('助詞,格助詞,一般,*,*,*,が,ガ,ガ'),
+                'O', None),
+    TokenDetail('きれい', 'きれい',
+                TokenFeature.from_feature_string('名詞,形容動詞語幹,*,*,*,*,きれい'),
+                'O', None),
+]
+
+def test_token_table_views():
+  table = TokenTable.from_token_details(token_details)
+  assert len(table) == 3
+  assert [view.to_token_detail() for view in table.values()] == token_details
+  assert table[2].feature.reading == '*'
+  assert table[1].surface == 'が'
+
+def test_token_table_integer_keys():
+  table = TokenTable.from_token_details(token_details)
+  assert table[np.int64(1)].surface == 'が'
+  assert table.get(np.intp(2)).to_token_detail() == token_details[2]
+  for key in (3, -1, '1', 1.0):
+    with pytest.raises(KeyError):
+      table[key]
+
+def test_token_table_pos_filter():
+  table = TokenTable.from_token_details(token_details)
+  assert table.indices_with_pos(['名詞']) == (0, 2)
+  assert table.indices_with_pos(['動詞']) == ()
+
+class FakeCabochaToken:
+  def __init__(self, token_detail):
+    self.surface = token_detail.surface
+    self.normalized_surface = token_detail.normalized
+    self.feature = ','.join(token_detail.feature)
+    self.ne = token_detail.named_entity
+
+class FakeCabochaTree:
+  def __init__(self, token_details):
+    self._tokens = [FakeCabochaToken(t) for t in token_details]
+
+  def token_size(self):
+    return len(self._tokens)
+
+  def token(self, i):
+    return self._tokens[i]
+
+def test_token_table_from_cabocha_tree():
+  table = TokenTable.from_cabocha_tree(FakeCabochaTree(token_details))
+  assert [view.to_token_detail() for view in table.values()] == token_details
+  assert table == TokenTable.from_token_details(token_details)
+
+def test_open_vocabulary_fields_are_not_interned():
+  vocabulary = FeatureVocabulary()
+  TokenTable.from_token_details(token_details, vocabulary)
+  size = len(vocabulary)
+  new_token = TokenDetail('液晶', '液晶',
+                          TokenFeature.from_feature_string('名詞,一般,*,*,*,*,液晶,エキショウ,エキショー'),
+                          'O', None)
+  table = TokenTable.from_token_details([new_token], vocabulary)
+  assert len(vocabulary) == size
+  assert table[0].to_token_detail() == new_token
+
+def test_feature_vocabulary_intern_from_threads():
+  vocabulary = FeatureVocabulary()
+  values = ['品詞{}'.format(i % 500) for i in range(20000)]
+  with ThreadPoolExecutor(max_workers=8) as executor:
+    ids = list(executor.map(vocabulary.intern, values))
+
+  assert len(vocabulary) == 500
+  assert all(vocabulary.string(value_id) == value
+             for value, value_id in zip(values, ids))
@@ -47,7 +47,17 @@ def test_tokenizer6():
   assert len(result) == 10
 
 
+def test_tokenize_many():
+  texts = [text, '良いです。', text]
+  results = list(tokenizer.tokenize_many(texts))
+  assert len(results) == 3
+  assert results[0] == results[2] == tuple(tokenizer._tokenize(text))
+  assert all(len(token) == 10 for token in results[1])
 
+def test_get_baseform_spans():
+  spans = tokenizer.get_baseform_spans(text, pos_list=None)
+  assert [s.word for s in spans] == tokenizer.get_baseforms(text, pos_list=None)
+  assert all(text[s.start:s.end] == s.word.surface for s in spans)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+import argparse
+import json
+from collections import OrderedDict
+
+from review_research import predict_allocating_attributes
+from review_research.nlp import ALL_EXTRACTION_OPTIONS
+from review_research.nlp import CabochaParserSingleton
+from review_research.nlp import PrefilterStats
+from review_research.nlp import ThreadLocalProvider
+from review_research.nlp import WordRepr
+from review_research.nlp import extraction_engine
+
+class FakeAttrDictHandler:
+  common_ja2en = {'その他': 'other'}
+
+  def __init__(self, dic_dir):
+    pass
+
+  def ja2en(self, category):
+    return {'画面': 'screen'}
+
+class FakeExtractor:
+  """「画面」を含む文から、集合を含む AttributionExtractor と同じ形の結果を返す属性抽出器"""
+
+  def __init__(self, dic_dir, parse_cache=None, prefilter=False,
+               verify_rate=0.0, compact_tokens=False):
+    self.category = None
+    self.parse_cache = parse_cache
+    self.prefilter_stats = PrefilterStats(0, 0, 0, 0)
+
+  def extract_attributions_with_options(self, texts, options):
+    results = []
+    for text in texts:
+      info = OrderedDict([
+          ('flagment', text),
+          ('candidate_terms', frozenset(['画面', WordRepr('画面', '画面')])),
+          ('hit_terms', frozenset(['画面'])),
+          ('phrases', frozenset(['画面が', 'きれい'])),
+          ('num_phrases', 2)])
+      result_dict = OrderedDict([('画面', (info,))]) if '画面' in text else OrderedDict()
+      results.append(OrderedDict((option, result_dict) for option in options))
+
+    return results
+
+def write_review_json(product_dir):
+  review_infos = [
+      {'date': '2019年5月1日', 'star': 5.0, 'vote': 0, 'name': 'reviewer',
+       'title': 'title', 'review': '画面がきれい。電池の持ちが悪い。'},
+      {'date': '2019年5月2日', 'star': 1.0, 'vote': 0, 'name': 'reviewer',
+       'title': 'title', 'review': '重い。'},
+  ]
+  review_data = {'link': 'https://www.amazon.co.jp', 'maker': 'maker',
+                 'product': 'product', 'category': 'smartphone',
+                 'average_stars': 3.0, 'total_reviews': 2, 'real_reviews': 2,
+                 'stars_distribution': [50, 0, 0, 0, 50],
+                 'reviews': review_infos}
+  product_dir.mkdir(parents=True)
+  with (product_dir / 'review.json').open(mode='w', encoding='utf-8') as fp:
+    json.dump(review_data, fp, ensure_ascii=False)
+
+def test_main(tmp_path, monkeypatch):
+  monkeypatch.setattr(extraction_engine, 'AttrDictHandler', FakeAttrDictHandler)
+  monkeypatch.setattr(extraction_engine, 'AttributionExtractor', FakeExtractor)
+  # 係り受け解析器は使わないため、辞書を読み込まない
+  monkeypatch.setattr(CabochaParserSingleton, '_provider', ThreadLocalProvider(object))
+  product_dir = tmp_path / 'reviews' / 'product'
+  write_review_json(product_dir)
+  args = argparse.Namespace(
+      dic_dir=str(tmp_path / 'dic'), review_dir=str(tmp_path / 'reviews'),
+      processes=1, chunksize=2, parse_cache=None, prefilter=False,
+      verify_rate=0.0, compact_tokens=False, preload=False, daemon=None)
+  predict_allocating_attributes.main(args)
+
+  out_files = sorted(path.name for path in product_dir.glob('prediction*.json'))
+  assert len(out_files) == len(ALL_EXTRACTION_OPTIONS)
+  with (product_dir / 'prediction_extended_ristrict.json').open(encoding='utf-8') as fp:
+    prediction = json.load(fp)
+
+  assert prediction['category'] == 'smartphone'
+  assert prediction['product'] == 'product'
+  assert prediction['total_review'] == 2
+  assert prediction['total_text'] == 3
+  texts = prediction['texts']
+  assert [(text['review_id'], text['text_id'], text['last_text_id'])
+          for text in texts] == [(1, 1, 2), (1, 2, 2), (2, 1, 1)]
+  assert texts[0]['text'] == '画面がきれい。'
+  info, = texts[0]['result']['screen']
+  assert info['candidate_terms'] == ['画面', ['画面', '画面']]
+  assert info['phrases'] == ['きれい', '画面が']
+  assert texts[1]['result'] == {}
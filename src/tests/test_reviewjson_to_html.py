@@ -0,0 +1,43 @@
+import json
+
+from review_research import reviewjson_to_html
+from review_research.nlp import TFIDF
+from review_research.nlp import TOP_K_INDEX_NAME
+from review_research.nlp import load_top_k_index
+
+reviews = ['画面がきれい。画面が大きい。', '電池の持ちが悪い。', '画面が暗い。']
+
+def write_review_json(product_dir, reviews):
+  review_infos = [{'date': '2019年5月1日', 'star': 5.0, 'vote': 0,
+                   'name': 'reviewer', 'title': 'title', 'review': review}
+                  for review in reviews]
+  review_data = {'link': 'https://www.amazon.co.jp', 'maker': 'maker',
+                 'product': 'product', 'category': 'smartphone',
+                 'average_stars': 5.0, 'total_reviews': len(reviews),
+                 'real_reviews': len(reviews),
+                 'stars_distribution': [0, 0, 0, 0, 100],
+                 'reviews': review_infos}
+  reviewjson = product_dir / 'review.json'
+  with reviewjson.open(mode='w', encoding='utf-8') as fp:
+    json.dump(review_data, fp, ensure_ascii=False)
+
+  return reviewjson
+
+def test_save_keyword_index_skips_valid_index(tmp_path):
+  reviewjson = write_review_json(tmp_path, reviews)
+  index_path = tmp_path / TOP_K_INDEX_NAME
+  assert reviewjson_to_html.save_keyword_index(TFIDF(), reviewjson, 2)
+  index = load_top_k_index(index_path)
+  # 同じレビューの一覧と k であれば、TF-IDF を計算し直さない
+  assert not reviewjson_to_html.save_keyword_index(TFIDF(), reviewjson, 2)
+  assert load_top_k_index(index_path) == index
+
+  # k やレビューの一覧が変わった場合と、壊れたファイルは作り直す
+  assert reviewjson_to_html.save_keyword_index(TFIDF(), reviewjson, 1)
+  assert load_top_k_index(index_path, k=1)
+  write_review_json(tmp_path, reviews[:2])
+  assert reviewjson_to_html.save_keyword_index(TFIDF(), reviewjson, 1)
+  assert len(load_top_k_index(index_path)) == 2
+  index_path.write_text('{', encoding='utf-8')
+  assert reviewjson_to_html.save_keyword_index(TFIDF(), reviewjson, 1)
+  assert len(load_top_k_index(index_path, k=1)) == 2